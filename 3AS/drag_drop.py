@@ -1,25 +1,34 @@
 #!/usr/bin/env python3
-import json
 import os
 import shutil
+import sys
+
+# index des projets gns3, partagé avec final_conf
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "final_conf"))
+from gns3_project import load_project, check_intent_links
 
 # Récupération des noms des dossiers où les configs doivent être placées
 # A MODIFIER : nom du fichier gns3
-with open('3AS_GNS.gns3', 'r', encoding='utf-8') as f:
-    data = json.load(f)
-
-folders = {}
-for node in data['topology']['nodes']:
-    name = node['name']
-    node_id = node['node_id']
-    folders[name] = node_id
-        
+project = load_project('3AS_GNS.gns3')
+folders = project.node_ids()
+
+INTENT_FILE = "intent_3AS.json" # pour vérifier que les câbles du projet correspondent aux interfaces de l'intent
+CHECK_LINKS = True
+
 # A MODIFIER : dossier source
 SOURCE_CFG_DIR = "configs" # Dossier où le script de génération a déposé les fichiers de config
 
 GNS3_PROJECT_ROOT = "" # Chemin vers le répertoire racine du projet GNS3 où se trouvent 'project-files/dynamips'
 
 def run_drag_and_drop_bot():
+    if CHECK_LINKS:
+        problems = check_intent_links(project, INTENT_FILE)
+        if problems:
+            print(f"L'intent ne correspond pas au projet GNS3 ({len(problems)} incohérence(s)), rien n'est déployé :")
+            for problem in problems:
+                print(f"  - {problem}")
+            return
+
     print("Début du déploiement des configurations...")
     
     # On parcourt les routeurs extraits dans 'folders'
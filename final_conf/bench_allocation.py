@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+# Petit benchmark des allocateurs d'adresses de generate_conf.py
+# On construit une AS synthétique en anneau (N routeurs, N liens) et on mesure le temps d'allocation des préfixes de liens.
+# Si c'est linéaire, le temps par lien doit rester à peu près constant quand N double.
+# La dernière colonne (allocate_addresses) inclut aussi les loopbacks.
+
+import ipaddress
+import time
+
+from generate_conf import AutonomousSystem, Interface, Router, Neighbor, allocate_addresses, build_link_index
+
+SIZES = [250, 500, 1000, 2000, 5000]
+
+
+def build_ring_as(n: int) -> AutonomousSystem:
+    """Crée une AS de n routeurs reliés en anneau (R1-R2-...-Rn-R1), sans adresses."""
+    as_obj = AutonomousSystem(
+        name="AS1",
+        asn=1,
+        ipv6_prefix=ipaddress.IPv6Network("2001:100:1::/48"),
+        loopback_pool=ipaddress.IPv6Network("2001:100:1::/64"),
+        link_pool=ipaddress.IPv6Network("2001:100:1:8000::/49"), # /49 pour avoir assez de /64
+        inter_as_link_pool=ipaddress.IPv6Network("2001:100:100::/56"),
+        protocol="rip",
+    )
+    for i in range(1, n + 1):
+        prev_r = f"R{(i - 2) % n + 1}"
+        next_r = f"R{i % n + 1}"
+        as_obj.routers[f"R{i}"] = Router(
+            name=f"R{i}",
+            role="core",
+            asn=1,
+            neighbors=(
+                Neighbor(router=prev_r, type="intra-as", interface="GigabitEthernet1/0"),
+                Neighbor(router=next_r, type="intra-as", interface="GigabitEthernet2/0"),
+            ),
+        )
+    return as_obj
+
+
+def legacy_allocate_link_prefix(as_obj: AutonomousSystem) -> ipaddress.IPv6Network:
+    """Ancienne version (liste des sous-réseaux + re-parcours des interfaces) gardée pour comparer."""
+    used = set()
+    for r in as_obj.routers.values():
+        for iface in r.interfaces.values():
+            used.add(ipaddress.IPv6Network(f"{iface.ipv6}/{iface.prefix_len}", strict=False).supernet(new_prefix=64))
+    for net in as_obj.link_pool.subnets(new_prefix=64):
+        if net not in used:
+            return net
+    raise ValueError("Link pool exhausted")
+
+
+def bench_links(n: int, legacy: bool = False) -> float:
+    """Temps (s) pour allouer les n liens de l'anneau, sans compter les loopbacks."""
+    as_obj = build_ring_as(n)
+    link_index = build_link_index({as_obj.name: as_obj})
+    start = time.perf_counter()
+    for router in as_obj.routers.values():
+        for neigh in router.neighbors:
+            if neigh.interface in router.interfaces:
+                continue
+            prefix = legacy_allocate_link_prefix(as_obj) if legacy else as_obj.allocate_link_prefix()
+            router.interfaces[neigh.interface] = Interface(neigh.interface, int(prefix[1]), 64)
+            link = link_index[(as_obj.name, router.name, neigh.router)]
+            link.remote.router.interfaces[link.remote.interface] = Interface(link.remote.interface, int(prefix[2]), 64)
+    return time.perf_counter() - start
+
+
+def bench_full(n: int) -> float:
+    """Temps (s) de allocate_addresses complet (loopbacks + liens)."""
+    as_obj = build_ring_as(n)
+    start = time.perf_counter()
+    allocate_addresses({as_obj.name: as_obj})
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    print(f"{'routeurs':>9} {'liens (s)':>10} {'us/lien':>8} {'ancien (s)':>11} {'allocate_addresses (s)':>23}")
+    for n in SIZES:
+        t = bench_links(n)
+        t_legacy = bench_links(n, legacy=True) if n <= 500 else float("nan") # l'ancienne version est trop lente au-delà
+        t_full = bench_full(n)
+        print(f"{n:>9} {t:>10.4f} {t / n * 1e6:>8.1f} {t_legacy:>11.4f} {t_full:>23.4f}")
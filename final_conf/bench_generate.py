@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+# Benchmark de la chaîne de génération sur des intents synthétiques (synthetic_intent.py) :
+# parse_intent -> build_link_index -> build_inter_as_neighbors -> allocate_addresses -> build_bgp_* -> rendu des configs.
+# Chaque étape est chronométrée séparément, avec le pic mémoire (tracemalloc).
+# Usage : python bench_generate.py --as 10 --routers 50,100,200 --json resultats.json
+#         python bench_generate.py ... --baseline resultats.json  (code de sortie 1 si une étape a régressé)
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from generate_conf import (parse_intent, build_link_index, build_inter_as_neighbors, allocate_addresses,
+                           build_bgp_fullmesh, build_bgp_rr, snapshot_router, render_router_config)
+from synthetic_intent import generate_intent
+
+STAGES = ["parse_intent", "build_link_index", "build_inter_as_neighbors", "allocate_addresses", "build_bgp",
+          "snapshot", "render"]
+
+
+def _measure(fn: Callable, track_memory: bool):
+    """Lance fn() et renvoie (résultat, secondes, pic mémoire en octets ou None)."""
+    if track_memory:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] - base if track_memory else None
+    return result, elapsed, peak
+
+
+def run_pipeline(intent_path: str, route_reflection: bool, track_memory: bool = True) -> Dict[str, Dict[str, float]]:
+    """
+    Déroule la génération complète (sans écrire les fichiers) et mesure chaque étape.
+
+    Return:
+        Dict: {étape: {"seconds": ..., "peak_bytes": ...}} + quelques compteurs dans "_counts"
+    """
+    results = {}
+    if track_memory:
+        tracemalloc.start()
+    try:
+        as_map, t, m = _measure(lambda: parse_intent(intent_path), track_memory)
+        results["parse_intent"] = {"seconds": t, "peak_bytes": m}
+
+        link_index, t, m = _measure(lambda: build_link_index(as_map), track_memory)
+        results["build_link_index"] = {"seconds": t, "peak_bytes": m}
+
+        _, t, m = _measure(lambda: build_inter_as_neighbors(as_map, None, link_index), track_memory)
+        results["build_inter_as_neighbors"] = {"seconds": t, "peak_bytes": m}
+
+        _, t, m = _measure(lambda: allocate_addresses(as_map, link_index), track_memory)
+        results["allocate_addresses"] = {"seconds": t, "peak_bytes": m}
+
+        build = build_bgp_rr if route_reflection else build_bgp_fullmesh
+        _, t, m = _measure(lambda: build(as_map), track_memory)
+        results["build_bgp"] = {"seconds": t, "peak_bytes": m}
+
+        snaps, t, m = _measure(lambda: [snapshot_router(r, a, link_index) for a in as_map.values() for r in a.routers.values()], track_memory)
+        results["snapshot"] = {"seconds": t, "peak_bytes": m}
+
+        lines, t, m = _measure(lambda: sum(render_router_config(s, route_reflection).count("\n") + 1 for s in snaps), track_memory)
+        results["render"] = {"seconds": t, "peak_bytes": m}
+
+        results["_counts"] = {
+            "routers": len(snaps),
+            "links": len(link_index) // 2,
+            "bgp_sessions": sum(len(s.bgp_neighbors) for s in snaps) // 2,
+            "lines": lines,
+        }
+    finally:
+        if track_memory:
+            tracemalloc.stop()
+    return results
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Liste des étapes plus lentes que la référence de plus de `tolerance` (0.25 = +25%), pour chaque taille."""
+    regressions = []
+    for size, stages in current.items():
+        for stage in STAGES:
+            old = baseline.get(size, {}).get(stage, {}).get("seconds")
+            new = stages[stage]["seconds"]
+            if old and new > old * (1 + tolerance) and new - old > 0.005: # on ignore le bruit sur les étapes de qq ms
+                regressions.append(f"{size} {stage}: {old:.4f}s -> {new:.4f}s (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de la génération de configs")
+    parser.add_argument("--as", dest="n_as", type=int, default=5, help="nombre d'AS")
+    parser.add_argument("--routers", default="20,50,100,200", help="routeurs par AS, plusieurs tailles séparées par des virgules")
+    parser.add_argument("--degree", type=float, default=4)
+    parser.add_argument("--ospf-ratio", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--full-mesh", action="store_true", help="iBGP full-mesh au lieu de la route reflection")
+    parser.add_argument("--no-memory", action="store_true", help="sans tracemalloc (temps plus proches du réel)")
+    parser.add_argument("--json", help="écrit les résultats dans ce fichier")
+    parser.add_argument("--baseline", help="résultats de référence (--json d'un run précédent) à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="régression tolérée (0.25 = +25%%)")
+    args = parser.parse_args()
+
+    all_results = {}
+    header = f"{'taille':>10} " + " ".join(f"{s[:12]:>12}" for s in STAGES) + f" {'total':>8} {'pic Mo':>7}"
+    print(header)
+    for m in [int(x) for x in args.routers.split(",")]:
+        intent = generate_intent(args.n_as, m, args.degree, args.ospf_ratio, seed=args.seed)
+        fd, path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump(intent, f)
+        try:
+            res = run_pipeline(path, not args.full_mesh, track_memory=not args.no_memory)
+        finally:
+            os.remove(path)
+        size = f"{args.n_as}x{m}"
+        all_results[size] = res
+        total = sum(res[s]["seconds"] for s in STAGES)
+        peaks = [res[s]["peak_bytes"] or 0 for s in STAGES]
+        print(f"{size:>10} " + " ".join(f"{res[s]['seconds']:>12.4f}" for s in STAGES) + f" {total:>8.3f} {max(peaks) / 1e6:>7.1f}")
+        print(f"{'':>10} {res['_counts']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(all_results, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(all_results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRégressions :")
+            for r in regressions:
+                print(" ", r)
+            raise SystemExit(1)
+        print("\nPas de régression par rapport à la référence")
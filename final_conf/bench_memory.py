@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+
+# Benchmark mémoire du modèle de topologie (Interface / Neighbor / Router) sur des intents synthétiques.
+# On compare le modèle actuel (slots, adresses en int, voisins en tuple) à l'ancien modèle (dataclasses classiques,
+# objets IPv6Address, dicts indexés par str(ip), listes), recopié ici comme bench_allocation.py garde l'ancien allocateur.
+# Les deux copies sont construites à partir de la même topologie résolue et mesurées avec tracemalloc.
+# Usage : python bench_memory.py --as 10 --routers 100,1000
+
+import argparse
+import ipaddress
+import json
+import os
+import tempfile
+import tracemalloc
+from dataclasses import dataclass, field, replace
+from typing import Callable, Dict, List, Optional
+
+from generate_conf import (Router, parse_intent, build_link_index, build_inter_as_neighbors, allocate_addresses,
+                           build_bgp_rr, snapshot_router)
+from synthetic_intent import generate_intent
+
+
+@dataclass
+class LegacyInterface:
+    name: str
+    ipv6: ipaddress.IPv6Address
+    prefix_len: int
+    ospf_area: Optional[int] = None
+    ripng: bool = False
+
+
+@dataclass
+class LegacyNeighbor:
+    router: str
+    type: str
+    interface: str
+    ospf_cost: Optional[int] = None
+    bgp_role: Optional[str] = None
+
+
+@dataclass
+class LegacyRouter:
+    name: str
+    role: str
+    asn: int
+    neighbors: List[LegacyNeighbor]
+    rr_role: str = "client"
+    loopback: Optional[ipaddress.IPv6Address] = None
+    interfaces: Dict[str, LegacyInterface] = field(default_factory=dict)
+    bgp_neighbors: Dict[str, int] = field(default_factory=dict)
+    bgp_policies: Dict[str, Dict[str, str]] = field(default_factory=dict)
+
+
+def to_legacy(router: Router) -> LegacyRouter:
+    return LegacyRouter(
+        name=router.name,
+        role=router.role,
+        asn=router.asn,
+        neighbors=[LegacyNeighbor(n.router, n.type, n.interface, n.ospf_cost, n.bgp_role) for n in router.neighbors],
+        rr_role=router.rr_role,
+        loopback=router.loopback,
+        interfaces={k: LegacyInterface(i.name, i.ipv6, i.prefix_len, i.ospf_area, i.ripng) for k, i in router.interfaces.items()},
+        bgp_neighbors={str(ipaddress.IPv6Address(ip)): asn for ip, asn in router.bgp_neighbors.items()},
+        bgp_policies=router.bgp_policies,
+    )
+
+
+def to_compact(router: Router) -> Router:
+    # même copie profonde que to_legacy, mais avec les classes actuelles
+    return replace(
+        router,
+        neighbors=tuple(replace(n) for n in router.neighbors),
+        interfaces={k: replace(i) for k, i in router.interfaces.items()},
+        bgp_neighbors=dict(router.bgp_neighbors),
+        rr_clients=set(router.rr_clients),
+    )
+
+
+def measure(build: Callable) -> int:
+    """Octets alloués (et encore vivants) par build(), le résultat est gardé en vie pendant la mesure."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del result
+    return size
+
+
+def bench(n_as: int, routers_per_as: int, degree: float, seed: int) -> Dict[str, int]:
+    intent = generate_intent(n_as, routers_per_as, degree, seed=seed)
+    fd, path = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump(intent, f)
+    try:
+        as_map = parse_intent(path)
+    finally:
+        os.remove(path)
+    link_index = build_link_index(as_map)
+    build_inter_as_neighbors(as_map, None, link_index)
+    allocate_addresses(as_map, link_index)
+    build_bgp_rr(as_map)
+
+    routers = [(r, a) for a in as_map.values() for r in a.routers.values()]
+    return {
+        "routers": len(routers),
+        "legacy": measure(lambda: [to_legacy(r) for r, _ in routers]),
+        "compact": measure(lambda: [to_compact(r) for r, _ in routers]),
+        "snapshots": measure(lambda: [snapshot_router(r, a, link_index) for r, a in routers]),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mémoire du modèle de topologie, ancien vs compact")
+    parser.add_argument("--as", dest="n_as", type=int, default=10, help="nombre d'AS")
+    parser.add_argument("--routers", default="100,500,1000", help="routeurs par AS, plusieurs tailles séparées par des virgules")
+    parser.add_argument("--degree", type=float, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'routeurs':>9} {'ancien (Mo)':>12} {'compact (Mo)':>13} {'gain':>6} {'o/routeur':>10} {'snapshots (Mo)':>15}")
+    for m in [int(x) for x in args.routers.split(",")]:
+        res = bench(args.n_as, m, args.degree, args.seed)
+        print(f"{res['routers']:>9} {res['legacy'] / 1e6:>12.1f} {res['compact'] / 1e6:>13.1f} "
+              f"{(1 - res['compact'] / res['legacy']) * 100:>5.0f}% {res['compact'] / res['routers']:>10.0f} "
+              f"{res['snapshots'] / 1e6:>15.1f}")
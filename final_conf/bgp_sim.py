@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+
+# Simulateur BGP hors ligne : à partir de la topologie résolue (les mêmes snapshots que ceux qui servent au rendu des
+# configs), on propage le préfixe de chaque AS sur les sessions eBGP / iBGP en appliquant ce que disent les configs
+# générées : SET-COMMUNITY-<ROLE> (community + local-pref) en entrée, EXPORT-FILTER-PROVIDER/PEER et PASS-ALL en sortie,
+# next-hop-self et send-community en iBGP, route reflection (clients / non-clients, originator-id, cluster-list).
+# On obtient la table BGP attendue de chaque routeur en quelques secondes, sans démarrer les routeurs Dynamips.
+# Usage : python bgp_sim.py intent_file_17_routers.json [--router R1 ...] [--json tables.json]
+#
+# Propagation par liste de travail : seul un routeur dont le meilleur chemin a changé ré-annonce à ses voisins,
+# et un voisin ne recalcule son meilleur chemin que si ce qu'il reçoit a changé. Simplifications assumées :
+# l'IGP joint tous les next-hops, une seule route (origin IGP, pas de MED) par préfixe d'AS.
+
+import argparse
+import ipaddress
+import json
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from generate_conf import RouterSnapshot, IntentError, ipv6_str, resolve_snapshots, TOPOLOGY_CACHE_DIR
+
+DEFAULT_LOCAL_PREF = 100 # local-pref IOS par défaut (routes sans route-map en entrée, routes locales)
+
+
+@dataclass(frozen=True, slots=True)
+class Route:
+    """
+    Un chemin vers un préfixe, tel qu'il est dans l'Adj-RIB-In du routeur qui l'a reçu (après la route-map d'entrée).
+    peer None = route locale (network du routeur de bordure).
+    """
+    as_path: Tuple[int, ...] = ()
+    local_pref: int = DEFAULT_LOCAL_PREF
+    communities: Tuple[str, ...] = ()
+    next_hop: int = 0 # 0 = "::" (route locale)
+    peer: Optional[str] = None # routeur qui a annoncé la route
+    peer_ip: int = 0 # adresse de ce voisin dans la config (loopback en iBGP, ip du lien en eBGP)
+    ebgp: bool = False
+    from_client: bool = False # reçue d'un RR client (règles de réflexion)
+    originator: Optional[str] = None # originator-id si la route a été réfléchie
+    cluster_list: Tuple[str, ...] = ()
+
+
+def router_number(name: str) -> int:
+    """R12 -> 12, sert de router-id pour départager (router-id N.N.N.N dans les configs)"""
+    return int(name.lstrip("R"))
+
+
+def best_path_key(route: Route) -> Tuple:
+    """
+    Ordre de sélection IOS réduit à ce que les configs générées peuvent faire varier : local-pref la plus haute,
+    route locale, AS-path le plus court, eBGP avant iBGP, router-id (originator-id si réfléchie) le plus petit,
+    cluster-list la plus courte (RFC 4456), puis adresse du voisin la plus petite.
+    """
+    return (-route.local_pref, route.peer is not None, len(route.as_path), not route.ebgp,
+            router_number(route.originator or route.peer) if route.peer else 0, len(route.cluster_list), route.peer_ip)
+
+
+@dataclass(slots=True)
+class Session:
+    """Une session BGP vue d'un des 2 bouts (chaque session établie en a 2, reliées par reverse)."""
+    peer: str
+    peer_ip: int # adresse du voisin dans "neighbor ... remote-as"
+    ibgp: bool
+    role: Optional[str] = None # provider/peer/customer du voisin pour nous, eBGP seulement
+    client: bool = False # le voisin est notre route-reflector-client
+    reverse: Optional["Session"] = field(default=None, repr=False)
+
+
+class BgpSimulator:
+    """
+    Tables BGP attendues de tous les routeurs, calculées sur les snapshots de la topologie résolue.
+
+    Paramètres :
+        snaps (Iterable[RouterSnapshot]): routeurs résolus (resolve_snapshots)
+        reflection_routing (bool): comme pour le rendu : route-reflector-client n'est dans les configs qu'en route reflection
+    """
+
+    def __init__(self, snaps: Iterable[RouterSnapshot], reflection_routing: bool = True):
+        self.routers: Dict[str, RouterSnapshot] = {s.name: s for s in snaps}
+        self.sessions: Dict[str, List[Session]] = {name: [] for name in self.routers}
+        self.half_open: List[Tuple[str, int]] = [] # (routeur, ip voisin) : voisin configuré d'un seul côté ou inconnu
+        # rangé par préfixe d'abord : la propagation d'un préfixe ne touche qu'à ses 2 dicts
+        self.rib_in: Dict[ipaddress.IPv6Network, Dict[str, Dict[Optional[str], Route]]] = {} # préfixe -> routeur -> voisin -> chemin
+        self.best: Dict[ipaddress.IPv6Network, Dict[str, Route]] = {} # préfixe -> routeur -> meilleur chemin
+        self.prefix_as: Dict[ipaddress.IPv6Network, int] = {}
+        self.updates = 0 # annonces / retraits qui ont changé une Adj-RIB-In
+        self._cluster_id: Dict[str, str] = {}
+        self._build_sessions(reflection_routing)
+
+    def _build_sessions(self, reflection_routing: bool) -> None:
+        # à qui appartient chaque adresse : loopbacks (iBGP) et interfaces (eBGP)
+        owner: Dict[int, str] = {}
+        for snap in self.routers.values():
+            owner[snap.loopback] = snap.name
+            for iface in snap.interfaces:
+                owner[iface.ip] = snap.name
+
+        by_pair: Dict[Tuple[str, str], Session] = {}
+        for snap in self.routers.values():
+            roles = dict(snap.bgp_role_by_ip)
+            clients = set(snap.rr_clients) if reflection_routing else set()
+            if clients:
+                self._cluster_id[snap.name] = snap.rr_cluster or str(router_number(snap.name)) # bgp cluster-id, sinon router-id
+            for ip, asn in snap.bgp_neighbors:
+                peer = owner.get(ip)
+                if peer is None or self.routers[peer].asn != asn:
+                    self.half_open.append((snap.name, ip))
+                    continue
+                by_pair[(snap.name, peer)] = Session(peer, ip, asn == snap.asn, roles.get(ip), ip in clients)
+
+        for (name, peer), sess in by_pair.items():
+            back = by_pair.get((peer, name))
+            if back is None:
+                self.half_open.append((name, sess.peer_ip)) # le voisin ne nous a pas configurés : session jamais établie
+                continue
+            sess.reverse = back
+            self.sessions[name].append(sess)
+
+    def session_count(self) -> int:
+        """Sessions établies (chacune comptée une fois)"""
+        return sum(len(s) for s in self.sessions.values()) // 2
+
+    # --- politiques (ce que font les route-maps des configs) ---
+
+    def _export(self, name: str, sess: Session, route: Route) -> Optional[Route]:
+        """Ce que le routeur name envoie sur sess pour sa meilleure route, None si rien (filtré / pas de réannonce)."""
+        snap = self.routers[name]
+        if sess.ibgp:
+            if route.peer is not None and not route.ebgp:
+                # route apprise en iBGP : seul un RR la réannonce (d'un client à tout le monde, d'un non-client aux clients)
+                if name not in self._cluster_id or not (route.from_client or sess.client):
+                    return None
+                return Route(route.as_path, route.local_pref, route.communities, route.next_hop,
+                             originator=route.originator or route.peer,
+                             cluster_list=(self._cluster_id[name],) + route.cluster_list)
+            # route locale ou apprise en eBGP : next-hop-self, send-community
+            return Route(route.as_path, route.local_pref, route.communities, snap.loopback)
+
+        policies = snap.as_settings.bgp_policies["policies"]
+        if sess.role in ("provider", "peer"):
+            # EXPORT-FILTER-PROVIDER/PEER : rien de ce qui vient d'un peer ou d'un provider
+            blocked = {policies["communities"].get("peer"), policies["communities"].get("provider")}
+            if blocked.intersection(route.communities):
+                return None
+        # eBGP : pas de send-community dans les configs, les communities ne passent pas, local-pref non plus
+        return Route((snap.asn,) + route.as_path, next_hop=sess.reverse.peer_ip)
+
+    def _import(self, name: str, sess: Session, route: Route) -> Optional[Route]:
+        """Route reçue par name sur sess (sess vue de name), après la route-map d'entrée. None si rejetée."""
+        snap = self.routers[name]
+        if sess.ibgp:
+            if route.originator == name or self._cluster_id.get(name) in route.cluster_list:
+                return None # boucle de réflexion
+            return Route(route.as_path, route.local_pref, route.communities, route.next_hop, sess.peer, sess.peer_ip,
+                         False, sess.client, route.originator, route.cluster_list)
+
+        if snap.asn in route.as_path:
+            return None # boucle d'AS
+        policies = snap.as_settings.bgp_policies["policies"]
+        communities, local_pref = (), DEFAULT_LOCAL_PREF
+        if sess.role and sess.role in policies.get("communities", {}):
+            # SET-COMMUNITY-<ROLE> in
+            communities = (policies["communities"][sess.role],)
+            local_pref = policies["local_pref"][sess.role]
+        return Route(route.as_path, local_pref, communities, route.next_hop, sess.peer, sess.peer_ip, True)
+
+    # --- propagation ---
+
+    def _set_best(self, prefix: ipaddress.IPv6Network, name: str) -> bool:
+        """Recalcule le meilleur chemin de name vers prefix. Return: True s'il a changé"""
+        paths = self.rib_in[prefix].get(name)
+        best = min(paths.values(), key=best_path_key) if paths else None
+        best_map = self.best[prefix]
+        if best == best_map.get(name):
+            return False
+        if best is None:
+            del best_map[name]
+        else:
+            best_map[name] = best
+        return True
+
+    def _propagate(self, prefix: ipaddress.IPv6Network, changed: Iterable[str]) -> None:
+        """Liste de travail : les routeurs dont le meilleur chemin vers prefix a changé réannoncent, jusqu'à stabilité."""
+        rib_in, best_map = self.rib_in[prefix], self.best[prefix]
+        queue = deque(changed)
+        queued = set(queue)
+        while queue:
+            name = queue.popleft()
+            queued.discard(name)
+            best = best_map.get(name)
+            for sess in self.sessions[name]:
+                sent = None
+                if best is not None and sess.peer != best.peer: # pas de réannonce vers celui qui nous l'a donnée
+                    sent = self._export(name, sess, best)
+                received = self._import(sess.peer, sess.reverse, sent) if sent is not None else None
+
+                paths = rib_in.setdefault(sess.peer, {})
+                if paths.get(name) == received:
+                    continue
+                self.updates += 1
+                if received is None:
+                    del paths[name]
+                else:
+                    paths[name] = received
+                if self._set_best(prefix, sess.peer) and sess.peer not in queued:
+                    queue.append(sess.peer)
+                    queued.add(sess.peer)
+
+    def originate(self, name: str, prefix: Optional[ipaddress.IPv6Network] = None) -> None:
+        """Le routeur annonce prefix (par défaut le préfixe de son AS, comme "network" sur les routeurs de bordure)."""
+        snap = self.routers[name]
+        prefix = prefix or snap.as_settings.ipv6_prefix
+        self.prefix_as[prefix] = snap.asn
+        self.best.setdefault(prefix, {})
+        self.rib_in.setdefault(prefix, {}).setdefault(name, {})[None] = Route()
+        if self._set_best(prefix, name):
+            self._propagate(prefix, [name])
+
+    def withdraw(self, name: str, prefix: Optional[ipaddress.IPv6Network] = None) -> None:
+        """Retrait d'une annonce locale (what-if : un routeur de bordure qui tombe ou perd son network)."""
+        prefix = prefix or self.routers[name].as_settings.ipv6_prefix
+        if self.rib_in.get(prefix, {}).get(name, {}).pop(None, None) is None:
+            return
+        if self._set_best(prefix, name):
+            self._propagate(prefix, [name])
+
+    def run(self) -> "BgpSimulator":
+        """Chaque routeur de bordure annonce le préfixe de son AS. Return: self"""
+        for snap in self.routers.values():
+            if snap.role == "border":
+                self.originate(snap.name)
+        return self
+
+    def table(self, name: str) -> Dict[ipaddress.IPv6Network, List[Route]]:
+        """Table BGP d'un routeur : préfixe -> chemins, le meilleur en premier (préfixes triés)."""
+        return {prefix: sorted(by_router[name].values(), key=best_path_key)
+                for prefix, by_router in sorted(self.rib_in.items()) if by_router.get(name)}
+
+    def unreachable(self) -> Dict[ipaddress.IPv6Network, List[str]]:
+        """préfixe annoncé -> routeurs qui n'ont aucune route vers lui (normal pour certains avec Gao-Rexford)"""
+        return {prefix: [name for name in self.routers if name not in self.best[prefix]] for prefix in sorted(self.prefix_as)}
+
+
+def format_table(sim: BgpSimulator, name: str) -> List[str]:
+    """Table d'un routeur présentée comme "show bgp ipv6 unicast" (*> = meilleur chemin, i = appris en iBGP)."""
+    snap = sim.routers[name]
+    lines = [f"{name} (AS {snap.asn}), router-id {router_number(name)}",
+             f"     {'Network':<22}{'Next Hop':<26}{'LocPrf':>7}  {'Community':<10} Path"]
+    for prefix, paths in sim.table(name).items():
+        for i, route in enumerate(paths):
+            status = ("*>" if i == 0 else "* ") + ("i" if route.peer and not route.ebgp else " ")
+            next_hop = ipv6_str(route.next_hop) if route.peer else "::"
+            path = " ".join(str(asn) for asn in route.as_path)
+            lines.append(f" {status} {str(prefix) if i == 0 else '':<22}{next_hop:<26}{route.local_pref:>7}  "
+                         f"{' '.join(route.communities):<10} {path + ' ' if path else ''}i")
+    return lines
+
+
+def tables_to_json(sim: BgpSimulator, names: Iterable[str]) -> Dict[str, Dict[str, List[Dict]]]:
+    """Tables en dict JSON : routeur -> préfixe -> chemins (le meilleur en premier)"""
+    return {
+        name: {
+            str(prefix): [{"next_hop": ipv6_str(r.next_hop) if r.peer else "::", "local_pref": r.local_pref,
+                           "as_path": list(r.as_path), "communities": list(r.communities), "peer": r.peer,
+                           "ibgp": bool(r.peer) and not r.ebgp} for r in paths]
+            for prefix, paths in sim.table(name).items()
+        }
+        for name in names
+    }
+
+
+if __name__ == "__main__":
+    route_reflection = True # comme generate_conf
+
+    parser = argparse.ArgumentParser(description="Calcule les tables BGP attendues de chaque routeur sans démarrer GNS3")
+    parser.add_argument("intent", help="fichier d'intention JSON")
+    parser.add_argument("--full-mesh", action="store_true", help="iBGP en full-mesh au lieu de la route reflection")
+    parser.add_argument("--auto-rr", action="store_true", help="placement automatique des route reflectors (comme generate_conf)")
+    parser.add_argument("--router", action="append", help="n'afficher que la table de ce routeur (plusieurs fois possible)")
+    parser.add_argument("--summary", action="store_true", help="n'afficher que le résumé, pas les tables")
+    parser.add_argument("--json", metavar="TABLES.json", help="écrire les tables dans un fichier JSON")
+    parser.add_argument("--no-cache", action="store_true", help="ne pas utiliser le cache de topologie (.topology_cache/)")
+    args = parser.parse_args()
+
+    reflection = route_reflection and not args.full_mesh
+    try:
+        snaps = resolve_snapshots(args.intent, reflection, args.auto_rr, cache_dir=None if args.no_cache else TOPOLOGY_CACHE_DIR)
+    except IntentError as e:
+        print(e)
+        raise SystemExit(1)
+
+    start = time.perf_counter()
+    sim = BgpSimulator(snaps, reflection).run()
+    elapsed = time.perf_counter() - start
+
+    names = args.router or list(sim.routers)
+    unknown = [name for name in names if name not in sim.routers]
+    if unknown:
+        print(f"Routeur(s) absent(s) de l'intent : {', '.join(unknown)}")
+        raise SystemExit(1)
+    if not args.summary:
+        for name in names:
+            print("\n".join(format_table(sim, name)))
+            print()
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(tables_to_json(sim, names), f, indent=2)
+        print(f"Tables écrites dans {args.json}")
+
+    print(f"{len(sim.routers)} routeurs, {sim.session_count()} sessions établies, {len(sim.prefix_as)} préfixes, "
+          f"{sim.updates} mises à jour, en {elapsed:.3f}s")
+    for name, ip in sim.half_open:
+        print(f"  ! {name} : session vers {ipv6_str(ip)} jamais établie (voisin absent ou pas configuré en face)")
+    for prefix, missing in sim.unreachable().items():
+        if missing:
+            shown = ", ".join(missing[:10]) + (" ..." if len(missing) > 10 else "")
+            print(f"  {prefix} (AS {sim.prefix_as[prefix]}) : pas de route sur {len(missing)} routeur(s) : {shown}")
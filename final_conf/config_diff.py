@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+# Moteur de diff de configs IOS : on parse la config générée (.cfg) et le "show running-config" du routeur en arbre
+# de sections (interface, router bgp > address-family...), et on calcule les commandes minimales (avec les "no")
+# pour passer de l'un à l'autre. Un redéploiement après un petit changement d'intent envoie quelques lignes au lieu
+# de la config entière.
+
+import ipaddress
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+# lignes de la running-config qui ne sont pas de la config
+SKIPPED_PREFIXES = ("Building configuration", "Current configuration", "Last configuration change", "NVRAM config last updated")
+
+# Commandes gérées par generate_conf.py : seules celles-ci sont supprimées ("no ...") si absentes de la cible.
+# Tout le reste de la running-config (valeurs par défaut ajoutées par IOS, duplex, lignes console...) n'est pas touché.
+MANAGED_PREFIXES = (
+    "interface Loopback", "router bgp", "ipv6 router rip", "ipv6 router ospf", "route-map", "ip community-list",
+    "ipv6 route", "ipv6 address", "ipv6 ospf", "ipv6 rip", "neighbor", "network", "bgp router-id", "router-id",
+    "passive-interface", "set community", "set local-preference", "match community", "address-family",
+)
+
+# Valeurs par défaut qu'IOS n'affiche pas dans la running-config : on ne les envoie que si la running-config
+# contient l'inverse (ex: "shutdown" sur une interface alors que la cible veut "no shutdown")
+HIDDEN_DEFAULTS = ("no shutdown", "no synchronization", "ip cef")
+
+# Commandes à valeur unique : la nouvelle valeur remplace l'ancienne, pas besoin de "no" (et le "no" l'effacerait)
+SINGLE_VALUED = ("hostname", "version", "bgp router-id", "router-id", "ipv6 ospf cost", "set local-preference", "set community")
+
+# sections physiques : on ne peut pas les supprimer avec "no interface", on n'y touche que si elles sont dans la cible
+PHYSICAL_INTERFACES = ("interface GigabitEthernet", "interface FastEthernet", "interface Ethernet", "interface Serial")
+
+
+def _normalize_token(token: str) -> str:
+    """Forme canonique d'un mot : adresses IPv6 en minuscules compressées (IOS les affiche en MAJUSCULES)."""
+    if ":" not in token:
+        return token
+    for parse in (ipaddress.ip_interface, ipaddress.ip_network, ipaddress.ip_address):
+        try:
+            return str(parse(token)).lower()
+        except ValueError:
+            continue
+    return token
+
+
+def _community_to_int(value: str) -> str:
+    # "1:20" -> "65556" (format affiché par IOS sans "ip bgp-community new-format")
+    high, _, low = value.partition(":")
+    if high.isdigit() and low.isdigit():
+        return str(int(high) * 65536 + int(low))
+    return value
+
+
+def normalize_line(line: str) -> str:
+    """
+    Clé de comparaison d'une ligne : espaces réduits, IPv6 canoniques, communities en décimal.
+    Sert uniquement à comparer, les commandes envoyées gardent le texte d'origine.
+    """
+    tokens = [_normalize_token(t) for t in line.split()]
+    if line.startswith(("ip community-list", "set community")):
+        tokens = [_community_to_int(t) for t in tokens]
+    return " ".join(tokens)
+
+
+def _key(line: str) -> str:
+    """Clé pour les commandes à valeur unique ("bgp router-id 1.1.1.1" -> "bgp router-id")."""
+    for prefix in SINGLE_VALUED:
+        if line.startswith(prefix):
+            return prefix
+    return line
+
+
+def _exit_command(line: str) -> str:
+    return "exit-address-family" if line.startswith("address-family") else "exit"
+
+
+def _opposite(line: str) -> str:
+    return line[3:] if line.startswith("no ") else "no " + line
+
+
+@dataclass
+class ConfigNode:
+    """Une ligne de config et ses sous-commandes (indentées en dessous)."""
+    line: str
+    children: Dict[str, "ConfigNode"] = field(default_factory=dict) # clé normalisée -> noeud, dans l'ordre de la config
+
+    def walk(self, depth: int = 0) -> List[str]:
+        """Toutes les lignes du sous-arbre, indentées (1 espace par niveau comme IOS)."""
+        lines = [" " * depth + self.line]
+        for child in self.children.values():
+            lines.extend(child.walk(depth + 1))
+        return lines
+
+
+def parse_config(text: str) -> ConfigNode:
+    """
+    Parse une config IOS (fichier .cfg ou sortie de show running-config) en arbre, d'après l'indentation.
+
+    Paramètres :
+        text (str): contenu de la config
+
+    Return:
+        ConfigNode: racine (line = "") dont les enfants sont les commandes de premier niveau
+    """
+    root = ConfigNode("")
+    stack = [(-1, root)] # (indentation, noeud)
+    for raw in text.splitlines():
+        stripped = raw.strip()
+        if not stripped or stripped.startswith("!") or stripped == "end" or stripped.startswith(SKIPPED_PREFIXES):
+            continue
+        indent = len(raw) - len(raw.lstrip(" "))
+        while stack[-1][0] >= indent:
+            stack.pop()
+        parent = stack[-1][1]
+        node = ConfigNode(stripped)
+        parent.children.setdefault(normalize_line(stripped), node)
+        stack.append((indent, parent.children[normalize_line(stripped)]))
+    return root
+
+
+def _managed(line: str) -> bool:
+    return line.startswith(MANAGED_PREFIXES)
+
+
+def diff_nodes(running: ConfigNode, target: ConfigNode, depth: int = 0, removed_neighbors: Optional[Set[str]] = None) -> List[str]:
+    """
+    Commandes pour passer des sous-commandes de `running` à celles de `target` (même section).
+    Ordre : d'abord les "no", puis les ajouts, puis les sous-sections modifiées (entrée, changements, sortie).
+
+    Paramètres :
+        running (ConfigNode): section actuelle du routeur
+        target (ConfigNode): section voulue
+        depth (int): niveau d'indentation des commandes produites
+        removed_neighbors (Set[str]): voisins BGP supprimés plus haut (leurs autres lignes partent avec eux)
+
+    Return:
+        List[str]: commandes indentées
+    """
+    removed_neighbors = set(removed_neighbors or ())
+    indent = " " * depth
+    target_single = {_key(child.line) for child in target.children.values() if _key(child.line) != child.line}
+
+    removals, additions, nested = [], [], []
+
+    for key, node in running.children.items():
+        if key in target.children:
+            continue
+        line = node.line
+        if not _managed(line) or _key(line) in target_single:
+            continue
+        if line.startswith("neighbor"):
+            parts = line.split()
+            if parts[1] in removed_neighbors:
+                continue # déjà parti avec "no neighbor X remote-as"
+            if len(parts) > 2 and parts[2] == "remote-as":
+                removed_neighbors.add(parts[1])
+        if line.startswith("no "):
+            removals.append(indent + line[3:]) # "no synchronization" absent -> on remet la valeur positive
+        else:
+            removals.append(indent + "no " + line)
+
+    for key, node in target.children.items():
+        if key not in running.children:
+            if node.line in HIDDEN_DEFAULTS and normalize_line(_opposite(node.line)) not in running.children:
+                continue # valeur par défaut déjà en place, juste pas affichée par IOS
+            additions.extend(indent + l for l in node.walk()) # section entière (ou simple ligne) à créer
+            if node.children or node.line.startswith("address-family"):
+                additions.append(indent + " " + _exit_command(node.line))
+            continue
+        if node.children or running.children[key].children:
+            sub = diff_nodes(running.children[key], node, depth + 1, removed_neighbors)
+            if sub:
+                nested.append(indent + node.line)
+                nested.extend(sub)
+                nested.append(indent + " " + _exit_command(node.line))
+
+    return removals + additions + nested
+
+
+def diff_configs(running: ConfigNode, target: ConfigNode) -> List[str]:
+    """
+    Delta minimal entre deux arbres de config, à envoyer en mode configuration.
+    Les interfaces physiques absentes de la cible ne sont pas touchées (elles existent toujours dans la running-config).
+    """
+    running = ConfigNode("", {k: v for k, v in running.children.items()
+                              if k in target.children or not v.line.startswith(PHYSICAL_INTERFACES)})
+    return diff_nodes(running, target)
+
+
+def config_delta(running_text: str, target_text: str) -> List[str]:
+    """Raccourci : delta entre le texte de la running-config et celui de la config générée."""
+    return diff_configs(parse_config(running_text), parse_config(target_text))
+
+
+if __name__ == "__main__":
+    # usage : python config_diff.py running.cfg cible.cfg
+    with open(sys.argv[1]) as f_running, open(sys.argv[2]) as f_target:
+        for command in config_delta(f_running.read(), f_target.read()):
+            print(command)
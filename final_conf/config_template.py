@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+# Templates de config compilés : le squelette d'une startup-config (boilerplate IOS : version, service, line con...)
+# est dans un fichier texte de templates/, découpé une seule fois en blocs constants + sections dynamiques.
+# Au rendu, les blocs constants sont recopiés tels quels et seules les sections ({{interfaces}}, {{bgp}}...) sont
+# calculées pour chaque routeur. Changer de version d'IOS (ou de squelette) = changer de fichier, pas de code Python.
+
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+DEFAULT_TEMPLATE = os.path.join(TEMPLATE_DIR, "ios_15.2.cfg")
+
+COMMENT = "##" # ligne de commentaire du template, jamais recopiée
+SECTION_RE = re.compile(r"^\{\{(\w+)\}\}$") # {{section}} seul sur sa ligne
+VARIABLE_RE = re.compile(r"\{\{(\w+)\}\}") # {{variable}} dans une ligne
+
+# morceaux d'un template compilé : ("static", texte), ("line", format str.format des {{variables}}), ("section", nom)
+Piece = Tuple[str, str]
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """Template découpé en morceaux, prêt à être rendu. Les lignes statiques consécutives forment un seul bloc."""
+    path: str
+    pieces: Tuple[Piece, ...]
+    source: str # texte brut du fichier, pour l'empreinte du générateur
+
+    def render(self, variables: Dict[str, str], sections: Dict[str, Callable[..., List[str]]], *args) -> Iterator[str]:
+        """
+        Produit la config morceau par morceau (blocs constants, lignes à variables, sections entières ; sans \\n final).
+        Une section vide ne produit rien (pas de ligne blanche).
+
+        Paramètres :
+            variables (Dict[str, str]): valeurs des {{variables}} en ligne
+            sections (Dict[str, Callable]): nom de section -> fonction qui renvoie ses lignes, appelée avec *args au moment du rendu
+        """
+        for kind, value in self.pieces:
+            if kind == "static":
+                yield value
+            elif kind == "line":
+                yield value.format_map(variables)
+            else:
+                text = "\n".join(sections[value](*args)) # la section entière d'un coup (join en C, pas un yield par ligne)
+                if text:
+                    yield text
+
+
+def compile_template(text: str, path: str = "<template>", sections: Iterable[str] = (), variables: Iterable[str] = ()) -> CompiledTemplate:
+    """
+    Découpe le texte d'un template en blocs statiques, lignes à variables et sections.
+
+    Paramètres :
+        text (str): contenu du template
+        path (str): d'où il vient (messages d'erreur)
+        sections (Iterable[str]): sections connues, si renseigné une section inconnue est une erreur
+        variables (Iterable[str]): variables connues, idem
+
+    Return:
+        CompiledTemplate
+
+    Raise:
+        ValueError: section ou variable inconnue (faute de frappe dans le template)
+    """
+    known_sections, known_variables = set(sections), set(variables)
+    pieces = []
+    static = []
+
+    def flush():
+        if static:
+            pieces.append(("static", "\n".join(static)))
+            static.clear()
+
+    for lineno, line in enumerate(text.splitlines(), 1):
+        if line.startswith(COMMENT):
+            continue
+        section = SECTION_RE.match(line.strip())
+        if section:
+            if known_sections and section.group(1) not in known_sections:
+                raise ValueError(f"{path}:{lineno}: section inconnue {{{{{section.group(1)}}}}}")
+            flush()
+            pieces.append(("section", section.group(1)))
+        elif VARIABLE_RE.search(line):
+            for name in VARIABLE_RE.findall(line):
+                if known_variables and name not in known_variables:
+                    raise ValueError(f"{path}:{lineno}: variable inconnue {{{{{name}}}}}")
+            flush()
+            parts = VARIABLE_RE.split(line) # texte, variable, texte, variable... -> format str.format, le texte échappé
+            fmt = "".join(p.replace("{", "{{").replace("}", "}}") if i % 2 == 0 else "{" + p + "}" for i, p in enumerate(parts))
+            pieces.append(("line", fmt))
+        else:
+            static.append(line)
+    flush()
+    return CompiledTemplate(path, tuple(pieces), text)
+
+
+@lru_cache(maxsize=None)
+def load_template(path: str = DEFAULT_TEMPLATE, sections: Tuple[str, ...] = (), variables: Tuple[str, ...] = ()) -> CompiledTemplate:
+    """Lit et compile un template, une seule fois par process (les process du pool ont chacun leur cache)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return compile_template(f.read(), path, sections, variables)
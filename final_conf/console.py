@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+
+# Session console asynchrone (asyncio) vers un routeur GNS3/Dynamips, basée sur le client asyncio de telnetlib3.
+# Un seul process peut piloter des centaines de consoles en même temps (plus besoin d'un Pool de 20 process
+# qui passent leur temps à attendre le réseau).
+
+import asyncio
+import itertools
+import re
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import telnetlib3
+
+HOST = "127.0.0.1" # les consoles GNS3 sont sur localhost
+READ_CHUNK = 4096
+MAX_CHUNK_LINES = 30 # lignes max par paquet envoyé d'un coup (le buffer d'entrée des consoles Dynamips n'est pas énorme)
+SENTINEL = "! SYNC-{}." # commentaire IOS inoffensif, son écho indique que tout le paquet a été lu par le routeur
+
+IOS_ERROR = re.compile(r"^% (Invalid input|Incomplete command|Ambiguous command|Unknown command|Unrecognized command)")
+PROMPT_ECHO = re.compile(r"^\S+\([^)]*\)#(.*)$|^\S+#(.*)$") # R1(config-if)#cmd ou R1#cmd
+
+_sentinel_ids = itertools.count(1)
+
+
+def split_config_blocks(lines: Iterable[str], max_lines: int = MAX_CHUNK_LINES) -> List[List[str]]:
+    """
+    Découpe une config en paquets à envoyer d'un coup : on coupe aux sections de premier niveau (interface, router bgp,
+    route-map...) pour qu'un paquet ne s'arrête pas au milieu d'une section, et on regroupe les petites sections
+    jusqu'à max_lines. Les lignes vides et les "!" (commentaires) ne sont pas envoyées.
+
+    Paramètres :
+        lines: lignes de config
+        max_lines (int): taille max d'un paquet (une section plus grande est coupée)
+
+    Return:
+        List[List[str]]: les paquets, dans l'ordre
+    """
+    sections: List[List[str]] = []
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if not line.strip() or line.strip() == "!":
+            continue
+        if not line.startswith(" ") or not sections: # ligne de premier niveau = début de section
+            sections.append([])
+        sections[-1].append(line)
+
+    blocks: List[List[str]] = []
+    for section in sections:
+        for i in range(0, len(section), max_lines): # section trop grosse : coupée
+            part = section[i:i + max_lines]
+            if blocks and len(blocks[-1]) + len(part) <= max_lines and i == 0:
+                blocks[-1].extend(part)
+            else:
+                blocks.append(list(part))
+    return blocks
+
+
+def parse_ios_errors(output: str) -> List[Tuple[str, str]]:
+    """
+    Cherche les erreurs IOS (% Invalid input...) dans la sortie accumulée d'une console.
+
+    Return:
+        List[Tuple[str, str]]: (commande fautive, message d'erreur). La commande est la dernière ligne écrite
+        après un prompt avant l'erreur ("" si on ne l'a pas retrouvée).
+    """
+    errors = []
+    last_command = ""
+    for raw in output.splitlines():
+        line = raw.strip()
+        match = PROMPT_ECHO.match(line)
+        if match:
+            last_command = (match.group(1) if match.group(1) is not None else match.group(2)).strip()
+            continue
+        if IOS_ERROR.match(line):
+            errors.append((last_command, line))
+    return errors
+
+
+class ConsoleSession:
+    """
+    Connexion telnet asynchrone à la console d'un routeur, avec un expect() façon telnetlib.
+
+    Paramètres :
+        name (str): nom du routeur (pour les messages)
+        port (int): port console (champ "console" du .gns3)
+        host (str): adresse du serveur GNS3
+    """
+
+    def __init__(self, name: str, port: int, host: str = HOST):
+        self.name = name
+        self.port = port
+        self.host = host
+        self.reader = None
+        self.writer = None
+        self._buffer = b"" # ce qui a été reçu mais pas encore consommé par expect()
+
+    async def open(self, timeout: float = 30) -> "ConsoleSession":
+        # encoding=False : on travaille en bytes, comme avec telnetlib
+        self.reader, self.writer = await asyncio.wait_for(
+            telnetlib3.open_connection(self.host, self.port, encoding=False), timeout
+        )
+        return self
+
+    async def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    async def __aenter__(self) -> "ConsoleSession":
+        return await self.open()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def write(self, data: bytes) -> None:
+        self.writer.write(data)
+        await self.writer.drain()
+
+    async def send(self, line: str) -> None:
+        """Envoie une ligne de commande (ajoute le retour chariot)."""
+        await self.write(line.encode("ascii") + b"\r\n")
+
+    async def expect(self, patterns: Sequence[bytes], timeout: Optional[float] = None) -> Tuple[int, bytes]:
+        """
+        Attend qu'un des motifs apparaisse dans la sortie de la console.
+
+        Return:
+            (indice du motif trouvé, texte lu jusqu'à la fin du motif). (-1, texte lu) si timeout, comme telnetlib.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            for i, pattern in enumerate(patterns): # priorité à l'ordre de la liste, comme telnetlib.expect
+                pos = self._buffer.find(pattern)
+                if pos != -1:
+                    end = pos + len(pattern)
+                    data, self._buffer = self._buffer[:end], self._buffer[end:]
+                    return i, data
+
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                data, self._buffer = self._buffer, b""
+                return -1, data
+            try:
+                chunk = await asyncio.wait_for(self.reader.read(READ_CHUNK), remaining)
+            except asyncio.TimeoutError:
+                continue # on repasse dans la boucle pour rendre (-1, data)
+            if not chunk: # connexion fermée par le routeur
+                raise ConnectionError(f"{self.name} : console fermée (port {self.port})")
+            self._buffer += chunk
+
+    async def read_until(self, pattern: bytes, timeout: Optional[float] = None) -> bytes:
+        return (await self.expect([pattern], timeout))[1]
+
+    async def run_command(self, command: str, timeout: Optional[float] = 30, prompt: Optional[bytes] = None) -> str:
+        """
+        Lance une commande en mode exec et renvoie sa sortie (sans l'écho ni le prompt final).
+        Penser à "terminal length 0" avant, sinon IOS s'arrête sur les --More--.
+
+        Paramètres :
+            command (str): commande IOS
+            prompt (bytes): prompt attendu à la fin, par défaut "<nom du routeur>#"
+        """
+        prompt = prompt or f"{self.name}#".encode("ascii")
+        await self.send(command)
+        await self.read_until(command.encode("ascii"), timeout) # écho de la commande
+        index, data = await self.expect([prompt], timeout)
+        if index == -1:
+            raise TimeoutError(f"{self.name} : pas de prompt après '{command}' ({timeout}s)")
+        return data[:-len(prompt)].decode("ascii", errors="replace")
+
+    async def push_config(self, lines: Iterable[str], max_lines: int = MAX_CHUNK_LINES, timeout: Optional[float] = 60) -> List[Tuple[str, str]]:
+        """
+        Envoie une config par paquets (voir split_config_blocks) au lieu d'attendre le prompt après chaque ligne :
+        un paquet + une ligne sentinelle, puis un seul expect sur l'écho de la sentinelle.
+        Le routeur doit déjà être en mode configuration.
+
+        Return:
+            List[Tuple[str, str]]: erreurs IOS trouvées dans la sortie (commande, message), vide si tout est passé
+        """
+        output = []
+        for block in split_config_blocks(lines, max_lines):
+            sentinel = SENTINEL.format(next(_sentinel_ids))
+            await self.write("".join(f"{line}\r\n" for line in block + [sentinel]).encode("ascii"))
+            index, data = await self.expect([sentinel.encode("ascii")], timeout)
+            if index == -1:
+                raise TimeoutError(f"{self.name} : pas d'écho de {sentinel} après {timeout}s")
+            output.append(data)
+            output.append(await self.read_until(b"#", timeout)) # le prompt qui suit la sentinelle
+        return parse_ios_errors(b"".join(output).decode("ascii", errors="replace"))
+
+    async def drain_output(self, wait: float = 0.1) -> bytes:
+        """Lit tout ce qui arrive pendant `wait` secondes (pour vider la console)."""
+        _, data = await self.expect([], timeout=wait)
+        return data
+
+
+async def run_limited(coros: List, concurrency: int) -> List:
+    """
+    Lance les coroutines en même temps mais au plus `concurrency` à la fois (sémaphore), résultats dans l'ordre.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(limited(c) for c in coros))
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+
+# Mesure du temps de convergence d'un lab : après le déploiement (ou en le lançant nous-mêmes avec --deploy), on interroge
+# tous les routeurs en parallèle et on note pour chacun quand il atteint :
+#   - igp      : tous ses voisins OSPFv3 en FULL, ou toutes les loopbacks de l'AS dans la base RIPng
+#   - bgp      : toutes ses sessions (bgp_neighbors) Established
+#   - prefixes : autant de préfixes dans sa table BGP que prévu par bgp_sim.py
+# L'intervalle d'interrogation de chaque routeur s'adapte : court tant que son état bouge, il s'allonge quand rien
+# ne change, et un routeur convergé n'est plus interrogé que de temps en temps (pour voir s'il régresse).
+# Résultat : chronologie des événements et percentiles par étape, à comparer entre full-mesh et route reflection.
+# Usage : python convergence.py [intent.json] [projet.gns3] [--rr] [--deploy] [--json mesure.json]
+#         python convergence.py --compare full_mesh.json rr.json
+
+import argparse
+import asyncio
+import json
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from bgp_sim import BgpSimulator
+from generate_conf import RouterSnapshot, IntentError, resolve_snapshots, TOPOLOGY_CACHE_DIR
+from gns3_project import load_project
+from igp import IgpEngine, build_graph
+from verify_lab import COMMANDS, check_bgp, check_ospf, check_rip, open_exec_session, parse_bgp_network_entries
+
+INTENT_FILE = "intent_file_17_routers.json"
+GNS3_FILE = '17_routers.gns3'
+route_reflection = False # comme dans telnet.py
+MILESTONES = ("igp", "bgp", "prefixes")
+MIN_INTERVAL = 1.0 # secondes entre 2 interrogations d'un routeur dont l'état change
+MAX_INTERVAL = 10.0 # plafond quand rien ne bouge (et rythme des routeurs déjà convergés)
+BACKOFF = 1.5 # l'intervalle est multiplié par ça à chaque interrogation sans changement
+SETTLE = 30.0 # tout le lab doit rester convergé ce temps-là avant qu'on arrête
+TIMEOUT = 900.0 # on abandonne au bout de 15 min
+PERCENTILES = (50, 90, 99, 100)
+
+
+@dataclass(frozen=True, slots=True)
+class RouterExpectation:
+    """Ce qu'il faut voir sur un routeur pour le dire convergé."""
+    snap: RouterSnapshot
+    engine: IgpEngine
+    loopbacks: Dict[str, int]
+    prefixes: int # nombre de préfixes attendus dans sa table BGP (bgp_sim)
+
+    def commands(self) -> Dict[str, str]:
+        igp = "ospf" if self.snap.as_settings.protocol == "ospfv3" else "rip"
+        return {igp: COMMANDS[igp], "bgp": COMMANDS["bgp"]}
+
+    def evaluate(self, outputs: Dict[str, str]) -> Dict[str, bool]:
+        """sorties des commandes -> étape atteinte ou pas"""
+        if "ospf" in outputs:
+            igp = all(r.ok for r in check_ospf(self.snap, outputs["ospf"]))
+        else:
+            igp = all(r.ok for r in check_rip(self.snap, outputs["rip"], self.engine, self.loopbacks))
+        return {
+            "igp": igp,
+            "bgp": all(r.ok for r in check_bgp(self.snap, outputs["bgp"])),
+            "prefixes": parse_bgp_network_entries(outputs["bgp"]) >= self.prefixes,
+        }
+
+
+def build_expectations(snaps: List[RouterSnapshot], reflection_routing: bool) -> Dict[str, RouterExpectation]:
+    """Attendus de chaque routeur : voisins IGP / BGP de la topologie résolue, nombre de préfixes simulé."""
+    sim = BgpSimulator(snaps, reflection_routing).run()
+    loopbacks = {s.name: s.loopback for s in snaps}
+    by_as: Dict[str, List[RouterSnapshot]] = {}
+    for snap in snaps:
+        by_as.setdefault(snap.as_settings.name, []).append(snap)
+    engines = {name: IgpEngine(build_graph(members[0].as_settings.protocol, ((s.name, s.neighbors) for s in members)),
+                               members[0].as_settings.protocol)
+               for name, members in by_as.items()}
+    return {s.name: RouterExpectation(s, engines[s.as_settings.name], loopbacks, len(sim.table(s.name))) for s in snaps}
+
+
+@dataclass
+class ConvergenceTracker:
+    """
+    Instants (secondes depuis le départ) où chaque routeur a atteint chaque étape. Si une étape est perdue
+    (session qui retombe...), elle est effacée et l'instant retenu sera celui où elle est revenue pour de bon.
+    Chaque instant est à un intervalle d'interrogation près : on garde aussi l'interrogation d'avant (borne basse).
+    """
+    routers: List[str]
+    reached: Dict[str, Dict[str, Optional[float]]] = field(init=False)
+    lower_bound: Dict[str, Dict[str, float]] = field(init=False)
+    last_poll: Dict[str, float] = field(init=False)
+    events: List[Tuple[float, str, str, bool]] = field(default_factory=list) # (instant, routeur, étape, atteinte/perdue)
+    lost: Dict[str, str] = field(default_factory=dict) # routeur -> erreur console : plus suivi, n'empêche pas l'arrêt
+
+    def __post_init__(self):
+        self.reached = {name: {m: None for m in MILESTONES} for name in self.routers}
+        self.lower_bound = {name: {} for name in self.routers}
+        self.last_poll = {name: 0.0 for name in self.routers}
+
+    def update(self, name: str, state: Dict[str, bool], t: float) -> bool:
+        """Enregistre une interrogation. Return: True si une étape a été atteinte ou perdue"""
+        changed = False
+        for milestone, ok in state.items():
+            if ok and self.reached[name][milestone] is None:
+                self.reached[name][milestone] = t
+                self.lower_bound[name][milestone] = self.last_poll[name]
+                self.events.append((t, name, milestone, True))
+                changed = True
+            elif not ok and self.reached[name][milestone] is not None:
+                self.reached[name][milestone] = None
+                self.events.append((t, name, milestone, False))
+                changed = True
+        self.last_poll[name] = t
+        return changed
+
+    def converged(self, name: str) -> Optional[float]:
+        """Instant où le routeur a atteint toutes les étapes, None s'il lui en manque"""
+        times = self.reached[name].values()
+        return None if None in times else max(times)
+
+    def all_converged(self) -> bool:
+        """Tous les routeurs encore suivis sont convergés"""
+        return all(self.converged(name) is not None for name in self.routers if name not in self.lost)
+
+    def to_json(self) -> Dict:
+        return {
+            "routers": {name: dict(self.reached[name], converged=self.converged(name), lower_bound=self.lower_bound[name])
+                        for name in self.routers},
+            "events": [{"t": round(t, 3), "router": name, "milestone": m, "reached": ok} for t, name, m, ok in self.events],
+        }
+
+
+async def watch_router(name: str, port: int, expect: RouterExpectation, tracker: ConvergenceTracker, t0: float,
+                       stop: asyncio.Event, min_interval: float = MIN_INTERVAL, max_interval: float = MAX_INTERVAL) -> Optional[str]:
+    """
+    Interroge un routeur jusqu'à ce que stop soit levé, sur une seule connexion console.
+
+    Return:
+        None, ou le message d'erreur si la console a lâché (le routeur reste alors non convergé)
+    """
+    commands = expect.commands()
+    interval = min_interval
+    try:
+        tn = await open_exec_session(name, port)
+    except (OSError, ConnectionError, TimeoutError, asyncio.TimeoutError) as e:
+        tracker.lost[name] = str(e) or repr(e)
+        return tracker.lost[name]
+    try:
+        while not stop.is_set():
+            outputs = {check: await tn.run_command(command, timeout=60) for check, command in commands.items()}
+            t = time.monotonic() - t0
+            if tracker.update(name, expect.evaluate(outputs), t):
+                interval = min_interval
+            else:
+                interval = min(interval * BACKOFF, max_interval)
+            if tracker.converged(name) is not None:
+                interval = max_interval # convergé : on regarde juste s'il régresse
+            try:
+                await asyncio.wait_for(stop.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+        return None
+    except (OSError, ConnectionError, TimeoutError) as e:
+        tracker.lost[name] = str(e) or repr(e)
+        return tracker.lost[name]
+    finally:
+        await tn.close()
+
+
+async def wait_for_convergence(tracker: ConvergenceTracker, t0: float, stop: asyncio.Event,
+                               settle: float = SETTLE, timeout: float = TIMEOUT) -> None:
+    """Lève stop quand tout le lab est resté convergé settle secondes d'affilée, ou au bout de timeout."""
+    stable_since = None
+    while not stop.is_set():
+        now = time.monotonic() - t0
+        if tracker.all_converged():
+            stable_since = now if stable_since is None else stable_since
+            if now - stable_since >= settle:
+                break
+        else:
+            stable_since = None
+        if now >= timeout:
+            print(f"Timeout : lab pas convergé après {timeout:.0f}s")
+            break
+        await asyncio.sleep(0.5)
+    stop.set()
+
+
+async def measure(consoles: Dict[str, int], expectations: Dict[str, RouterExpectation], t0: Optional[float] = None,
+                  settle: float = SETTLE, timeout: float = TIMEOUT,
+                  min_interval: float = MIN_INTERVAL, max_interval: float = MAX_INTERVAL) -> Tuple[ConvergenceTracker, Dict[str, str]]:
+    """
+    Suit la convergence de tous les routeurs qui ont une console : une connexion par routeur, gardée ouverte
+    pendant toute la mesure (pas de limite de consoles comme dans telnet.py, un routeur en attente ne serait pas mesuré).
+
+    Paramètres :
+        consoles (Dict[str, int]): routeur -> port console
+        expectations (Dict[str, RouterExpectation]): build_expectations
+        t0 (float): instant de départ (time.monotonic), par défaut maintenant ; --deploy le prend avant le déploiement
+
+    Return:
+        (tracker, routeur -> erreur console)
+    """
+    t0 = time.monotonic() if t0 is None else t0
+    names = [name for name in expectations if name in consoles]
+    tracker = ConvergenceTracker(names)
+    stop = asyncio.Event()
+    watchers = [watch_router(n, consoles[n], expectations[n], tracker, t0, stop, min_interval, max_interval) for n in names]
+    supervisor = asyncio.ensure_future(wait_for_convergence(tracker, t0, stop, settle, timeout))
+    await asyncio.gather(*watchers)
+    stop.set()
+    await supervisor
+    return tracker, dict(tracker.lost)
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """Percentile au rang le plus proche (p=100 : le max), None si pas de valeurs"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def summarize(report: Dict) -> Dict[str, Dict[str, Optional[float]]]:
+    """étape (+ "converged") -> {"p50": ..., "p90": ..., "missing": nb de routeurs qui ne l'ont pas atteinte}"""
+    summary = {}
+    for milestone in MILESTONES + ("converged",):
+        times = [r[milestone] for r in report["routers"].values() if r[milestone] is not None]
+        summary[milestone] = {f"p{p}": percentile(times, p) for p in PERCENTILES}
+        summary[milestone]["missing"] = len(report["routers"]) - len(times)
+    return summary
+
+
+def format_summary(summary: Dict[str, Dict[str, Optional[float]]]) -> List[str]:
+    lines = [f"  {'étape':<10}" + "".join(f"{'p' + str(p):>9}" for p in PERCENTILES) + "  manquants"]
+    for milestone, stats in summary.items():
+        cells = "".join(f"{stats[f'p{p}']:>8.1f}s" if stats[f"p{p}"] is not None else f"{'-':>9}" for p in PERCENTILES)
+        lines.append(f"  {milestone:<10}{cells}  {stats['missing']}")
+    return lines
+
+
+def format_timeline(report: Dict, buckets: int = 20) -> List[str]:
+    """Événements dans l'ordre ; au-delà de 50 routeurs, nombre de routeurs convergés par tranche de temps."""
+    routers = report["routers"]
+    if len(routers) <= 50:
+        return [f"  {e['t']:>8.1f}s  {e['router']:<6} {e['milestone']:<9} {'atteinte' if e['reached'] else 'PERDUE'}"
+                for e in report["events"]]
+    times = sorted(r["converged"] for r in routers.values() if r["converged"] is not None)
+    if not times:
+        return ["  aucun routeur convergé"]
+    step = max(times[-1] / buckets, 0.1)
+    lines, done = [], 0
+    for i in range(1, buckets + 1):
+        while done < len(times) and times[done] <= i * step:
+            done += 1
+        lines.append(f"  <= {i * step:>7.1f}s  {done:>6}/{len(routers)} {'#' * (40 * done // len(routers))}")
+    return lines
+
+
+async def deploy_then_measure(intent: str, reflection: bool, consoles: Dict[str, int], expectations, args):
+    """--deploy : génère et pousse les configs (comme telnet.py), le chrono part avant le déploiement."""
+    from generate_conf import main as generate_main, config_filename
+    from telnet import deploiement_tous # import ici : telnet.py n'est utile qu'avec --deploy
+
+    generate_main(intent, reflection)
+    t0 = time.monotonic()
+    tasks = [(name, port, f"configs/{config_filename(name)}") for name, port in consoles.items() if name in expectations]
+    print(f"Déploiement de {len(tasks)} routeur(s)...")
+    results = await deploiement_tous(tasks)
+    print(f"Déployé en {time.monotonic() - t0:.1f}s ({len([r for r in results if r])} en erreur), mesure de la convergence")
+    return await measure(consoles, expectations, t0, args.settle, args.timeout)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Temps de convergence IGP / BGP d'un lab GNS3 déployé")
+    parser.add_argument("intent", nargs="?", default=INTENT_FILE, help="fichier d'intention JSON")
+    parser.add_argument("gns3", nargs="?", default=GNS3_FILE, help="projet .gns3 (ports console)")
+    parser.add_argument("--rr", action="store_true", help="configs en route reflection (sinon full-mesh, comme telnet.py)")
+    parser.add_argument("--deploy", action="store_true", help="générer et déployer d'abord (telnet), chrono lancé avant le déploiement")
+    parser.add_argument("--settle", type=float, default=SETTLE, help="secondes de stabilité avant d'arrêter")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT, help="secondes max de mesure")
+    parser.add_argument("--json", metavar="MESURE.json", help="écrire la mesure (instants par routeur, événements, percentiles)")
+    parser.add_argument("--compare", nargs=2, metavar=("A.json", "B.json"), help="comparer 2 mesures (ex : full-mesh et RR) sans rien lancer")
+    args = parser.parse_args()
+
+    if args.compare:
+        for path in args.compare:
+            with open(path, "r", encoding="utf-8") as f:
+                report = json.load(f)
+            print(f"{path} ({report.get('mode', '?')}, {len(report['routers'])} routeurs)")
+            print("\n".join(format_summary(summarize(report))))
+        raise SystemExit(0)
+
+    reflection = route_reflection or args.rr
+    try:
+        snaps = resolve_snapshots(args.intent, reflection, cache_dir=TOPOLOGY_CACHE_DIR)
+    except IntentError as e:
+        print(e)
+        raise SystemExit(1)
+    expectations = build_expectations(snaps, reflection)
+    consoles = load_project(args.gns3).consoles()
+    missing = [name for name in expectations if name not in consoles]
+    if missing:
+        print(f"Sans console dans le projet GNS3, non suivis : {', '.join(missing)}")
+
+    if args.deploy:
+        tracker, errors = asyncio.run(deploy_then_measure(args.intent, reflection, consoles, expectations, args))
+    else:
+        tracker, errors = asyncio.run(measure(consoles, expectations, None, args.settle, args.timeout))
+
+    report = tracker.to_json()
+    report["mode"] = "route reflection" if reflection else "full-mesh"
+    report["console_errors"] = errors
+    report["percentiles"] = summarize(report)
+
+    print("\nChronologie :")
+    print("\n".join(format_timeline(report)))
+    print("\nPercentiles (secondes depuis le départ) :")
+    print("\n".join(format_summary(report["percentiles"])))
+    for name, error in errors.items():
+        print(f"  ! {name} : {error}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Mesure écrite dans {args.json}")
+    raise SystemExit(0 if tracker.all_converged() and not errors else 1)
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+
+# Ordre de déploiement des configs : au lieu de pousser tous les routeurs en même temps dans n'importe quel ordre
+# (les routeurs de bordure montent leurs sessions eBGP avant que les RR ou les voisins IGP soient configurés :
+# sessions qui tombent et remontent, routes annoncées puis retirées, CPU de la machine GNS3 à fond), on construit
+# un graphe de dépendances (DAG) à partir de la topologie :
+#   - IGP d'abord : dans chaque AS on part des RR-Servers (ou du routeur de cœur le plus connecté) et chaque routeur
+#     attend qu'un de ses voisins IGP plus proche de ce départ soit configuré (l'AS "grandit" de proche en proche)
+#   - RR-Servers avant leurs clients (et serveurs parents avant serveurs fils en RR hiérarchique)
+#   - routeurs de bordure (eBGP) en dernier, une fois tous les routeurs de cœur de leur AS configurés
+# Puis on déploie avec au plus N consoles par serveur GNS3, chaque routeur partant dès que ses prérequis sont faits
+# (pas besoin d'attendre la fin de toute la vague précédente).
+# Usage : python deploy_scheduler.py intent.json [--rr]  (affiche les vagues sans rien déployer)
+
+import argparse
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from generate_conf import RouterSnapshot, IntentError, resolve_snapshots, TOPOLOGY_CACHE_DIR
+from igp import build_graph, node_key
+
+PER_HOST_CONCURRENT = 8 # consoles configurées en même temps par serveur GNS3 (compute)
+
+Deps = Dict[str, Set[str]] # routeur -> routeurs à configurer avant lui
+
+
+def deployment_dag(snaps: Iterable[RouterSnapshot], reflection_routing: bool = False) -> Deps:
+    """
+    Dépendances de déploiement entre routeurs, AS par AS (pas de dépendance entre AS : seuls les routeurs de bordure
+    parlent aux autres AS, et ils passent en dernier dans la leur).
+
+    Paramètres :
+        snaps (Iterable[RouterSnapshot]): topologie résolue
+        reflection_routing (bool): les configs déployées sont en route reflection (sinon pas d'ordre RR)
+
+    Return:
+        Deps: routeur -> prérequis (ensemble vide = peut partir tout de suite)
+
+    Raise:
+        ValueError: cycle dans les dépendances (ne devrait pas arriver, voir plus haut)
+    """
+    snaps = list(snaps)
+    deps: Deps = {s.name: set() for s in snaps}
+    by_as: Dict[str, List[RouterSnapshot]] = {}
+    for snap in snaps:
+        by_as.setdefault(snap.as_settings.name, []).append(snap)
+
+    for members in by_as.values():
+        by_loopback = {s.loopback: s.name for s in members}
+        graph = build_graph(members[0].as_settings.protocol, ((s.name, s.neighbors) for s in members))
+
+        # RR-Servers (avec des clients) avant leurs clients ; un serveur de bordure reste en tête, pas en dernier
+        servers = []
+        if reflection_routing:
+            for snap in members:
+                clients = [by_loopback[ip] for ip in snap.rr_clients if ip in by_loopback]
+                if clients:
+                    servers.append(snap.name)
+                for client in clients:
+                    deps[client].add(snap.name)
+
+        # routeurs configurés avant les routeurs de bordure
+        server_set = set(servers)
+        inner = [s.name for s in members if s.role != "border" or s.name in server_set]
+        inner_set = set(inner)
+        if inner:
+            # croissance IGP : parcours en largeur depuis les serveurs (ou le routeur de cœur le plus connecté),
+            # limité aux routeurs de cœur pour que la bordure ne soit jamais prérequis du cœur
+            roots = servers or [min(inner, key=lambda n: (-len(graph[n]), node_key(n)))]
+            seen = set(roots)
+            frontier = deque(roots)
+            while frontier:
+                node = frontier.popleft()
+                for neigh in sorted(graph[node], key=node_key):
+                    if neigh in inner_set and neigh not in seen:
+                        seen.add(neigh)
+                        if neigh not in server_set:
+                            deps[neigh].add(node)
+                        frontier.append(neigh)
+        for snap in members:
+            if snap.name not in inner_set:
+                deps[snap.name].update(inner) # bordure : eBGP une fois l'AS prête
+
+    deployment_waves(deps) # vérifie qu'il n'y a pas de cycle
+    return deps
+
+
+def deployment_waves(deps: Deps) -> List[List[str]]:
+    """
+    Vagues du DAG (Kahn) : vague i = routeurs dont tous les prérequis sont dans les vagues d'avant.
+    Sert à afficher le plan ; au déploiement un routeur part dès que ses propres prérequis sont faits.
+
+    Raise:
+        ValueError: cycle
+    """
+    remaining = {name: len(d & deps.keys()) for name, d in deps.items()}
+    dependents: Dict[str, List[str]] = {name: [] for name in deps}
+    for name, d in deps.items():
+        for pre in d & deps.keys():
+            dependents[pre].append(name)
+    wave = sorted((n for n, count in remaining.items() if count == 0), key=node_key)
+    waves = []
+    while wave:
+        waves.append(wave)
+        nxt = []
+        for name in wave:
+            for after in dependents[name]:
+                remaining[after] -= 1
+                if remaining[after] == 0:
+                    nxt.append(after)
+        wave = sorted(nxt, key=node_key)
+    placed = sum(len(w) for w in waves)
+    if placed != len(deps):
+        stuck = sorted((n for n, count in remaining.items() if count > 0), key=node_key)
+        raise ValueError(f"cycle dans les dépendances de déploiement : {', '.join(stuck[:10])}")
+    return waves
+
+
+async def run_staged(names: Iterable[str], deps: Deps, run: Callable[[str], Awaitable[bool]], hosts: Optional[Dict[str, str]] = None,
+                     per_host: int = PER_HOST_CONCURRENT, concurrency: Optional[int] = None, keep_going: bool = False) -> Dict[str, str]:
+    """
+    Déploie en suivant le DAG : chaque routeur attend ses prérequis puis une place sur son serveur GNS3.
+
+    Paramètres :
+        names (Iterable[str]): routeurs à déployer ; un prérequis qui n'est pas dans la liste (inchangé, sans console)
+                               est considéré comme déjà fait
+        deps (Deps): deployment_dag
+        run (Callable): coroutine qui déploie un routeur, True si ça s'est bien passé
+        hosts (Dict[str, str]): routeur -> serveur GNS3 (Gns3Project.hosts()), tout sur le même par défaut
+        per_host (int): routeurs configurés en même temps par serveur
+        concurrency (int): plafond global en plus, None pour aucun
+        keep_going (bool): déployer quand même un routeur dont un prérequis a échoué (sinon il est sauté)
+
+    Return:
+        Dict[str, str]: routeur -> "ok", "error" ou "skipped" (prérequis en erreur)
+    """
+    names = list(names)
+    hosts = hosts or {}
+    loop = asyncio.get_running_loop()
+    done = {name: loop.create_future() for name in names}
+    host_slots: Dict[str, asyncio.Semaphore] = {}
+    global_slots = asyncio.Semaphore(concurrency) if concurrency else None
+
+    async def one(name: str) -> str:
+        try:
+            prereqs = [await done[pre] for pre in sorted(deps.get(name, ()), key=node_key) if pre in done]
+            if not keep_going and any(status != "ok" for status in prereqs):
+                return "skipped"
+            slots = host_slots.setdefault(hosts.get(name, "local"), asyncio.Semaphore(per_host))
+            async with slots:
+                if global_slots is None:
+                    ok = await run(name)
+                else:
+                    async with global_slots:
+                        ok = await run(name)
+            return "ok" if ok else "error"
+        except Exception:
+            return "error"
+
+    async def tracked(name: str) -> str:
+        status = await one(name)
+        done[name].set_result(status) # débloque les routeurs qui attendent celui-ci
+        return status
+
+    statuses = await asyncio.gather(*(tracked(name) for name in names))
+    return dict(zip(names, statuses))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Affiche l'ordre de déploiement (vagues du DAG) d'un intent")
+    parser.add_argument("intent", help="fichier d'intention JSON")
+    parser.add_argument("--rr", action="store_true", help="configs en route reflection")
+    args = parser.parse_args()
+
+    try:
+        snaps = resolve_snapshots(args.intent, args.rr, cache_dir=TOPOLOGY_CACHE_DIR)
+    except IntentError as e:
+        print(e)
+        raise SystemExit(1)
+    deps = deployment_dag(snaps, args.rr)
+    waves = deployment_waves(deps)
+    for i, wave in enumerate(waves, 1):
+        shown = ", ".join(wave[:20]) + (f" ... (+{len(wave) - 20})" if len(wave) > 20 else "")
+        print(f"vague {i:>3} : {len(wave):>5} routeur(s) : {shown}")
+    print(f"{len(deps)} routeurs, {sum(len(d) for d in deps.values())} dépendances, {len(waves)} vagues")
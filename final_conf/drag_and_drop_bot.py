@@ -1,70 +1,142 @@
 #!/usr/bin/env python3
 
-import json
+import hashlib
 import os
 import shutil
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
 # importation du code pour générer les configs
-from generate_conf import main as generate_main 
+from generate_conf import main as generate_main, config_filename
+from gns3_project import load_project, check_intent_links
 
 INTENT_FILE = "intent_file_17_routers.json"
 GNS3_FILE = '17_routers.gns3'
 SOURCE_CFG_DIR = "configs"
 GNS3_PROJECT_ROOT = "" # a compléter si le script est pas à la racine du projet GNS3
 route_reflection = False
+DEPLOY_JOBS = 16 # nombre de copies en parallèle (threads : le travail est surtout de l'attente disque)
+CHECK_LINKS = True # vérifie avant tout que les câbles du projet GNS3 correspondent aux interfaces de l'intent
 
 
-def run_drag_and_drop_bot():
+def file_digest(path: str) -> str:
+    """sha256 du contenu d'un fichier, lu par blocs."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def deploy_file(source_file: str, target_path: str) -> str:
+    """
+    Copie une config vers le dossier du routeur dans le projet GNS3, sauf si la cible a déjà exactement ce contenu.
+    Écriture atomique : copie dans un fichier temporaire du même dossier puis os.replace, GNS3 ne voit jamais
+    une config à moitié écrite (même si le script est interrompu).
+
+    Paramètres :
+        source_file (str): config générée
+        target_path (str): i<num>_startup-config.cfg dans project-files/dynamips/<node_id>/configs/
+
+    Return:
+        str: "copied" ou "unchanged"
+    """
+    if os.path.exists(target_path) and os.path.getsize(target_path) == os.path.getsize(source_file):
+        if file_digest(target_path) == file_digest(source_file): # même taille : on compare le contenu
+            return "unchanged"
+
+    # crée dossiers destination s'ils n'existent pas
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    tmp = f"{target_path}.{os.getpid()}.tmp"
+    try:
+        shutil.copyfile(source_file, tmp)
+        os.replace(tmp, target_path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return "copied"
+
+
+def deploy_router(job):
+    """Déploie la config d'un routeur, pour le pool de threads. Return: (nom, statut, message d'erreur ou None)"""
+    name, source_file, target_path = job
+    if not os.path.exists(source_file):
+        return name, "missing", source_file
+    try:
+        return name, deploy_file(source_file, target_path), None
+    except OSError as e:
+        # capture l'erreur de ce routeur sans arrêter les autres
+        return name, "failed", str(e)
+
+
+def deploy_configs(folders, jobs: int = DEPLOY_JOBS):
+    """
+    Copie en parallèle les configs générées dans le projet GNS3.
+
+    Paramètres :
+        folders (Dict[str, str]): nom du routeur -> node_id GNS3
+        jobs (int): nombre de threads
+
+    Return:
+        List[(nom, statut, erreur)]: statut "copied", "unchanged", "missing" (pas de .cfg généré) ou "failed"
+    """
+    deploy_jobs = []
+    for name, node_id in folders.items():
+        filename = config_filename(name)
+        source_file = os.path.join(SOURCE_CFG_DIR, filename) # Reconstruit le chemin du fichier source généré
+        # construit le chemin destination spécifique à GNS3/Dynamips
+        target_path = os.path.join(GNS3_PROJECT_ROOT, "project-files", "dynamips", node_id, "configs", filename)
+        deploy_jobs.append((name, source_file, target_path))
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        return list(pool.map(deploy_router, deploy_jobs))
+
+
+def run_drag_and_drop_bot(jobs: int = DEPLOY_JOBS):
+    if not os.path.exists(GNS3_FILE): # Vérifie existence du projet
+        print(f"Erreur : Le fichier {GNS3_FILE} est introuvable.")
+        return
+
+    # index du projet gns3, lu une seule fois
+    project = load_project(GNS3_FILE)
+    if CHECK_LINKS:
+        problems = check_intent_links(project, INTENT_FILE)
+        if problems:
+            print(f"L'intent ne correspond pas au projet GNS3 ({len(problems)} incohérence(s)), rien n'est déployé :")
+            for problem in problems:
+                print(f"  - {problem}")
+            return
+
     # lance génération des configs
     print("Début de la génération des fichiers de configuration")
     generate_main(INTENT_FILE, route_reflection)
-    
-    # déploiement  
-    if not os.path.exists(GNS3_FILE): # Vérifie existence du projet
-        print(f"Erreur : Le fichier {GNS3_FILE} est introuvable.")
-        return 
 
-    # charge fichier gns3
-    with open(GNS3_FILE, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    # nom du routeur -> UUID unique du noeud (ex: "550e8400-e29b..."), nom de son dossier dans project-files/dynamips
+    folders = project.node_ids()
 
-    # dictionnaire vide pour stocker les ID routeurs 
-    folders = {}
-    
-    for node in data['topology']['nodes']: #parcours liste de noeuds 
-        name = node['name']       # récupère le nom du routeur 
-        node_id = node['node_id'] # récupère l'UUID unique (ex: "550e8400-e29b...")
-        folders[name] = node_id   # remplit dico
+    start = time.perf_counter()
+    results = deploy_configs(folders, jobs)
+    elapsed = time.perf_counter() - start
 
-    # pour chaque routeur
-    for name, node_id in folders.items():
-        source_file = os.path.join(SOURCE_CFG_DIR, f"i{name[1:]}_startup-config.cfg") # Reconstruit le chemin du fichier source généré
-
-        if os.path.exists(source_file): # vérifie si les fichiers sont déjà présents 
-            # construit le chemin destination spécifique à GNS3/Dynamips
-            target_path = os.path.join(
-                GNS3_PROJECT_ROOT, 
-                "project-files", 
-                "dynamips", 
-                node_id, 
-                "configs", 
-                f"i{name[1:]}_startup-config.cfg"
-            )
-
-            try:
-                # crée dossiers destination s'ils n'existent pas 
-                os.makedirs(os.path.dirname(target_path), exist_ok=True)
-                
-                # copie fichier source vers l'emplacement interne de GNS3
-                shutil.copy(source_file, target_path)
-                print(f" {name} : Config copiée vers {node_id}") 
-            except Exception as e:
-                # capture toute erreur
-                print(f" Erreur pour {name} ({node_id}) : {e}")
-        else:
+    for name, status, error in results:
+        if status == "copied":
+            print(f" {name} : Config copiée vers {folders[name]}")
+        elif status == "missing":
             # alerte que le routeur n'a pas de fichier .cfg correspondant
-            print(f" Fichier introuvable pour {name} ({source_file})")
+            print(f" Fichier introuvable pour {name} ({error})")
+        elif status == "failed":
+            print(f" Erreur pour {name} ({folders[name]}) : {error}")
+
+    counts = Counter(status for _, status, _ in results)
+    print(f"\n{counts['copied']} copiée(s), {counts['unchanged']} déjà à jour, {counts['missing']} introuvable(s), "
+          f"{counts['failed']} en erreur, en {elapsed:.3f}s ({jobs} threads)")
+    return results
 
 if __name__ == "__main__":
-    run_drag_and_drop_bot()
-    print("\n[Terminé] Génération et Déploiement réussis.")
+    results = run_drag_and_drop_bot()
+    if results and all(status in ("copied", "unchanged") for _, status, _ in results):
+        print("\n[Terminé] Génération et Déploiement réussis.")
+    else:
+        print("\n[Terminé] Génération et Déploiement terminés avec des erreurs.")
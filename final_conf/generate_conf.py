@@ -5,23 +5,56 @@
 
 import json
 import ipaddress
-from dataclasses import dataclass, field
+import hashlib
+from dataclasses import dataclass, field, replace, asdict
 import os
-import shutil 
-from typing import Dict, List, Optional
+import heapq
+import time
+import argparse
+import io
+import marshal
+import re
+import tarfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from instrumentation import PipelineStats, NO_STATS
+from config_template import DEFAULT_TEMPLATE, load_template
+from intent_schema import IntentError, cluster_cycle, cluster_id, load_intent
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 ## @ : alias --> permet de créer une fonction init sans avoir à la déf : + rapide
+# slots=True : pas de __dict__ par objet, ça compte quand l'intent a des dizaines de milliers de routeurs/interfaces.
+# Les adresses sont gardées en int (au lieu d'objets IPv6Address) et mises en texte seulement au rendu.
 
-@dataclass
+
+@lru_cache(maxsize=1 << 16)
+def ipv6_str(ip: int) -> str:
+    """int -> forme texte compressée ("2001:100:1::1"), en cache : une loopback apparaît dans beaucoup de configs."""
+    return str(ipaddress.IPv6Address(ip))
+
+
+@dataclass(slots=True)
 class Interface:
     name: str
-    ipv6: ipaddress.IPv6Address
+    ip: int # adresse IPv6 de l'interface, en int
     prefix_len: int
     ospf_area: Optional[int] = None # area ospf
     ripng: bool = False # does rip?
 
+    @property
+    def ipv6(self) -> ipaddress.IPv6Address:
+        return ipaddress.IPv6Address(self.ip)
+
+    @property
+    def network(self) -> ipaddress.IPv6Network:
+        """Préfixe du lien, /64 ou /127 (les 2 bouts ont le même)."""
+        host_bits = 128 - self.prefix_len
+        return ipaddress.IPv6Network((self.ip >> host_bits << host_bits, self.prefix_len))
+
 
-@dataclass
+@dataclass(slots=True)
 class Neighbor:
     router: str
     type: str
@@ -30,25 +63,248 @@ class Neighbor:
     bgp_role: Optional[str] = None   # provider, customer ou peer
 
 
-@dataclass
+@dataclass(slots=True)
 class Router:
     name: str
     role: str ## is it a core router or orborder router ?
     asn: int
-    neighbors: List[Neighbor]
+    neighbors: Tuple[Neighbor, ...]
     rr_role: str = "client" # par défaut, si rien renseigné, on dit que c pas un reflection router.
-    loopback: Optional[ipaddress.IPv6Address] = None
+    loopback_ip: Optional[int] = None # loopback en int, voir la propriété loopback
     interfaces: Dict[str, Interface] = field(default_factory=dict)
-    bgp_neighbors: Dict[str, int] = field(default_factory=dict)
+    bgp_neighbors: Dict[int, int] = field(default_factory=dict) # ip du voisin (int) -> asn
     bgp_policies: Dict[str, Dict[str, str]] = field(default_factory=dict)
+    rr_cluster: Optional[str] = None # cluster de route reflection (sert aussi de bgp cluster-id), None = cluster unique implicite
+    rr_parent: Optional[str] = None # pour un serveur RR : cluster dont il est lui-même client (hiérarchie de RR à plusieurs niveaux)
+    rr_clients: Set[int] = field(default_factory=set) # loopbacks des voisins iBGP dont ce routeur est le route reflector
+
+    @property
+    def loopback(self) -> Optional[ipaddress.IPv6Address]:
+        return None if self.loopback_ip is None else ipaddress.IPv6Address(self.loopback_ip)
+
+    @loopback.setter
+    def loopback(self, ip: Optional[ipaddress.IPv6Address]) -> None:
+        self.loopback_ip = None if ip is None else int(ip)
 
 ## la structure : interfaces: Dict[str, Interface] = field(default_factory=dict)
 # interface est un dictionnaire avec des clés de type str et des valeurs de type interface, 
 # field : personalise le comportement de l'atribue. ici : par défaut (si l'user ne donne pas de dict), on mettra un dict vide.
 
 
+class PrefixAllocator:
+    """
+    Allocateur persistant de sous-réseaux dans une plage (pool) d'adresses.
+
+    Fonctionnement : chaque sous-réseau /new_prefix du pool a un indice. Un curseur pointe sur le premier indice
+    jamais alloué, un bitmap (bytearray qui grandit au besoin) marque les indices pris, et les indices libérés
+    en dessous du curseur sont gardés dans un tas (heapq) pour être réutilisés en priorité.
+    --> allocate() renvoie toujours le premier sous-réseau libre, comme l'ancien parcours de pool.subnets(), mais en O(1) amorti.
+
+    Paramètres :
+        pool (ipaddress.IPv6Network): plage d'adresses à découper
+        new_prefix (int): longueur de préfixe des sous-réseaux alloués (64 par défaut)
+        exhausted_msg (str): message de l'erreur levée quand le pool est plein
+    """
+
+    SPARSE_BYTES = 4096 # au-delà, un indice isolé très loin du curseur va dans un set au lieu d'agrandir le bitmap
+
+    def __init__(self, pool: ipaddress.IPv6Network, new_prefix: int = 64, exhausted_msg: str = "Link pool exhausted"):
+        if new_prefix < pool.prefixlen:
+            raise ValueError(f"Préfixe /{new_prefix} plus grand que le pool {pool}")
+        self.pool = pool
+        self.new_prefix = new_prefix
+        self.exhausted_msg = exhausted_msg
+        self.size = 1 << (new_prefix - pool.prefixlen) # nombre de sous-réseaux dans le pool
+        self._shift = 128 - new_prefix
+        self._base = int(pool.network_address)
+        self._cursor = 0 # premier indice jamais alloué
+        self._bitmap = bytearray() # 1 bit par indice, agrandi seulement jusqu'au plus grand indice touché
+        self._sparse = set() # indices réservés loin devant (ex: loopback épinglée en fin de /64)
+        self._released = [] # tas des indices libérés sous le curseur
+
+    def _is_used(self, index: int) -> bool:
+        byte = index >> 3
+        if byte < len(self._bitmap):
+            return bool(self._bitmap[byte] & (1 << (index & 7)))
+        return index in self._sparse
+
+    def _set_used(self, index: int, used: bool) -> None:
+        byte = index >> 3
+        if byte >= len(self._bitmap):
+            if byte > max(2 * len(self._bitmap), self.SPARSE_BYTES): # trop loin : on ne gonfle pas le bitmap pour rien
+                if used:
+                    self._sparse.add(index)
+                else:
+                    self._sparse.discard(index)
+                return
+            self._bitmap.extend(bytes(byte + 1 - len(self._bitmap)))
+            for i in [i for i in self._sparse if i >> 3 < len(self._bitmap)]: # rapatrie les indices maintenant couverts
+                self._sparse.remove(i)
+                self._bitmap[i >> 3] |= 1 << (i & 7)
+        if used:
+            self._bitmap[byte] |= 1 << (index & 7)
+        else:
+            self._bitmap[byte] &= ~(1 << (index & 7))
+
+    def _index(self, net: ipaddress.IPv6Network) -> int:
+        if net.prefixlen != self.new_prefix or not net.subnet_of(self.pool):
+            raise ValueError(f"{net} n'est pas un /{self.new_prefix} de {self.pool}")
+        return (int(net.network_address) - self._base) >> self._shift
+
+    def _network(self, index: int) -> ipaddress.IPv6Network:
+        return ipaddress.IPv6Network((self._base + (index << self._shift), self.new_prefix))
+
+    def allocate(self) -> ipaddress.IPv6Network:
+        """Renvoie le premier sous-réseau libre du pool et le marque comme utilisé."""
+        while self._released: # d'abord les trous laissés par release()
+            index = heapq.heappop(self._released)
+            if not self._is_used(index): # peut avoir été réservé entre temps
+                self._set_used(index, True)
+                return self._network(index)
+
+        while self._cursor < self.size and self._is_used(self._cursor): # saute les préfixes réservés en avance
+            self._cursor += 1
+        if self._cursor >= self.size:
+            raise ValueError(self.exhausted_msg)
+        index = self._cursor
+        self._cursor += 1
+        self._set_used(index, True)
+        return self._network(index)
+
+    def allocate_hashed(self, key: str) -> ipaddress.IPv6Network:
+        """
+        Alloue le sous-réseau dont l'indice est tiré du hash de key (ou le suivant libre en cas de collision).
+        La place d'un lien ne dépend donc que de son nom, pas de ce qui a été alloué avant lui.
+        Toujours un réseau, même pour AddressAllocator (adresse = .network_address).
+        """
+        start = int.from_bytes(hashlib.sha256(key.encode()).digest()[:16], "big") % self.size
+        for step in range(self.size): # sondage linéaire, presque toujours 0 ou 1 pas dans un pool peu rempli
+            index = (start + step) % self.size
+            if not self._is_used(index):
+                self._set_used(index, True)
+                return self._network(index)
+        raise ValueError(self.exhausted_msg)
+
+    def claim(self, net: ipaddress.IPv6Network) -> bool:
+        """Réserve net s'il est dans le pool et libre (bail d'un run précédent). False sinon, sans lever d'erreur."""
+        try:
+            index = self._index(net)
+        except ValueError:
+            return False
+        if self._is_used(index):
+            return False
+        self._set_used(index, True)
+        return True
+
+    def reserve(self, net: ipaddress.IPv6Network) -> None:
+        """Marque un préfixe déjà attribué (ex: renseigné à la main) pour qu'il ne soit jamais ré-alloué."""
+        index = self._index(net)
+        if self._is_used(index):
+            raise ValueError(f"Préfixe {net} déjà utilisé")
+        self._set_used(index, True)
+
+    def release(self, net: ipaddress.IPv6Network) -> None:
+        """Rend un préfixe au pool, il sera ré-alloué en priorité."""
+        index = self._index(net)
+        if not self._is_used(index):
+            raise ValueError(f"Préfixe {net} non alloué")
+        self._set_used(index, False)
+        if index < self._cursor:
+            heapq.heappush(self._released, index)
+
+    def is_allocated(self, net: ipaddress.IPv6Network) -> bool:
+        return self._is_used(self._index(net))
+
+
+class AddressAllocator(PrefixAllocator):
+    """
+    Même principe que PrefixAllocator mais adresse par adresse (/128), pour les loopbacks.
+    L'adresse réseau (::0) n'est jamais donnée, comme avec loopback_pool.hosts().
+    """
+
+    def __init__(self, pool: ipaddress.IPv6Network, exhausted_msg: str = "Loopback pool exhausted"):
+        super().__init__(pool, new_prefix=128, exhausted_msg=exhausted_msg)
+        if self.size > 1:
+            self._set_used(0, True) # ::0 = subnet-router anycast, exclu par hosts()
+
+    def allocate(self) -> ipaddress.IPv6Address:
+        return super().allocate().network_address
+
+    def reserve(self, ip: ipaddress.IPv6Address) -> None:
+        super().reserve(ipaddress.IPv6Network(ip))
+
+    def release(self, ip: ipaddress.IPv6Address) -> None:
+        super().release(ipaddress.IPv6Network(ip))
+
+    def is_allocated(self, ip: ipaddress.IPv6Address) -> bool:
+        return super().is_allocated(ipaddress.IPv6Network(ip))
+
+
+class AddressLeases:
+    """
+    Baux d'adresses du mode stable : nom de loopback / de lien -> préfixe attribué, relus du run précédent
+    (address_leases.json) et réécrits à la fin avec ceux du run courant.
+
+    Ajouter ou retirer un routeur ne change alors que les adresses de ses propres liens : les autres gardent leur bail,
+    et un nouveau lien prend la place tirée du hash de son nom (allocate_hashed) au lieu du "premier libre" qui décale tout.
+    """
+
+    def __init__(self, previous: Optional[Dict[str, str]] = None):
+        self.previous = previous or {}
+        self.current: Dict[str, str] = {}
+
+    def assign(self, requests: List[Tuple[PrefixAllocator, str]]) -> List[ipaddress.IPv6Network]:
+        """
+        Attribue un préfixe à chaque (allocateur, clé) : celui de son bail s'il est toujours dans le pool et libre, sinon
+        la place tirée du hash de la clé. Tous les baux sont repris avant le 1er hash, pour qu'un nouveau lien ne
+        prenne jamais la place d'un ancien.
+
+        Return:
+            List[IPv6Network]: un préfixe par demande, dans l'ordre (un /128 pour une loopback)
+        """
+        result: List[Optional[ipaddress.IPv6Network]] = [None] * len(requests)
+        for i, (allocator, key) in enumerate(requests):
+            lease = self.previous.get(key)
+            if lease is None:
+                continue
+            try:
+                net = ipaddress.IPv6Network(lease)
+            except ValueError:
+                continue # bail illisible : on ré-alloue
+            if allocator.claim(net):
+                result[i] = net
+        for i, (allocator, key) in enumerate(requests):
+            if result[i] is None:
+                result[i] = allocator.allocate_hashed(key)
+            self.current[key] = str(result[i])
+        return result
+
 
-@dataclass
+LEASE_FILE = "address_leases.json" # à côté de configs_manifest.json
+
+
+def link_lease_key(link: "Link") -> str:
+    """Nom d'un lien dans les baux : ses 2 bouts AS:routeur:interface, celui de Link.local en premier."""
+    return f"{link.local.as_name}:{link.local.router.name}:{link.local.interface} {link.remote.as_name}:{link.remote.router.name}:{link.remote.interface}"
+
+
+def load_leases(path: str = LEASE_FILE) -> Dict[str, str]:
+    """Baux du run précédent ({} si le fichier est absent ou illisible : tout est alors placé par hash)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("leases", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def save_leases(leases: Dict[str, str], path: str = LEASE_FILE) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"leases": leases}, f, indent=1, sort_keys=True)
+    os.replace(tmp, path) # écriture atomique, comme le manifeste
+
+
+@dataclass(slots=True)
 class AutonomousSystem:
     name: str
     asn: int
@@ -61,21 +317,96 @@ class AutonomousSystem:
     area: Optional[int] = None
     routers: Dict[str, Router] = field(default_factory=dict)
     bgp_policies: Dict[str, Dict] = field(default_factory=dict) ###
+    loopback_allocator: AddressAllocator = field(init=False, repr=False)
+    link_allocator: PrefixAllocator = field(init=False, repr=False)
+    inter_as_allocator: Optional[PrefixAllocator] = field(default=None, repr=False) # un seul pour toutes les AS, donné par parse_intent
+
+    def __post_init__(self):
+        # allocateurs persistants : on ne re-parcourt plus le pool ni les interfaces à chaque lien
+        self.loopback_allocator = AddressAllocator(self.loopback_pool)
+        self.link_allocator = PrefixAllocator(self.link_pool)
 
     def allocate_loopback(self) -> ipaddress.IPv6Address:
-        """allocates loopback addresses for routers who need one"""
-        used = {r.loopback for r in self.routers.values() if r.loopback} ## r : short for router
-        for ip in self.loopback_pool.hosts():
-            if ip not in used:
-                return ip
-        raise ValueError("Loopback pool exhausted")
+        """allocates loopback addresses for routers who need one (first free address of the pool, in O(1))"""
+        return self.loopback_allocator.allocate()
+
+    def pin_loopback(self, router: Router, ip: ipaddress.IPv6Address) -> None:
+        """Fixe la loopback d'un routeur (renseignée dans l'intent) et la retire du pool."""
+        if ip not in self.loopback_pool:
+            raise ValueError(f"Loopback {ip} de {router.name} hors du pool {self.loopback_pool}")
+        self.loopback_allocator.reserve(ip)
+        router.loopback = ip
+
+    def remove_router(self, name: str, as_map: Optional[Dict[str, "AutonomousSystem"]] = None) -> Router:
+        """
+        Retire un routeur de l'AS et rend ses adresses aux pools (loopback, préfixes de ses liens intra-AS et inter-AS).
+        Chez les autres routeurs on enlève les voisins et interfaces qui pointaient vers lui, ses sessions iBGP
+        (bgp_neighbors, rr_clients) et eBGP. Le link_index éventuel est à reconstruire ensuite.
+
+        Paramètres :
+            name (str): nom du routeur
+            as_map (Dict[str, AutonomousSystem]): toutes les AS, obligatoire si le routeur a des voisins inter-AS
+
+        Return:
+            Router: le routeur retiré
+
+        Raise:
+            ValueError: voisins inter-AS sans as_map (rien n'est modifié)
+        """
+        if as_map is None and any(n.type == "inter-as" for n in self.routers[name].neighbors):
+            raise ValueError(f"{self.name}:{name} a des voisins inter-AS : as_map nécessaire pour le retirer")
+        router = self.routers.pop(name)
+        if router.loopback is not None and self.loopback_allocator.is_allocated(router.loopback):
+            self.loopback_allocator.release(router.loopback)
+        for other in self.routers.values(): # sessions iBGP vers sa loopback (full-mesh ou RR)
+            other.bgp_neighbors.pop(router.loopback_ip, None)
+            other.rr_clients.discard(router.loopback_ip)
+        for neigh in router.neighbors:
+            if neigh.type == "inter-as":
+                self._remove_inter_as_link(router, neigh, as_map)
+                continue
+            if neigh.router not in self.routers:
+                continue
+            remote = self.routers[neigh.router]
+            remote.neighbors = tuple(n for n in remote.neighbors if not (n.type == "intra-as" and n.router == name))
+            iface = router.interfaces.get(neigh.interface)
+            if iface is None:
+                continue
+            net = iface.network
+            for remote_name, remote_iface in list(remote.interfaces.items()):
+                if remote_iface.ip >> 64 == iface.ip >> 64: # même /64
+                    del remote.interfaces[remote_name]
+            if net.subnet_of(self.link_pool) and self.link_allocator.is_allocated(net):
+                self.link_allocator.release(net)
+        return router
+
+    def _remove_inter_as_link(self, router: Router, neigh: Neighbor, as_map: Dict[str, "AutonomousSystem"]) -> None:
+        """Bout distant d'un lien inter-AS d'un routeur retiré : voisin, interface, session eBGP, préfixe rendu au pool partagé."""
+        remote_as_name, _, remote_name = neigh.router.partition(":")
+        remote_as = as_map.get(remote_as_name)
+        remote = remote_as.routers.get(remote_name) if remote_as is not None else None
+        if remote is not None:
+            me = f"{self.name}:{router.name}"
+            remote.neighbors = tuple(n for n in remote.neighbors if not (n.type == "inter-as" and n.router == me))
+        iface = router.interfaces.get(neigh.interface)
+        if iface is None:
+            return
+        net = iface.network
+        if remote is not None:
+            remote.bgp_neighbors.pop(iface.ip, None)
+            for remote_name, remote_iface in list(remote.interfaces.items()):
+                if remote_iface.network == net:
+                    del remote.interfaces[remote_name]
+        allocator = self.inter_as_allocator
+        if allocator is not None and net.subnet_of(allocator.pool) and allocator.is_allocated(net):
+            allocator.release(net)
 
     def allocate_link_prefix(self, inter_as: bool = False) -> ipaddress.IPv6Network:
         """
         Alloue le prochain sous-réseau /64 disponible pour un lien réseau.
         
-        Fonctionnement : Parcourt la plage d'adresses pool (intra-AS ou inter-AS) et retourne le premier 
-        préfixe qui n'est pas encore utilisé par une interface de l'AS.
+        Fonctionnement : demande à l'allocateur du pool (intra-AS ou inter-AS) le premier préfixe libre. 
+        Les préfixes déjà posés sur des interfaces sont réservés au préalable (voir reserve_existing_links).
 
         Paramètres :
             inter_as (bool): vérifier s'il faut prendre dans la plage inter as ou l'autre plage
@@ -83,24 +414,22 @@ class AutonomousSystem:
         Return:
             ipaddress.IPv6Network: Un objet réseau représentant le préfixe /64 alloué.
         """
-        pool = self.inter_as_link_pool if inter_as else self.link_pool ## pool : plage d'adresses
-        subnets = list(pool.subnets(new_prefix=64))
+        allocator = self.inter_as_allocator if inter_as else self.link_allocator
+        return allocator.allocate()
 
-        used = set()
+    def reserve_existing_links(self) -> None:
+        """Réserve dans les allocateurs les préfixes des interfaces déjà configurées (pour pas les ré allouer)."""
         for r in self.routers.values():
             for iface in r.interfaces.values():
-                net = ipaddress.IPv6Network(f"{iface.ipv6}/{iface.prefix_len}", strict=False) ## creation d'un network, strict = False : qu'on donne une adresse hote (qqch::1/64) ou un reseau (qqch::/64), python comprend qu'on parle d'un réseau.
-                used.add(net.supernet(new_prefix=64)) ## pour pas ré alouer
-
-        for net in subnets:
-            if net not in used:
-                return net
-        raise ValueError("Link pool exhausted") ## si n'arrive pas à trouver une adresse (car plus de place par ex), raise renvoie un msg d'erreur
+                net = iface.network
+                for allocator in (self.link_allocator, self.inter_as_allocator):
+                    if allocator is not None and net.subnet_of(allocator.pool) and not allocator.is_allocated(net): # les 2 bouts d'un lien ont le même préfixe
+                        allocator.reserve(net)
 
 
 
 
-def parse_intent(path: str) -> Dict[str, AutonomousSystem]:
+def parse_intent(path: str, raw: Optional[bytes] = None) -> Dict[str, AutonomousSystem]:
     """
         Analyse le fichier d'intention JSON et construit la topologie réseau logique : charge les données JSON pour créer les instances de classes 
         AutonomousSystem, Router et Neighbor (interfaces, protocoles IGP, pools IP) et identifie les relations inter-AS (provider, peer, 
@@ -108,17 +437,27 @@ def parse_intent(path: str) -> Dict[str, AutonomousSystem]:
 
     Paramètres:
         path (str): Chemin vers le fichier JSON contenant l'intent.
+        raw (bytes): contenu du fichier s'il a déjà été lu (optionnel)
 
     Return:
         as_map : Dict[str, AutonomousSystem]: Un dictionnaire associant les noms d'AS à leurs objets respectifs.
+
+    Raise:
+        IntentError: intent invalide, avec toutes les erreurs d'un coup (voir intent_schema.py)
     
     Note:
         La fonction utilise un dictionnaire inversé (as_roles) pour mapper les ASN 
         distants aux rôles définis dans les politiques BGP locales.
     """
-    data = json.load(open(path)) # open ouvre juste le fichier, c'est load qui le comprend et le convertit en obj python
+    data = load_intent(path, raw) # json -> obj python, validé avant d'en faire quoi que ce soit
     as_map: Dict[str, AutonomousSystem] = {}
 
+    # un seul allocateur pour le pool inter-AS, partagé par toutes les AS (sinon 2 AS pourraient prendre le même préfixe)
+    # liens inter-AS en /64 par défaut, ou en /127 (RFC 6164) avec "inter_as_prefix_len": 127 pour économiser le pool
+    inter_as_allocator = PrefixAllocator(ipaddress.IPv6Network(data["bgp"]["inter_as_link_pool"]),
+                                         new_prefix=data["bgp"].get("inter_as_prefix_len", 64),
+                                         exhausted_msg="Inter-AS link pool exhausted")
+
     # Création des objets AutonomousSystem et Router
     for as_data in data["autonomous_systems"]:
         as_obj = AutonomousSystem(
@@ -131,7 +470,8 @@ def parse_intent(path: str) -> Dict[str, AutonomousSystem]:
             protocol=as_data["routing"]["protocol"],
             process_id=as_data["routing"].get("process_id"),
             area=as_data["routing"].get("area"),
-            bgp_policies = as_data.get("bgp_policies", {})
+            bgp_policies = as_data.get("bgp_policies", {}),
+            inter_as_allocator=inter_as_allocator,
         )
         ## création des obj Router
         for rdata in as_data["routers"]:
@@ -140,9 +480,13 @@ def parse_intent(path: str) -> Dict[str, AutonomousSystem]:
                 role=rdata["role"],
                 asn=as_obj.asn,
                 rr_role=rdata.get("rr_role", "client"), # <-- Si absent du JSON, rr_role vaudra "client"
-                neighbors=[Neighbor(**n) for n in rdata.get("neighbors", [])] ## transforme une liste de dictionnaires JSON en une liste d'objets Neighbor. Neighbor(**n) : associe chaque clé du dictionnaire à l'argument correspondant dans la classe Neighbor.
+                rr_cluster=cluster_id(rdata["rr_cluster"]) if "rr_cluster" in rdata else None, # écrit tel quel en bgp cluster-id
+                rr_parent=cluster_id(rdata["rr_parent"]) if "rr_parent" in rdata else None,
+                neighbors=tuple(Neighbor(**n) for n in rdata.get("neighbors", [])) ## transforme une liste de dictionnaires JSON en une liste d'objets Neighbor. Neighbor(**n) : associe chaque clé du dictionnaire à l'argument correspondant dans la classe Neighbor.
             )
             as_obj.routers[router.name] = router
+            if "loopback" in rdata: # loopback imposée dans l'intent : réservée tout de suite pour que l'allocateur la saute
+                as_obj.pin_loopback(router, ipaddress.IPv6Address(rdata["loopback"]))
         as_map[as_obj.name] = as_obj
 
     # Appliquer les politiques BGP selon les relations inter-AS
@@ -190,13 +534,99 @@ def parse_intent(path: str) -> Dict[str, AutonomousSystem]:
     return as_map
 
 
-def allocate_addresses(as_map: Dict[str, AutonomousSystem]) -> None:
+@dataclass(slots=True)
+class LinkEnd:
+    """Un bout de lien : le routeur et son interface (l'adresse est lue dans router.interfaces une fois allouée)."""
+    as_name: str
+    router: Router
+    interface: str
+
+    @property
+    def ipv6(self) -> Optional[ipaddress.IPv6Address]:
+        iface = self.router.interfaces.get(self.interface)
+        return iface.ipv6 if iface else None
+
+    @property
+    def ip(self) -> Optional[int]:
+        iface = self.router.interfaces.get(self.interface)
+        return iface.ip if iface else None
+
+
+@dataclass(slots=True)
+class Link:
+    """Lien vu depuis un de ses routeurs : local = nous, remote = le voisin au bout."""
+    local: LinkEnd
+    remote: LinkEnd
+    neighbor: Neighbor # entrée de l'intent côté local (type, ospf_cost, bgp_role)
+
+
+LinkIndex = Dict[Tuple[str, str, str], Link] # (nom AS, nom routeur, Neighbor.router tel qu'écrit dans l'intent) -> Link
+
+
+def build_link_index(as_map: Dict[str, AutonomousSystem]) -> LinkIndex:
+    """
+    Construit une seule fois (après parse_intent) l'index des liens, pour retrouver l'interface d'en face
+    en O(1) au lieu de re-parcourir les voisins du routeur distant avec next(...) à chaque étape.
+    Chaque lien est indexé depuis ses 2 bouts.
+
+    Paramètres :
+        as_map (Dict[str, AutonomousSystem]): Un dictionnaire associant les noms d'AS à leurs objets respectifs, créé dans parse_intent
+
+    Return:
+        LinkIndex: dico (AS, routeur, voisin) -> Link
+
+    Raise:
+        ValueError: si un voisin n'existe pas, ou si le lien n'est déclaré que d'un côté (lien asymétrique)
+    """
+    # 1er passage : pour chaque routeur, voisin -> Neighbor (O(1) ensuite)
+    declared: Dict[Tuple[str, str, str], Neighbor] = {}
+    for as_obj in as_map.values():
+        for router in as_obj.routers.values():
+            for neigh in router.neighbors:
+                key = (as_obj.name, router.name, neigh.router)
+                if key in declared:
+                    raise ValueError(f"Lien en double : {as_obj.name}:{router.name} déclare 2 fois le voisin {neigh.router}")
+                declared[key] = neigh
+
+    index: LinkIndex = {}
+    for (as_name, router_name, peer), neigh in declared.items():
+        if neigh.type == "inter-as":
+            remote_as_name, remote_router_name = peer.split(":")
+            back_ref = f"{as_name}:{router_name}" # comment le voisin nous désigne
+        else:
+            remote_as_name, remote_router_name = as_name, peer
+            back_ref = router_name
+        remote_as = as_map.get(remote_as_name)
+        if remote_as is None or remote_router_name not in remote_as.routers:
+            raise ValueError(f"{as_name}:{router_name} ({neigh.interface}) : voisin {peer} introuvable dans l'intent")
+
+        remote_neigh = declared.get((remote_as_name, remote_router_name, back_ref))
+        if remote_neigh is None:
+            raise ValueError(
+                f"Lien asymétrique : {as_name}:{router_name} déclare {peer} sur {neigh.interface} "
+                f"mais {remote_as_name}:{remote_router_name} ne déclare pas {back_ref}"
+            )
+        if remote_neigh.type != neigh.type:
+            raise ValueError(f"Lien {as_name}:{router_name} <-> {peer} : type {neigh.type} d'un côté et {remote_neigh.type} de l'autre")
+
+        index[(as_name, router_name, peer)] = Link(
+            local=LinkEnd(as_name, as_map[as_name].routers[router_name], neigh.interface),
+            remote=LinkEnd(remote_as_name, remote_as.routers[remote_router_name], remote_neigh.interface),
+            neighbor=neigh,
+        )
+    return index
+
+
+def allocate_addresses(as_map: Dict[str, AutonomousSystem], link_index: Optional[LinkIndex] = None, leases: Optional[AddressLeases] = None) -> None:
     """
     attribution globale des adresses IPv6 sur le réseau. (loopbacks et liens physiques), gère également l'activation des protocoles IGP (OSPFv3 ou RIPng) sur 
     chaque interface en fonction de la configuration de l'AS.
 
     paramètres :
         as_map (Dict[str, AutonomousSystem]): Un dictionnaire associant les noms d'AS à leurs objets respectifs, créé dans parse_intent
+        link_index (LinkIndex): index des liens (build_link_index), reconstruit si non fourni
+        leases (AddressLeases): mode stable, chaque loopback / lien garde son bail ou prend la place tirée du hash de son nom
+            (sinon : premier préfixe libre dans l'ordre de l'intent)
 
     pas de return 
 
@@ -205,38 +635,67 @@ def allocate_addresses(as_map: Dict[str, AutonomousSystem]) -> None:
         son côté du lien, il configure simultanément l'interface correspondante 
         chez son voisin pour éviter les doubles allocations.
     """
-    # Loopback allocation
+    if link_index is None:
+        link_index = build_link_index(as_map)
+
+    # Préfixes déjà posés (ex: liens inter-AS alloués avant) : réservés une seule fois, plus de re-parcours par lien
     for as_obj in as_map.values():
-        for router in as_obj.routers.values():
-            router.loopback = as_obj.allocate_loopback()
+        as_obj.reserve_existing_links()
+
+    # Loopback allocation (celles déjà fixées, par l'intent ou un appel précédent, sont gardées)
+    if leases is not None:
+        missing = [(as_obj, router) for as_obj in as_map.values() for router in as_obj.routers.values() if router.loopback is None]
+        nets = leases.assign([(as_obj.loopback_allocator, f"{as_obj.name}:{router.name}:Loopback0") for as_obj, router in missing])
+        for (_, router), net in zip(missing, nets):
+            router.loopback = net.network_address
+    else:
+        for as_obj in as_map.values():
+            for router in as_obj.routers.values():
+                if router.loopback is None:
+                    router.loopback = as_obj.allocate_loopback()
 
     # Intra-AS links allocation
+    stable_links = [] # mode stable : liens vus depuis leur plus petit bout, adressés tous ensemble à la fin
     for as_obj in as_map.values():
         for router in as_obj.routers.values():
             for neigh in router.neighbors:
                 if neigh.type == "intra-as":
-                    neigh_router = as_obj.routers[neigh.router] ## permet de retrouver l'autre routeur
+                    link = link_index[(as_obj.name, router.name, neigh.router)]
                     if neigh.interface not in router.interfaces: ## bidirection et vérification de non-répétition
-                        link_prefix = as_obj.allocate_link_prefix(inter_as=False)
-                        r_ip = link_prefix[1]
-                        n_ip = link_prefix[2]
-
-                        router.interfaces[neigh.interface] = Interface(
-                            name=neigh.interface,
-                            ipv6=r_ip,
-                            prefix_len=64,
-                            ospf_area=as_obj.area if as_obj.protocol == "ospfv3" else None,
-                            ripng=(as_obj.protocol == "rip")
-                        )
-
-                        remote_iface = next(n.interface for n in neigh_router.neighbors if n.router == router.name)
-                        neigh_router.interfaces[remote_iface] = Interface(
-                            name=remote_iface,
-                            ipv6=n_ip,
-                            prefix_len=64,
-                            ospf_area=as_obj.area if as_obj.protocol == "ospfv3" else None,
-                            ripng=(as_obj.protocol == "rip")
-                        )
+                        if leases is not None:
+                            if (natural_key(router.name), natural_key(neigh.interface)) < (natural_key(link.remote.router.name), natural_key(link.remote.interface)):
+                                stable_links.append((as_obj, link))
+                            continue
+                        set_intra_link_interfaces(as_obj, link, as_obj.allocate_link_prefix(inter_as=False))
+
+    if stable_links:
+        prefixes = leases.assign([(as_obj.link_allocator, link_lease_key(link)) for as_obj, link in stable_links])
+        for (as_obj, link), link_prefix in zip(stable_links, prefixes):
+            set_intra_link_interfaces(as_obj, link, link_prefix)
+
+
+def set_intra_link_interfaces(as_obj: AutonomousSystem, link: Link, link_prefix: ipaddress.IPv6Network) -> None:
+    """Pose les interfaces des 2 bouts d'un lien intra-AS : ::1 côté link.local, ::2 côté link.remote."""
+    base = int(link_prefix.network_address)
+    r_ip = base + 1
+    n_ip = base + 2
+
+    link.local.router.interfaces[link.local.interface] = Interface(
+        name=link.local.interface,
+        ip=r_ip,
+        prefix_len=64,
+        ospf_area=as_obj.area if as_obj.protocol == "ospfv3" else None,
+        ripng=(as_obj.protocol == "rip")
+    )
+
+    remote_iface = link.remote.interface
+    link.remote.router.interfaces[remote_iface] = Interface(
+        name=remote_iface,
+        ip=n_ip,
+        prefix_len=64,
+        ospf_area=as_obj.area if as_obj.protocol == "ospfv3" else None,
+        ripng=(as_obj.protocol == "rip")
+    )
 
 
 def build_bgp_fullmesh(as_map: Dict[str, AutonomousSystem]) -> None:
@@ -257,83 +716,192 @@ def build_bgp_fullmesh(as_map: Dict[str, AutonomousSystem]) -> None:
         for i in range(len(routers)):
             for j in range(i + 1, len(routers)): ## parc routeurs *2 
                 r1, r2 = routers[i], routers[j]
-                r1.bgp_neighbors[str(r2.loopback)] = as_obj.asn ## loopback
-                r2.bgp_neighbors[str(r1.loopback)] = as_obj.asn
+                r1.bgp_neighbors[r2.loopback_ip] = as_obj.asn ## loopback
+                r2.bgp_neighbors[r1.loopback_ip] = as_obj.asn
 
 def build_bgp_rr(as_map: Dict[str, AutonomousSystem]) -> None:
     """
-    Établit une topologie iBGP basée sur le Route Reflection pour chaque système autonome.
-    - Les RR-Clients ne font de sessions qu'avec les RR-Servers.
-    - Les RR-Servers font des sessions avec TOUS les autres routeurs (Full-mesh entre Servers + Clients).
+    Établit une topologie iBGP basée sur le Route Reflection pour chaque système autonome, avec clusters et niveaux :
+    - Les RR-Clients ne font de sessions qu'avec les RR-Servers de leur cluster (champ "rr_cluster" du routeur).
+    - Les RR-Servers d'un même cluster sont en full-mesh entre eux (sessions normales, pas client).
+    - Les RR-Servers de premier niveau (sans "rr_parent") sont en full-mesh entre eux, tous clusters confondus.
+    - Un RR-Server avec "rr_parent" est client des serveurs du cluster parent (RR hiérarchiques).
+    Sans "rr_cluster" dans l'intent, tous les routeurs sont dans le même cluster implicite (comportement d'avant).
+    Une AS sans aucun serveur reste en full-mesh.
+
+    Coût : O(clients x serveurs du cluster + serveurs²) par AS, au lieu de parcourir toutes les paires de routeurs.
 
     Paramètres :
         as_map (Dict[str, AutonomousSystem]): Un dictionnaire associant les noms d'AS à leurs objets respectifs, créé dans parse_intent
 
     Return:
         None car routers directement modif.
+
+    Raise:
+        ValueError: client dans un cluster sans serveur, rr_parent qui n'existe pas ou cycle dans les rr_parent
     """
     for as_obj in as_map.values():
         routers = list(as_obj.routers.values())
-        
-        # On identifie les rôles (on utilise .get au cas où le champ est absent)
-        for as_obj in as_map.values():
-            routers = list(as_obj.routers.values())
-            for i in range(len(routers)):
-                for j in range(i + 1, len(routers)):
-                    r1, r2 = routers[i], routers[j]
-                
-                # Règle de session iBGP RR :
-                # On crée la session si au moins UN des deux est un serveur.
-                if r1.rr_role == "server" or r2.rr_role == "server":
-                    r1.bgp_neighbors[str(r2.loopback)] = as_obj.asn
-                    r2.bgp_neighbors[str(r1.loopback)] = as_obj.asn
-
-def build_inter_as_neighbors(as_map: Dict[str, AutonomousSystem], inter_as_iterator) -> None:
-    """
-    Pour toutes las iface inter as, création/ remplissage d'un iterateur GLOBAL stockant @ 
-    ip pr éviter d'avoir plusieurs iface avec la même @ip. Alloue une @ ipv6/64 de sous-réseau et config des obj interface pour les 2 routeurs.
+        servers = [r for r in routers if r.rr_role == "server"]
+        if not servers:
+            build_bgp_fullmesh({as_obj.name: as_obj}) # pas de RR déclaré : on garde une AS fonctionnelle
+            continue
+
+        servers_by_cluster: Dict[Optional[str], List[Router]] = {}
+        for s in servers:
+            servers_by_cluster.setdefault(s.rr_cluster, []).append(s)
+
+        # cycle (cluster 1 de parent 2, cluster 2 de parent 1) : aucun de ces serveurs ne serait dans le full-mesh du haut
+        parents: Dict[str, Set[str]] = {}
+        for s in servers:
+            if s.rr_cluster is not None and s.rr_parent is not None and s.rr_parent != s.rr_cluster:
+                parents.setdefault(s.rr_cluster, set()).add(s.rr_parent)
+        cycle = cluster_cycle(parents)
+        if cycle:
+            raise ValueError(f"{as_obj.name}: cycle dans les rr_parent des clusters {' -> '.join(cycle)}")
+
+        def session(r1: Router, r2: Router, r1_reflects_r2: bool = False) -> None:
+            r1.bgp_neighbors[r2.loopback_ip] = as_obj.asn
+            r2.bgp_neighbors[r1.loopback_ip] = as_obj.asn
+            if r1_reflects_r2:
+                r1.rr_clients.add(r2.loopback_ip)
+
+        # clients -> serveurs de leur cluster
+        for r in routers:
+            if r.rr_role == "server":
+                continue
+            cluster_servers = servers_by_cluster.get(r.rr_cluster)
+            if not cluster_servers:
+                raise ValueError(f"{as_obj.name}:{r.name} est client du cluster {r.rr_cluster} qui n'a aucun serveur RR")
+            for s in cluster_servers:
+                session(s, r, r1_reflects_r2=True)
+
+        # serveurs d'un même cluster entre eux
+        for cluster_servers in servers_by_cluster.values():
+            for i in range(len(cluster_servers)):
+                for j in range(i + 1, len(cluster_servers)):
+                    session(cluster_servers[i], cluster_servers[j])
+
+        # niveau supérieur : full-mesh entre tous les serveurs sans parent
+        top = [s for s in servers if s.rr_parent is None]
+        for i in range(len(top)):
+            for j in range(i + 1, len(top)):
+                session(top[i], top[j])
+
+        # niveaux inférieurs : un serveur avec rr_parent est client des serveurs du cluster parent
+        for s in servers:
+            if s.rr_parent is None:
+                continue
+            if s.rr_parent == s.rr_cluster:
+                raise ValueError(f"{as_obj.name}:{s.name} : rr_parent ne peut pas être son propre cluster ({s.rr_parent})")
+            parents = servers_by_cluster.get(s.rr_parent)
+            if not parents:
+                raise ValueError(f"{as_obj.name}:{s.name} : cluster parent {s.rr_parent} sans serveur RR")
+            for p in parents:
+                session(p, s, r1_reflects_r2=True)
+
+DIGITS_RE = re.compile(r"(\d+)")
+
+
+@lru_cache(maxsize=1 << 16) # mêmes noms de routeurs / d'interfaces demandés des milliers de fois
+def natural_key(name: str) -> Tuple:
+    """Clé de tri "naturelle" : R9 < R10, GigabitEthernet2/0 < GigabitEthernet10/0 (le tri de str met R10 avant R9)."""
+    parts = DIGITS_RE.split(name) # texte, nombre, texte, nombre...
+    parts[1::2] = map(int, parts[1::2])
+    return tuple(parts)
+
+
+def link_endpoint_addresses(prefix: ipaddress.IPv6Network) -> Tuple[int, int]:
+    """
+    Adresses des 2 bouts d'un lien point à point : ::1 et ::2 dans un /64,
+    les 2 seules adresses du préfixe dans un /127 (RFC 6164, pas d'anycast subnet-router sur un /127).
+    """
+    base = int(prefix.network_address)
+    if prefix.prefixlen == 127:
+        return base, base + 1
+    return base + 1, base + 2
+
+
+def inter_as_links(as_map: Dict[str, AutonomousSystem], link_index: LinkIndex) -> List[Tuple[AutonomousSystem, Router, Neighbor, Link]]:
+    """
+    Liste des liens inter-AS, chacun une seule fois, dans un ordre qui ne dépend que de la topologie
+    (pas de l'ordre des AS / routeurs dans l'intent) : trié par (ASN, routeur, interface) du bout le plus petit, puis de l'autre.
+    Le bout "local" de chaque tuple est le plus petit des deux.
+
+    Return:
+        List[(as_obj, router, neigh, link)]
+    """
+    keyed = []
+    for as_obj in as_map.values():
+        for router in as_obj.routers.values():
+            for neigh in router.neighbors:
+                if neigh.type != "inter-as":
+                    continue
+                link = link_index[(as_obj.name, router.name, neigh.router)]
+                local_key = (as_obj.asn, natural_key(router.name), natural_key(neigh.interface))
+                remote_key = (as_map[link.remote.as_name].asn, natural_key(link.remote.router.name), natural_key(link.remote.interface))
+                if local_key < remote_key: # chaque lien n'est gardé que depuis son plus petit bout
+                    keyed.append(((local_key, remote_key), as_obj, router, neigh, link))
+    keyed.sort(key=lambda item: item[0])
+    return [item[1:] for item in keyed]
+
+
+def build_inter_as_neighbors(as_map: Dict[str, AutonomousSystem], inter_as_allocator: Optional[PrefixAllocator] = None, link_index: Optional[LinkIndex] = None,
+                             leases: Optional[AddressLeases] = None) -> None:
+    """
+    Pour toutes las iface inter as, utilisation d'un allocateur GLOBAL stockant les préfixes déjà pris
+    pr éviter d'avoir plusieurs iface avec la même @ip. Alloue un sous-réseau (/64, ou /127 selon le pool de l'intent) par lien
+    et config des obj interface pour les 2 routeurs. Les liens sont pris dans l'ordre de inter_as_links : mêmes adresses
+    quel que soit l'ordre de l'intent, et le bout le plus petit (ASN, puis numéro de routeur) a toujours la 1re adresse.
 
     Paramètres :
         as_map (Dict[str, AutonomousSystem]): Un dictionnaire associant les noms d'AS à leurs objets respectifs, créé dans parse_intent
-        inter_as_iterator (iterator): Itérateur Python générant des sous-réseaux IPv6 
+        inter_as_allocator (PrefixAllocator): Allocateur de sous-réseaux IPv6 inter-AS. Si None, on prend celui partagé par les AS (pool de l'intent)
+        link_index (LinkIndex): index des liens (build_link_index), reconstruit si non fourni
+        leases (AddressLeases): mode stable (voir allocate_addresses) : un lien ajouté ne décale pas les préfixes des suivants
 
     Return :
         None: Les objets Router et Interface dans as_map sont modifiés par effet de bord.
     """
-    for as_obj in as_map.values():
-        for router in as_obj.routers.values():
-            for neigh in router.neighbors:
-                if neigh.type == "inter-as":
-                    remote_as_name, remote_router_name = neigh.router.split(":")
-                    if remote_router_name > router.name:  # pour vérifier que chaque lien n'est traité qu'une suele fois.
-                        remote_as = as_map[remote_as_name] 
-                        remote_router = remote_as.routers[remote_router_name]
-
-                        # On récupère un /64 unique depuis l'itérateur global
-                        link_prefix = next(inter_as_iterator)
-
-                        r_ip = link_prefix[1] # router
-                        n_ip = link_prefix[2] # neighbor
-
-                        router.interfaces[neigh.interface] = Interface(
-                            name=neigh.interface,
-                            ipv6=r_ip,
-                            prefix_len=64,
-                            ospf_area=as_obj.area if as_obj.protocol == "ospfv3" else None,
-                            ripng=False
-                        )
-                        ## remote : désigne le voisin ( local : routeur sur lequel on est, remote; routeur au bout de la liaison avec le local)
-                        remote_iface = next(n.interface for n in remote_router.neighbors if n.router == f"{as_obj.name}:{router.name}") # la prochaine interface voisine si on est dans mon router)
-                        remote_router.interfaces[remote_iface] = Interface(
-                            name=remote_iface,
-                            ipv6=n_ip,
-                            prefix_len=64,
-                            ospf_area=remote_as.area if remote_as.protocol == "ospfv3" else None,
-                            ripng=False
-                        )
-
-                        router.bgp_neighbors[str(n_ip)] = remote_as.asn
-                        remote_router.bgp_neighbors[str(r_ip)] = as_obj.asn
+    if link_index is None:
+        link_index = build_link_index(as_map)
+
+    links = inter_as_links(as_map, link_index)
+    if leases is not None:
+        prefixes = leases.assign([(inter_as_allocator or as_obj.inter_as_allocator, link_lease_key(link)) for as_obj, _, _, link in links])
+
+    for n, (as_obj, router, neigh, link) in enumerate(links):
+        remote_as = as_map[link.remote.as_name]
+        remote_router = link.remote.router
+
+        # On récupère un préfixe unique depuis l'allocateur global
+        if leases is not None:
+            link_prefix = prefixes[n]
+        elif inter_as_allocator is not None:
+            link_prefix = inter_as_allocator.allocate()
+        else:
+            link_prefix = as_obj.allocate_link_prefix(inter_as=True)
+        r_ip, n_ip = link_endpoint_addresses(link_prefix) # router, neighbor
+
+        router.interfaces[neigh.interface] = Interface(
+            name=neigh.interface,
+            ip=r_ip,
+            prefix_len=link_prefix.prefixlen,
+            ospf_area=as_obj.area if as_obj.protocol == "ospfv3" else None,
+            ripng=False
+        )
+        ## remote : désigne le voisin ( local : routeur sur lequel on est, remote; routeur au bout de la liaison avec le local)
+        remote_iface = link.remote.interface # l'interface du voisin qui pointe vers nous
+        remote_router.interfaces[remote_iface] = Interface(
+            name=remote_iface,
+            ip=n_ip,
+            prefix_len=link_prefix.prefixlen,
+            ospf_area=remote_as.area if remote_as.protocol == "ospfv3" else None,
+            ripng=False
+        )
+
+        router.bgp_neighbors[n_ip] = remote_as.asn
+        remote_router.bgp_neighbors[r_ip] = as_obj.asn
 
 def router_id_from_name(router_name: str) -> str:
     # R1 -> 1.1.1.1 
@@ -349,7 +917,88 @@ def determine_bgp_role(local_asn, remote_asn, bgp_policies):
             return role
     return None
 
-def generate_router_config(router: Router, as_obj: AutonomousSystem, as_map: Dict[str, AutonomousSystem], reflection_routing = False) -> str:
+@dataclass(frozen=True, slots=True)
+class ASSettings:
+    """Paramètres d'AS utiles au rendu d'une config (sans les routeurs) : copie figée de AutonomousSystem."""
+    name: str
+    asn: int
+    ipv6_prefix: ipaddress.IPv6Network
+    protocol: str
+    process_id: Optional[int]
+    area: Optional[int]
+    bgp_policies: Dict[str, Dict]
+
+
+@dataclass(frozen=True, slots=True)
+class RouterSnapshot:
+    """
+    Vue figée (frozen) et picklable de tout ce dont generate_router_config a besoin pour un routeur, une fois la
+    topologie résolue (adresses allouées, sessions BGP construites). Le rendu devient une fonction pure du snapshot,
+    on peut donc l'envoyer à un autre process. Adresses en int, mises en texte seulement par render_router_config.
+    """
+    name: str
+    role: str
+    asn: int
+    rr_role: str
+    loopback: int
+    interfaces: Tuple[Interface, ...]
+    neighbors: Tuple[Neighbor, ...]
+    bgp_neighbors: Tuple[Tuple[int, int], ...] # (ip voisin, asn) dans l'ordre de création des sessions
+    bgp_role_by_ip: Tuple[Tuple[int, Optional[str]], ...] # ip voisin eBGP -> provider/peer/customer
+    as_settings: ASSettings
+    rr_cluster: Optional[str] = None
+    rr_clients: Tuple[int, ...] = ()
+
+
+def snapshot_router(router: Router, as_obj: AutonomousSystem, link_index: LinkIndex) -> RouterSnapshot:
+    """
+    Fige l'état résolu d'un routeur (copie des interfaces et voisins, ip des voisins eBGP résolues via le link_index).
+
+    Paramètres :
+        router (Router): routeur à figer
+        as_obj (AutonomousSystem): son AS
+        link_index (LinkIndex): index des liens (build_link_index)
+
+    Return:
+        RouterSnapshot
+    """
+    bgp_role_by_ip = {} # dico des rôles bgp, puis remplissage :
+
+    for neigh in router.neighbors:
+        if neigh.type == "inter-as":
+            # Trouver le lien et donc l'interface du voisin qui pointe vers nous
+            link = link_index[(as_obj.name, router.name, neigh.router)]
+
+            remote_ip = link.remote.ip ## .ip : @ ipv6 (int) de l'interface d'en face
+
+            # Mapping IP du voisin -> rôle
+            bgp_role_by_ip[remote_ip] = neigh.bgp_role
+
+    return RouterSnapshot(
+        name=router.name,
+        role=router.role,
+        asn=router.asn,
+        rr_role=router.rr_role,
+        loopback=router.loopback_ip,
+        interfaces=tuple(replace(iface) for iface in router.interfaces.values()), # replace() sans argument = copie
+        neighbors=tuple(replace(n) for n in router.neighbors),
+        bgp_neighbors=tuple(router.bgp_neighbors.items()),
+        bgp_role_by_ip=tuple(bgp_role_by_ip.items()),
+        as_settings=ASSettings(
+            name=as_obj.name,
+            asn=as_obj.asn,
+            ipv6_prefix=as_obj.ipv6_prefix,
+            protocol=as_obj.protocol,
+            process_id=as_obj.process_id,
+            area=as_obj.area,
+            bgp_policies=as_obj.bgp_policies,
+        ),
+        rr_cluster=router.rr_cluster,
+        rr_clients=tuple(sorted(router.rr_clients)),
+    )
+
+
+def generate_router_config(router: Router, as_obj: AutonomousSystem, as_map: Dict[str, AutonomousSystem], reflection_routing = False, link_index: Optional[LinkIndex] = None) -> str:
     """
     Génère l'intégralité du fichier de configuration de démarrage (startup-config) pour un routeur Cisco, avec les paramètres systèmes, interfaces, 
     voisinage, BGP, RIP, OSPF, Communities et route-map.
@@ -359,86 +1008,91 @@ def generate_router_config(router: Router, as_obj: AutonomousSystem, as_map: Dic
         as_obj (AutonomousSystem): Le système autonome auquel appartient le routeur.
         as_map (Dict[str, AutonomousSystem]): La cartographie globale du réseau pour résoudre 
             les relations inter-AS.
+        link_index (LinkIndex): index des liens (build_link_index). A fournir quand on génère tous les routeurs, 
+            sinon il est reconstruit à chaque appel.
 
     Return:
         str: Une chaîne de caractères contenant l'intégralité des commandes Cisco IOS 
              prêtes à être écrites dans un fichier .cfg.
     """
-    rid = router_id_from_name(router.name)
+    if link_index is None:
+        link_index = build_link_index(as_map)
+    return render_router_config(snapshot_router(router, as_obj, link_index), reflection_routing)
 
-    # Find inter-AS interface (if any)
-    inter_as_iface = None
-    for neigh in router.neighbors:
-        if neigh.type == "inter-as":
-            inter_as_iface = neigh.interface
-            break
-    
-    # si ospf : remplissage des ospf_cost 
-    iface_costs = { n.interface: n.ospf_cost for n in router.neighbors if n.ospf_cost is not None and n.type == "intra-as" } # crée un dico avec les couts ospf par interface 
 
-    
-    bgp_role_by_ip = {} # dico des rôles bgp, puis remplissage :
+def render_router_config(router: RouterSnapshot, reflection_routing = False, template: Optional[str] = None) -> str:
+    """
+    Rendu de la config d'un routeur à partir de son snapshot (fonction pure, utilisable dans un process du pool).
 
-    for neigh in router.neighbors:
-        if neigh.type == "inter-as":
-            # IP locale
-            local_ip = router.interfaces[neigh.interface].ipv6
+    Paramètres :
+        router (RouterSnapshot): snapshot créé par snapshot_router
+        reflection_routing (bool): route reflection ou full-mesh
+        template (str): fichier template (templates/ios_15.2.cfg par défaut)
 
-            # Trouver le router distant
-            remote_as_name, remote_router_name = neigh.router.split(":")
+    Return:
+        str: contenu du fichier .cfg
+    """
+    return "\n".join(iter_router_config(router, reflection_routing, template))
 
-            remote_as = as_map[remote_as_name]
-            remote_router = remote_as.routers[remote_router_name]
 
-            # Trouver l'interface du voisin qui pointe vers nous
-            remote_iface_name = next( n.interface for n in remote_router.neighbors if n.router == f"{as_obj.name}:{router.name}") # prochaine interface voisine 
+def iter_router_config(router: RouterSnapshot, reflection_routing = False, template: Optional[str] = None) -> Iterator[str]:
+    """
+    Même rendu que render_router_config mais morceau par morceau (générateur) : on peut écrire la config au fur et à mesure
+    sans jamais avoir tout le texte en mémoire (voir stream_router_config).
+    Le squelette vient du template compilé (blocs constants recopiés tels quels), seules les sections sont calculées ici.
 
-            remote_ip = remote_router.interfaces[remote_iface_name].ipv6 ## .ipv6 : attribut @ ipv6 de la classe interface
+    Paramètres :
+        router (RouterSnapshot): snapshot créé par snapshot_router
+        reflection_routing (bool): route reflection ou full-mesh
+        template (str): fichier template (templates/ios_15.2.cfg par défaut)
 
-            # Mapping IP du voisin -> rôle
-            bgp_role_by_ip[str(remote_ip)] = neigh.bgp_role
-    #print(bgp_role_by_ip)
+    Return:
+        Iterator[str]: des blocs d'une ou plusieurs lignes, à joindre avec \\n
+    """
+    compiled = load_template(template or DEFAULT_TEMPLATE, tuple(TEMPLATE_SECTIONS), TEMPLATE_VARIABLES)
+    variables = {
+        "hostname": router.name,
+        "router_id": router_id_from_name(router.name),
+        "asn": str(router.asn),
+        "as_name": router.as_settings.name,
+    }
+    return compiled.render(variables, TEMPLATE_SECTIONS, router, reflection_routing)
 
+
+# Sections dynamiques du template : chacune renvoie ses lignes pour un routeur (aucune si elle ne le concerne pas).
+# Elles prennent toutes (router, reflection_routing), rempli plus bas une fois les fonctions définies.
+TEMPLATE_SECTIONS: Dict[str, Callable[[RouterSnapshot, bool], List[str]]] = {}
+TEMPLATE_VARIABLES = ("hostname", "router_id", "asn", "as_name")
+
+
+def section_loopback(router: RouterSnapshot, reflection_routing = False) -> List[str]:
     lines = []
-    lines.append("!")
-    lines.append("version 15.2") # version
-    lines.append("service timestamps debug datetime msec") # timestamp pour les msg de debugage je crois
-    lines.append("service timestamps log datetime msec") # timestamp pour les msg de system / de console (log)
-    lines.append("!")
-    lines.append(f"hostname {router.name}")
-    lines.append("!")
-    lines.append("boot-start-marker") # flag de début de la zone contenant les commandes de démarrage 
-    lines.append("boot-end-marker") # flag de fin de la zone.
-    lines.append("!")
-    lines.append("no aaa new-model") # Ne pas activer le nouveau modèle de sécurité AAA (Authentication, Authorization, and Accounting) qui permet de gérer les accès au routeur avec des droits et tout.
-    lines.append("no ip icmp rate-limit unreachable") 
-    lines.append("ip cef") # CEF : Cisco Express Forwarding : permet de simplifier table route / fwd pour router paquets quasi instantanément
-    lines.append("!")
-    lines.append("no ip domain lookup") # je crois que en gros si erreur on recherche pas l'erreur sur internet mais on affiche msg d'erreur ? 
-    lines.append("ipv6 unicast-routing")
-    lines.append("ipv6 cef")
-    lines.append("!")
-    lines.append("multilink bundle-name authenticated") # si deux lien du même départ menant au même endroit : regroupe les deux liens
-    lines.append("!")
-    lines.append("ip tcp synwait-time 5") # si envoi connexion tcp que 5 sec à l'autre côté pour répondre 
-    lines.append("!")
+    as_obj = router.as_settings
     lines.append("interface Loopback0")
     lines.append(" no ip address")
     lines.append(" no shutdown")
-    lines.append(f" ipv6 address {router.loopback}/128")
+    lines.append(f" ipv6 address {ipv6_str(router.loopback)}/128")
     lines.append(" ipv6 enable")
     if as_obj.protocol == "ospfv3":
         lines.append(f" ipv6 ospf {as_obj.process_id} area {as_obj.area}") #
-    elif as_obj.protocol == "rip": 
-        lines.append(f" ipv6 rip {as_obj.name} enable") 
+    elif as_obj.protocol == "rip":
+        lines.append(f" ipv6 rip {as_obj.name} enable")
     lines.append("!")
+    return lines
 
-    for iface in router.interfaces.values():
+
+def section_interfaces(router: RouterSnapshot, reflection_routing = False) -> List[str]:
+    lines = []
+    as_obj = router.as_settings
+    # si ospf : remplissage des ospf_cost
+    iface_costs = { n.interface: n.ospf_cost for n in router.neighbors if n.ospf_cost is not None and n.type == "intra-as" } # crée un dico avec les couts ospf par interface
+
+    for iface in router.interfaces:
         lines.append(f"interface {iface.name}")
         lines.append(" no ip address")
         lines.append(" no shutdown")
-        lines.append(" negotiation auto") # débit de données envoyer : en prenant le + petit débit 
-        lines.append(f" ipv6 address {iface.ipv6}/{iface.prefix_len}")
+        lines.append(" negotiation auto") # débit de données envoyer : en prenant le + petit débit
+        lines.append(f" ipv6 address {ipv6_str(iface.ip)}/{iface.prefix_len}")
         lines.append(" ipv6 enable")
 
         if as_obj.protocol == "ospfv3":
@@ -450,50 +1104,59 @@ def generate_router_config(router: Router, as_obj: AutonomousSystem, as_map: Dic
             lines.append(f" ipv6 rip {as_obj.name} enable")
 
         lines.append("!")
+    return lines
+
+
+def section_bgp(router: RouterSnapshot, reflection_routing = False) -> List[str]:
+    lines = []
+    as_obj = router.as_settings
+    rid = router_id_from_name(router.name)
+    # les adresses passent en texte ici, et seulement ici
+    bgp_neighbors = {ipv6_str(ip): asn for ip, asn in router.bgp_neighbors}
+    bgp_role_by_ip = {ipv6_str(ip): role for ip, role in router.bgp_role_by_ip}
+    rr_clients = {ipv6_str(ip) for ip in router.rr_clients}
 
-    
-    # BGP
     lines.append(f"router bgp {router.asn}")
-    lines.append(f" bgp router-id {rid}") #rid : router id 
+    lines.append(f" bgp router-id {rid}") #rid : router id
     lines.append(" bgp log-neighbor-changes") # permet au router d'alerter si y a des changements de states dans ses bgp sessions
+    if reflection_routing and router.rr_role == "server" and router.rr_cluster is not None:
+        lines.append(f" bgp cluster-id {router.rr_cluster}") # même cluster-id sur les RR redondants d'un cluster
     if router.role == "border":
         lines.append(" no synchronization")
         # no sync pour les border : c ok de partager les routes internes ici car on est en full mesh ? je suis pas sûre
     lines.append(" no bgp default ipv4-unicast")
 
-    for neigh_ip, neigh_asn in router.bgp_neighbors.items():
+    for neigh_ip, neigh_asn in bgp_neighbors.items():
         lines.append(f" neighbor {neigh_ip} remote-as {neigh_asn}")
         if neigh_asn == router.asn:
             lines.append(f" neighbor {neigh_ip} update-source Loopback0") # on n'ajoute cette ligne que pour notre as
-            if reflection_routing and router.rr_role == "server":
-                lines.append(f"  neighbor {neigh_ip} route-reflector-client")
-    
+
     lines.append(" !")
-    lines.append(" address-family ipv4") ## nécessaire ? je suis pas sure 
+    lines.append(" address-family ipv4") ## nécessaire ? je suis pas sure
     lines.append(" exit-address-family")
     lines.append(" !")
     lines.append(" address-family ipv6")
 
     if router.role == "border":
         lines.append(f"  network {as_obj.ipv6_prefix}")
-        if reflection_routing and router.rr_role == "server" and neigh_asn == router.asn:
-            lines.append(f"  neighbor {neigh_ip} route-reflector-client")
 
 
-    for neigh_ip in router.bgp_neighbors.keys():
+    for neigh_ip in bgp_neighbors.keys():
         role = bgp_role_by_ip.get(neigh_ip)
 
         lines.append(f"  neighbor {neigh_ip} activate")
-        if router.bgp_neighbors[neigh_ip] == router.asn:
+        if bgp_neighbors[neigh_ip] == router.asn:
             lines.append(f"  neighbor {neigh_ip} next-hop-self")
             lines.append(f"  neighbor {neigh_ip} send-community")
+            if reflection_routing and neigh_ip in rr_clients:
+                lines.append(f"  neighbor {neigh_ip} route-reflector-client") # dans l'address-family ipv6 : sinon ne s'applique qu'à l'ipv4
 
 
         # Appliquer la policy selon le rôle (provider/peer/customer)
         if role:
             if role in as_obj.bgp_policies["policies"].get("communities", {}):
                 lines.append(f"  neighbor {neigh_ip} route-map SET-COMMUNITY-{role.upper()} in")
-                
+
             if role == "customer":
                 # On envoie TOUT au client (Internet, nos routes, etc.)
                 lines.append(f"  neighbor {neigh_ip} route-map PASS-ALL out")
@@ -503,26 +1166,41 @@ def generate_router_config(router: Router, as_obj: AutonomousSystem, as_map: Dic
                 lines.append(f"  neighbor {neigh_ip} route-map EXPORT-FILTER-{role.upper()} out")
     lines.append(" exit-address-family")
     lines.append("!")
+    return lines
+
 
-    # Rôles BGP réellement présents sur ce routeur
-    roles_present = set()
+def roles_present(router: RouterSnapshot) -> Dict[str, None]:
+    # Rôles BGP réellement présents sur ce routeur (dict et pas set : ordre d'apparition fixe, sinon l'ordre
+    # des route-maps dépend du hash des str et change d'un process à l'autre)
+    roles = {}
     for neigh in router.neighbors:
         if neigh.type == "inter-as" and neigh.bgp_role:
-            roles_present.add(neigh.bgp_role)
-
-    # --- community-lists ---
-    if router.role == "border": # il faut d├®finir les communaut├®s 
-                                # sur tous les routeurs de bordure, m├¬me s'ils n'ont
-                                #  pas de voisin direct comme ├ºa (par exemple, ils peuvent
-                                #  avoir besoin d'appliquer une route map sur cette community, 
-                                # m├¬me sans avoir de voisin de ce type)
+            roles[neigh.bgp_role] = None
+    return roles
+
+
+def section_community_lists(router: RouterSnapshot, reflection_routing = False) -> List[str]:
+    lines = []
+    as_obj = router.as_settings
+    if router.role == "border": # il faut définir les communautés
+                                # sur tous les routeurs de bordure, même s'ils n'ont
+                                #  pas de voisin direct comme ça (par exemple, ils peuvent
+                                #  avoir besoin d'appliquer une route map sur cette community,
+                                # même sans avoir de voisin de ce type)
         for role in ["peer","customer","provider"]:
             comm = as_obj.bgp_policies["policies"]["communities"][role]
             lines.append(f"ip community-list standard ONLY-{role.upper()} permit {comm}")
         lines.append("!")
+    return lines
+
+
+def section_route_maps(router: RouterSnapshot, reflection_routing = False) -> List[str]:
+    lines = []
+    as_obj = router.as_settings
+    roles = roles_present(router)
 
     # --- route-maps set community + local-pref ---
-    for role in roles_present:
+    for role in roles:
         comm = as_obj.bgp_policies["policies"]["communities"][role]
         lp = as_obj.bgp_policies["policies"]["local_pref"][role]
 
@@ -532,27 +1210,38 @@ def generate_router_config(router: Router, as_obj: AutonomousSystem, as_map: Dic
         lines.append("!")
 
 
-    # export filter (seulement si provider ou peer dans les voisins)    
+    # export filter (seulement si provider ou peer dans les voisins)
     for role in ["provider","peer"]:
-        if role in roles_present:
+        if role in roles:
             lines.append(f"route-map EXPORT-FILTER-{role.upper()} deny 10")
             lines.append(" match community ONLY-PEER")
             lines.append(f"route-map EXPORT-FILTER-{role.upper()} deny 20")
             lines.append(" match community ONLY-PROVIDER")
             lines.append(f"route-map EXPORT-FILTER-{role.upper()} permit 30")
             lines.append("!")
-    if "customer" in roles_present:
+    if "customer" in roles:
         lines.append("route-map PASS-ALL permit 10")
         lines.append("!")
-    lines.append("ip forward-protocol nd") # autorise le protocol à fwd des neighbor discoveries
-    lines.append("!")
-    lines.append("no ip http server") #1.
-    lines.append("no ip http secure-server") # 2. (1 et 2) -> désactiver l'interface web du router
-    lines.append("!")
+    return lines
+
 
+def section_static_routes(router: RouterSnapshot, reflection_routing = False) -> List[str]:
+    lines = []
     # Route statique vers le supernet (pour les routeurs border) supernet : bloc d'adresses IPv6 global attribué à l'AS.
     if router.role == "border":
-        lines.append(f"ipv6 route {as_obj.ipv6_prefix} Null0")
+        lines.append(f"ipv6 route {router.as_settings.ipv6_prefix} Null0")
+    return lines
+
+
+def section_igp(router: RouterSnapshot, reflection_routing = False) -> List[str]:
+    lines = []
+    as_obj = router.as_settings
+    # Find inter-AS interface (if any)
+    inter_as_iface = None
+    for neigh in router.neighbors:
+        if neigh.type == "inter-as":
+            inter_as_iface = neigh.interface
+            break
 
     # Configuration IGP
     if as_obj.protocol == "rip":
@@ -560,77 +1249,478 @@ def generate_router_config(router: Router, as_obj: AutonomousSystem, as_map: Dic
         lines.append("!")
     elif as_obj.protocol == "ospfv3":
         lines.append("ipv6 router ospf 1")
-        lines.append(f" router-id {rid}")
+        lines.append(f" router-id {router_id_from_name(router.name)}")
         if router.role == "border" and inter_as_iface:
-            lines.append(f" passive-interface {inter_as_iface}") # évite le partage d'ospf aux AS voisines 
+            lines.append(f" passive-interface {inter_as_iface}") # évite le partage d'ospf aux AS voisines
         lines.append("!")
+    return lines
 
-    lines.append("control-plane") # trafic d'infos destinées au router 
-    lines.append("!")
-    lines.append("line con 0") # permet d'entrer dans la configuration de la ligne console physique
-    lines.append(" exec-timeout 0 0") # désactive le compte à rebours avant fermeture session cisco
-    lines.append(" privilege level 15") # niveaux d'accès de 1 (très peu) à 15 (sudo)
-    lines.append(" logging synchronous") # permet de pouvoir finir de taper ta commande sans te faire couper par la console en plein milieu de ta ligne !!
-    lines.append(" stopbits 1") # chaque bit de fin de transmission de packet sera un 1
-    lines.append("line aux 0") # entrer dans la configuration du port Auxiliaire du routeur.
-    lines.append(" exec-timeout 0 0") ## alors la y a 2 fois les mêmes lignes mais on avait peur de les enlever et que ça marche plus... désolée 
-    lines.append(" privilege level 15")
-    lines.append(" logging synchronous")
-    lines.append(" stopbits 1")
-    lines.append("line vty 0 4")
-    lines.append(" login")
-    lines.append("!")
-    lines.append("!")
-    lines.append("end")
 
-    return "\n".join(lines)
+TEMPLATE_SECTIONS.update({
+    "loopback": section_loopback,
+    "interfaces": section_interfaces,
+    "bgp": section_bgp,
+    "community_lists": section_community_lists,
+    "route_maps": section_route_maps,
+    "static_routes": section_static_routes,
+    "igp": section_igp,
+})
+
+
+def config_filename(router_name: str) -> str:
+    # R17 -> i17_startup-config.cfg (nom attendu par GNS3/Dynamips)
+    return f"i{router_name[1:]}_startup-config.cfg"
+
+
+def write_router_config(job: Tuple[RouterSnapshot, bool, str, Optional[str]]) -> Tuple[str, int, int]:
+    """
+    Rend et écrit la config d'un routeur. Fonction de haut niveau (donc picklable) pour le pool de process.
+
+    Paramètres :
+        job: (snapshot du routeur, reflection_routing, dossier de sortie, template ou None)
+
+    Return:
+        (nom du fichier écrit, nombre de lignes, nombre d'octets) : les 2 derniers pour les compteurs de --profile
+    """
+    snap, reflection_routing, out_dir, template = job
+    filename = config_filename(snap.name)
+    with open(os.path.join(out_dir, filename), "w", buffering=WRITE_BUFFER) as f: #création fichier avec bon nom
+        n_lines, n_bytes = stream_router_config(snap, reflection_routing, f, template) #écrit le template dans le fichier, au fil du rendu
+    return filename, n_lines, n_bytes
+
+
+WRITE_BUFFER = 1 << 16 # 64 Ko : une config entière tient dans le tampon -> en pratique un seul write() système par fichier
+STREAM_CHUNK_PIECES = 256 # morceaux rendus (lignes ou blocs constants du template) gardés en mémoire au maximum avant écriture
+
+
+def stream_router_config(snap: RouterSnapshot, reflection_routing: bool, out, template: Optional[str] = None) -> Tuple[int, int]:
+    """
+    Écrit la config d'un routeur dans un fichier texte déjà ouvert, au fil de iter_router_config
+    (même contenu octet par octet que render_router_config, sans construire la chaîne complète).
+
+    Return:
+        (nombre de lignes, nombre d'octets)
+    """
+    n_newlines = n_bytes = 0
+    chunk = []
+    for piece in iter_router_config(snap, reflection_routing, template):
+        chunk.append(piece)
+        if len(chunk) == STREAM_CHUNK_PIECES: # un write() par paquet, pas un par ligne (moins d'appels Python)
+            text = ("\n" if n_bytes else "") + "\n".join(chunk)
+            out.write(text)
+            n_newlines += text.count("\n")
+            n_bytes += len(text)
+            chunk = []
+    if chunk:
+        text = ("\n" if n_bytes else "") + "\n".join(chunk)
+        out.write(text)
+        n_newlines += text.count("\n")
+        n_bytes += len(text)
+    return n_newlines + 1, n_bytes
+
+
+def write_configs_archive(snaps: Iterable[RouterSnapshot], reflection_routing: bool, path: str,
+                          template: Optional[str] = None) -> List[Tuple[str, int, int]]:
+    """
+    Écrit toutes les configs dans une seule archive au lieu d'un fichier par routeur (.zip, .tar, .tar.gz / .tgz),
+    pratique pour copier ou versionner une grosse topologie d'un coup.
+    En zip chaque config est streamée directement dans l'archive ; en tar il faut la taille avant d'écrire l'entrée,
+    donc une config (une seule à la fois) passe par un tampon mémoire.
+
+    Paramètres :
+        snaps (Iterable[RouterSnapshot]): les routeurs à écrire (un générateur suffit, ils sont pris un par un)
+        reflection_routing (bool): route reflection ou full-mesh
+        path (str): chemin de l'archive, le format est déduit de l'extension
+        template (str): fichier template (templates/ios_15.2.cfg par défaut)
+
+    Return:
+        List[(nom du fichier dans l'archive, lignes, octets)]
+    """
+    written = []
+    tmp = path + ".tmp"
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for snap in snaps:
+                filename = config_filename(snap.name)
+                with zf.open(filename, "w") as raw, io.TextIOWrapper(raw, encoding="utf-8", newline="") as f:
+                    written.append((filename, *stream_router_config(snap, reflection_routing, f, template)))
+    elif path.endswith((".tar", ".tar.gz", ".tgz")):
+        mode = "w" if path.endswith(".tar") else "w:gz"
+        with tarfile.open(tmp, mode, format=tarfile.PAX_FORMAT) as tf:
+            for snap in snaps:
+                filename = config_filename(snap.name)
+                buf = io.StringIO()
+                n_lines, n_bytes = stream_router_config(snap, reflection_routing, buf, template)
+                data = buf.getvalue().encode("utf-8")
+                info = tarfile.TarInfo(filename)
+                info.size = len(data)
+                info.mtime = int(time.time())
+                tf.addfile(info, io.BytesIO(data))
+                written.append((filename, n_lines, n_bytes))
+    else:
+        raise ValueError(f"Format d'archive inconnu pour {path} (.zip, .tar, .tar.gz ou .tgz)")
+    os.replace(tmp, path) # pas d'archive à moitié écrite si ça plante en cours de route
+    return written
+
+
+MANIFEST_FILE = "configs_manifest.json" # à côté du dossier configs/
+
+
+RENDER_MODULES = ("generate_conf.py", "config_template.py") # code qui produit le texte des configs
+
+
+def generator_fingerprint(template: Optional[str] = None) -> str:
+    """
+    Hash du code du rendu (ce fichier et le compilateur de templates config_template.py) et du template utilisé :
+    si l'un d'eux change, toutes les configs sont à refaire.
+    """
+    h = hashlib.sha256()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for path in [os.path.join(here, name) for name in RENDER_MODULES] + [template or DEFAULT_TEMPLATE]:
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def snapshot_hash(snap: RouterSnapshot, reflection_routing: bool, fingerprint: str) -> str:
+    """
+    Hash du contenu d'entrée d'un routeur : interfaces, voisins, sessions BGP, policies et paramètres d'AS
+    (tout est dans le snapshot), + le mode iBGP et l'empreinte du générateur.
+    """
+    payload = json.dumps(
+        {"router": asdict(snap), "reflection_routing": reflection_routing, "generator": fingerprint},
+        default=str, # IPv6Address / IPv6Network -> str
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
 
-def main(intent_path, route_reflection = False):
+def load_manifest(path: str = MANIFEST_FILE) -> Dict[str, Dict[str, str]]:
+    """
+    Charge le manifeste {routeur: {"file": ..., "hash": ..., "deployed": ...}} de la génération précédente
+    ({} si absent ou illisible). "deployed" : hash de la dernière config déployée avec succès (voir mark_deployed).
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("routers", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(routers: Dict[str, Dict[str, str]], path: str = MANIFEST_FILE) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"routers": routers}, f, indent=1, sort_keys=True)
+    os.replace(tmp, path) # écriture atomique : jamais de manifeste à moitié écrit
+
+
+def mark_deployed(names: Iterable[str], path: str = MANIFEST_FILE) -> None:
+    """
+    Note dans le manifeste que la config actuelle de ces routeurs a été poussée sans erreur (telnet.py, après le
+    déploiement) : "deployed" prend la valeur de "hash".
+    """
+    routers = load_manifest(path)
+    for name in names:
+        if name in routers:
+            routers[name]["deployed"] = routers[name]["hash"]
+    save_manifest(routers, path)
+
+
+def pending_deployment(path: str = MANIFEST_FILE) -> Set[str]:
+    """
+    Routeurs dont la config actuelle n'a jamais été déployée avec succès : config nouvelle ou modifiée, mais aussi
+    config inchangée dont le déploiement précédent a échoué ou expiré.
+    """
+    return {name for name, entry in load_manifest(path).items() if entry.get("deployed") != entry["hash"]}
+
+
+TOPOLOGY_CACHE_DIR = ".topology_cache" # snapshots de topologie résolue, un fichier par (intent, options, code)
+TOPOLOGY_CACHE_KEEP = 4 # fichiers gardés (les plus récents), les autres sont supprimés
+TOPOLOGY_CACHE_MAGIC = b"GNSTOPO1" # en tête de fichier, à changer si le format des tuples change
+
+
+def topology_cache_key(raw_intent: bytes, route_reflection: bool, auto_rr: bool, leases: Optional[Dict[str, str]] = None) -> str:
+    """
+    Clé du cache de topologie : hash de l'intent + des options qui changent la résolution + du code qui la fait
+    (ce fichier, intent_schema.py, et rr_planner.py / igp.py si placement automatique) + les baux en mode stable.
+    """
+    h = hashlib.sha256(raw_intent)
+    h.update(f"rr={route_reflection};auto_rr={auto_rr and route_reflection}".encode())
+    if leases is not None:
+        h.update(json.dumps(leases, sort_keys=True).encode())
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in ("generate_conf.py", "intent_schema.py") + (("rr_planner.py", "igp.py") if auto_rr else ()):
+        with open(os.path.join(here, name), "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def dump_snapshots(snaps: List[RouterSnapshot]) -> bytes:
+    """
+    Sérialise des snapshots en tuples de types de base (int, str, None, dict) avec marshal : bien plus rapide à relire
+    que pickle sur des milliers d'objets. Les paramètres d'AS sont stockés une fois par AS, pas une fois par routeur.
+    """
+    as_table, as_index = [], {}
+    routers = []
+    for snap in snaps:
+        a = snap.as_settings
+        if a.name not in as_index:
+            as_index[a.name] = len(as_table)
+            as_table.append((a.name, a.asn, str(a.ipv6_prefix), a.protocol, a.process_id, a.area, a.bgp_policies))
+        routers.append((
+            snap.name, snap.role, snap.asn, snap.rr_role, snap.loopback, as_index[a.name],
+            tuple((i.name, i.ip, i.prefix_len, i.ospf_area, i.ripng) for i in snap.interfaces),
+            tuple((n.router, n.type, n.interface, n.ospf_cost, n.bgp_role) for n in snap.neighbors),
+            snap.bgp_neighbors, snap.bgp_role_by_ip, snap.rr_cluster, snap.rr_clients,
+        ))
+    return TOPOLOGY_CACHE_MAGIC + marshal.dumps((tuple(as_table), tuple(routers)))
+
+
+def load_snapshots(blob: bytes) -> List[RouterSnapshot]:
+    """Inverse de dump_snapshots. ValueError si le contenu n'est pas un snapshot de ce format."""
+    if not blob.startswith(TOPOLOGY_CACHE_MAGIC):
+        raise ValueError("pas un snapshot de topologie")
+    try:
+        as_table, routers = marshal.loads(blob[len(TOPOLOGY_CACHE_MAGIC):])
+    except (EOFError, TypeError) as e:
+        raise ValueError(f"snapshot de topologie illisible ({e})") from None
+    settings = [
+        ASSettings(name, asn, ipaddress.IPv6Network(prefix), protocol, process_id, area, bgp_policies)
+        for name, asn, prefix, protocol, process_id, area, bgp_policies in as_table
+    ]
+    return [
+        RouterSnapshot(
+            name=name, role=role, asn=asn, rr_role=rr_role, loopback=loopback,
+            interfaces=tuple(Interface(*i) for i in interfaces),
+            neighbors=tuple(Neighbor(*n) for n in neighbors),
+            bgp_neighbors=bgp_neighbors, bgp_role_by_ip=bgp_role_by_ip,
+            as_settings=settings[as_idx], rr_cluster=rr_cluster, rr_clients=rr_clients,
+        )
+        for (name, role, asn, rr_role, loopback, as_idx, interfaces, neighbors,
+             bgp_neighbors, bgp_role_by_ip, rr_cluster, rr_clients) in routers
+    ]
+
+
+def save_topology_cache(snaps: List[RouterSnapshot], key: str, cache_dir: str = TOPOLOGY_CACHE_DIR) -> None:
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, key + ".bin")
+    with open(path + ".tmp", "wb") as f:
+        f.write(dump_snapshots(snaps))
+    os.replace(path + ".tmp", path) # atomique : un autre script qui lit le cache en même temps ne voit jamais un fichier à moitié écrit
+    # on ne garde que les derniers : un intent modifié à la main donne une nouvelle clé à chaque fois
+    entries = sorted((e for e in os.scandir(cache_dir) if e.name.endswith(".bin")), key=lambda e: e.stat().st_mtime, reverse=True)
+    for old in entries[TOPOLOGY_CACHE_KEEP:]:
+        os.remove(old.path)
+
+
+def load_topology_cache(key: str, cache_dir: str = TOPOLOGY_CACHE_DIR) -> Optional[List[RouterSnapshot]]:
+    """Snapshots en cache pour cette clé, None si absent ou illisible (on recalcule alors tout)."""
+    path = os.path.join(cache_dir, key + ".bin")
+    try:
+        with open(path, "rb") as f:
+            snaps = load_snapshots(f.read())
+    except (OSError, ValueError):
+        return None
+    os.utime(path) # récemment utilisé : ne pas le supprimer au prochain ménage
+    return snaps
+
+
+def resolve_snapshots(intent_path: str, route_reflection = False, auto_rr = False, stats: PipelineStats = NO_STATS,
+                      cache_dir: Optional[str] = TOPOLOGY_CACHE_DIR, lease_path: Optional[str] = None) -> List[RouterSnapshot]:
+    """
+    Topologie résolue (adresses allouées, sessions BGP construites) sous forme de snapshots, dans l'ordre de l'intent.
+    Si la même topologie a déjà été résolue (même intent, mêmes options, même code), elle est relue depuis le cache
+    binaire sans parser ni valider l'intent ni refaire les allocations.
+
+    Paramètres :
+        intent_path (str): chemin de l'intent file
+        route_reflection (bool): route reflection ou full-mesh
+        auto_rr (bool): placement automatique des RR (voir main)
+        stats (PipelineStats): instrumentation
+        cache_dir (str): dossier du cache, None pour ne pas l'utiliser
+        lease_path (str): fichier de baux -> adressage stable (voir AddressLeases), None pour l'allocation classique
+
+    Return:
+        List[RouterSnapshot]
+
+    Raise:
+        IntentError: intent invalide
+    """
+    with open(intent_path, "rb") as f:
+        raw = f.read()
+    leases = AddressLeases(load_leases(lease_path)) if lease_path else None
+    key = topology_cache_key(raw, route_reflection, auto_rr, leases.previous if leases else None) if cache_dir else None
+    if key:
+        with stats.stage("load_topology_cache"):
+            snaps = load_topology_cache(key, cache_dir)
+        if snaps is not None:
+            stats.count("topology_cache_hit", 1)
+            return snaps
+
+    with stats.stage("parse_intent"):
+        as_map = parse_intent(intent_path, raw) # transforme en dico python
+    with stats.stage("build_link_index"):
+        link_index = build_link_index(as_map) # index des liens, construit une fois et partagé par toutes les étapes
+    with stats.stage("build_inter_as_neighbors"):
+        build_inter_as_neighbors(as_map, None, link_index, leases) # attribu addr IP lien inter AS, dans le pool inter-AS de l'intent
+
+
+    with stats.stage("allocate_addresses"):
+        allocate_addresses(as_map, link_index, leases) # affectation addr IP
+    if leases is not None:
+        save_leases(leases.current, lease_path) # baux des routeurs retirés oubliés : leurs préfixes redeviennent libres
+        if key and leases.current != leases.previous:
+            # le prochain run relira ces baux-là : on range le résultat sous sa clé à lui (mêmes baux = mêmes adresses),
+            # sinon le 1er run après un changement de baux n'est jamais retrouvé dans le cache
+            key = topology_cache_key(raw, route_reflection, auto_rr, leases.current)
+    with stats.stage("build_bgp"):
+        if route_reflection : 
+            if auto_rr:
+                from rr_planner import plan_route_reflectors # import ici : rr_planner importe ce module
+                plan_route_reflectors(as_map)
+            build_bgp_rr(as_map)
+        else : 
+            build_bgp_fullmesh(as_map) # iBGP
+
+    # topologie résolue -> snapshots figés, le rendu ne dépend plus que d'eux
+    with stats.stage("snapshot"):
+        snaps = [snapshot_router(r, a, link_index) for a in as_map.values() for r in a.routers.values()]
+    if key:
+        with stats.stage("save_topology_cache"):
+            save_topology_cache(snaps, key, cache_dir)
+    return snaps
+
+
+def main(intent_path, route_reflection = False, jobs = 1, force = False, stats: PipelineStats = NO_STATS, auto_rr = False,
+         archive: Optional[str] = None, template: Optional[str] = None, cache = True, stable_addressing = False) -> Set[str]:
     """
     Orchestre la génération complète des fichiers de configuration réseau à partir d'un fichier d'intention:
-    1. Analyse le fichier JSON d'intention 
+    1. Analyse et valide le fichier JSON d'intention 
     2. Prépare les sous-réseaux IPv6 pour les liens Inter-AS
-    3. Alloue les adresses IP et construit les topologies BGP 
-    4. Nettoie et recrée le dossier de destination 'configs/'.
-    5. Génère et sauvegarde chaque fichier de configuration 
+    3. Alloue les adresses IP et construit les topologies BGP (1 à 3 sautés si la topologie est dans .topology_cache/)
+    4. Crée le dossier de destination 'configs/' si besoin.
+    5. Génère et sauvegarde les fichiers de configuration dont les entrées ont changé (hash dans configs_manifest.json)
 
     Args:
         intent_path (str): Chemin vers le fichier JSON 
         route_reflection : est-ce qu'on fait le réseau en full-mesh ou en route_reflection avec un routeur désigné reflector router ?
+        jobs (int): nombre de process pour le rendu et l'écriture des configs (1 = en série). Le résultat est identique octet par octet.
+        force (bool): tout regénérer même si le manifeste dit que rien n'a changé
+        stats (PipelineStats): instrumentation (temps par étape, compteurs), désactivée par défaut
+        auto_rr (bool): en route reflection, place automatiquement les RR (rr_planner.py) dans les AS où l'intent n'en déclare aucun
+        archive (str): si renseigné, toutes les configs sont écrites dans cette archive (.zip, .tar, .tar.gz) au lieu de configs/
+            (toujours complète, sans manifeste ni process, rendu en série)
+        template (str): squelette de config à utiliser (templates/ios_15.2.cfg par défaut), voir config_template.py
+        cache (bool): réutiliser / enregistrer la topologie résolue dans .topology_cache/ (voir resolve_snapshots)
+        stable_addressing (bool): adresses gardées d'un run à l'autre (address_leases.json) : ajouter / retirer un routeur
+            ne change que ses propres liens, donc seules les configs de ses voisins sont à redéployer
 
     Returns:
-        None
+        Set[str]: noms des routeurs dont la config a été (ré)écrite, les déploiements peuvent ignorer les autres
 
     Notes:
         Les fichiers de sortie sont nommés selon le format 'i<num>_startup-config.cfg' 
         et stockés dans le répertoire local 'configs/'.
     """
-    as_map = parse_intent(intent_path) # transforme en dico python
-    inter_as_iterator = iter(ipaddress.IPv6Network("2001:100:100::/56").subnets(new_prefix=64)) # découpage en sous réseaux pour liens inter AS
-    build_inter_as_neighbors(as_map, inter_as_iterator) # attribu addr IP lien inter AS 
-
-
-    if os.path.exists("configs"):
-       shutil.rmtree("configs") # supprime dossier s'il existe déjà
-    os.makedirs("configs", exist_ok=True) # créer dossier 
-
-    allocate_addresses(as_map) # affectation addr IP 
-    if route_reflection : 
-        build_bgp_rr(as_map)
-    else : 
-        build_bgp_fullmesh(as_map) # iBGP
-
-    for as_obj in as_map.values():
-        for router in as_obj.routers.values():
-            cfg = generate_router_config(router, as_obj, as_map, reflection_routing = route_reflection) 
-            with open(f"configs/i{router.name[1:]}_startup-config.cfg", "w") as f: #création fichier avec bon nom 
-                f.write(cfg) #écrit ce qu'il y a dans le template dans le fichier
-            print(f"Generated i{router.name[1:]}_startup-config.cfg") #message de succes 
+    snaps = resolve_snapshots(intent_path, route_reflection, auto_rr, stats, TOPOLOGY_CACHE_DIR if cache else None,
+                              LEASE_FILE if stable_addressing else None)
+
+    if stats.enabled:
+        stats.count("routers", len(snaps))
+        stats.count("links_allocated", sum(len(s.interfaces) for s in snaps) // 2) # chaque lien a une interface à chaque bout
+        stats.count("bgp_sessions", sum(len(s.bgp_neighbors) for s in snaps) // 2)
+
+    if archive:
+        # tout dans une archive : pas de manifeste (l'archive est toujours complète), un routeur rendu à la fois
+        with stats.stage("render_and_write"):
+            written = write_configs_archive(snaps, route_reflection, archive, template)
+        for filename, n_lines, n_bytes in written:
+            stats.count("lines_emitted", n_lines)
+            stats.count("bytes_written", n_bytes)
+        stats.count("configs_written", len(written))
+        print(f"{len(written)} configs écrites dans {archive}")
+        return {snap.name for snap in snaps}
+
+    with stats.stage("hash"):
+        previous = load_manifest() # lu même avec force : on garde la trace de ce qui a été déployé
+        fingerprint = generator_fingerprint(template)
+        manifest = {}
+        render_jobs = []
+        for snap in snaps:
+            entry = {"file": config_filename(snap.name), "hash": snapshot_hash(snap, route_reflection, fingerprint)}
+            old = previous.get(snap.name, {})
+            if "deployed" in old:
+                entry["deployed"] = old["deployed"] # reste l'ancien hash si la config change : à redéployer
+            manifest[snap.name] = entry
+            if (not force and old.get("file") == entry["file"] and old.get("hash") == entry["hash"]
+                    and os.path.exists(os.path.join("configs", entry["file"]))):
+                continue # rien n'a changé pour ce routeur : on ne touche pas au fichier
+            render_jobs.append((snap, route_reflection, "configs", template))
+
+    os.makedirs("configs", exist_ok=True) # créer dossier (on ne le vide plus : seules les configs modifiées sont réécrites)
+
+    # routeurs retirés de l'intent : leur ancienne config ne doit pas être déployée
+    kept_files = {entry["file"] for entry in manifest.values()}
+    for name, entry in previous.items():
+        if name not in manifest and entry.get("file") not in kept_files:
+            stale = os.path.join("configs", entry["file"])
+            if os.path.exists(stale):
+                os.remove(stale)
+                print(f"Removed {entry['file']}")
+
+    start = time.perf_counter()
+    with stats.stage("render_and_write"):
+        if jobs > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                chunksize = max(1, len(render_jobs) // (jobs * 4)) # paquets de routeurs pour limiter les aller-retours entre process
+                written = list(pool.map(write_router_config, render_jobs, chunksize=chunksize))
+        else:
+            written = [write_router_config(job) for job in render_jobs]
+    elapsed = time.perf_counter() - start
+
+    save_manifest(manifest)
+
+    for filename, n_lines, n_bytes in written:
+        print(f"Generated {filename}") #message de succes 
+        stats.count("lines_emitted", n_lines)
+        stats.count("bytes_written", n_bytes)
+    stats.count("configs_written", len(written))
+    if render_jobs:
+        print(f"{len(render_jobs)} routeurs générés en {elapsed:.3f}s ({len(render_jobs) / max(elapsed, 1e-9):.0f} routeurs/s, jobs={jobs})")
+    print(f"{len(manifest) - len(render_jobs)} configs inchangées")
+    return {job[0].name for job in render_jobs}
 
 
 if __name__ == "__main__":
     # Ce bloc ne s'exécute QUE si je lance ce fichier précisément
     intent_path = "test.json"
     route_reflection = True ## Changez à votre guise
-    main(intent_path, route_reflection)
 
+    parser = argparse.ArgumentParser(description="Génère les startup-config des routeurs à partir d'un intent file")
+    parser.add_argument("intent", nargs="?", default=intent_path, help="fichier d'intention JSON")
+    parser.add_argument("--full-mesh", action="store_true", help="iBGP en full-mesh au lieu de la route reflection")
+    parser.add_argument("--jobs", type=int, default=1, help="nombre de process pour le rendu des configs (1 = en série)")
+    parser.add_argument("--force", action="store_true", help="regénérer toutes les configs, même inchangées")
+    parser.add_argument("--auto-rr", action="store_true", help="placement automatique des route reflectors dans les AS qui n'en déclarent pas")
+    parser.add_argument("--archive", metavar="CONFIGS.zip", help="écrire toutes les configs dans une archive (.zip, .tar, .tar.gz) au lieu de configs/")
+    parser.add_argument("--template", help="squelette de config (défaut : templates/ios_15.2.cfg)")
+    parser.add_argument("--stable-addressing", action="store_true",
+                        help="garder les adresses d'un run à l'autre (address_leases.json) : un routeur ajouté ne décale pas les autres")
+    parser.add_argument("--no-cache", action="store_true", help="ne pas utiliser le cache de topologie (.topology_cache/)")
+    parser.add_argument("--profile", nargs="?", const="generation_profile.json", metavar="RAPPORT.json",
+                        help="temps par étape, compteurs, cProfile et tracemalloc -> rapport JSON (+ .prof pour cProfile)")
+    args = parser.parse_args()
+    try:
+        if args.profile:
+            with PipelineStats(cprofile=True, memory=True) as stats:
+                main(args.intent, route_reflection and not args.full_mesh, jobs=args.jobs, force=args.force, stats=stats, auto_rr=args.auto_rr,
+                     archive=args.archive, template=args.template, cache=not args.no_cache, stable_addressing=args.stable_addressing)
+            stats.dump(args.profile)
+            print(stats.summary())
+            print(f"Rapport écrit dans {args.profile}")
+        else:
+            main(args.intent, route_reflection and not args.full_mesh, jobs=args.jobs, force=args.force, auto_rr=args.auto_rr, archive=args.archive,
+                 template=args.template, cache=not args.no_cache, stable_addressing=args.stable_addressing)
+    except IntentError as e:
+        print(e) # toutes les erreurs de l'intent, pas de traceback
+        raise SystemExit(1)
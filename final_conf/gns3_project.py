@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+
+# Index d'un projet GNS3 (.gns3) : lu une seule fois (et relu seulement si le fichier a changé), avec les recherches
+# dont ont besoin les scripts de déploiement : routeur -> node_id / port console, interface -> ce qui est branché en face.
+# Sert aussi à vérifier, avant tout déploiement, que les câbles de GNS3 correspondent aux voisins / interfaces de l'intent.
+# Usage : python gns3_project.py 17_routers.gns3 intent_file_17_routers.json
+
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+# type de carte Dynamips (propriété slotN du routeur) -> nom IOS des ports
+ADAPTER_INTERFACES = {
+    "C7200-IO-FE": "FastEthernet", "C7200-IO-2FE": "FastEthernet", "C7200-IO-GE-E": "GigabitEthernet",
+    "PA-GE": "GigabitEthernet", "PA-FE-TX": "FastEthernet", "PA-2FE-TX": "FastEthernet",
+    "PA-4E": "Ethernet", "PA-8E": "Ethernet", "PA-4T+": "Serial", "PA-8T": "Serial", "PA-POS-OC3": "POS",
+    "NM-1FE-TX": "FastEthernet", "NM-4E": "Ethernet", "NM-16ESW": "FastEthernet", "GT96100-FE": "FastEthernet",
+}
+# sinon on se rabat sur le label du port dans GNS3 (g1/0, f0/0...)
+LABEL_INTERFACES = {"g": "GigabitEthernet", "f": "FastEthernet", "e": "Ethernet", "s": "Serial"}
+LABEL_RE = re.compile(r"^([a-zA-Z]+)(\d+(?:/\d+)*)$")
+
+Port = Tuple[str, str] # (nom du routeur, nom IOS de l'interface)
+
+
+@dataclass(frozen=True)
+class Gns3Node:
+    name: str
+    node_id: str
+    node_type: str
+    console: Optional[int] # port telnet, None si pas de console
+    console_type: Optional[str]
+    compute_id: str = "local" # serveur GNS3 qui émule le noeud
+
+
+@dataclass(frozen=True)
+class Gns3Link:
+    link_id: str
+    a: Port
+    b: Port
+
+
+def interface_name(node: Dict, adapter: int, port: int, label: str = "") -> str:
+    """Nom IOS (GigabitEthernet1/0...) d'un port de noeud GNS3, d'après la carte du slot, ou à défaut le label du port."""
+    kind = ADAPTER_INTERFACES.get(node.get("properties", {}).get(f"slot{adapter}") or "")
+    if kind:
+        return f"{kind}{adapter}/{port}"
+    match = LABEL_RE.match(label or "")
+    if match and match.group(1)[0].lower() in LABEL_INTERFACES:
+        return LABEL_INTERFACES[match.group(1)[0].lower()] + match.group(2)
+    return f"{adapter}/{port}" # type inconnu : au moins l'emplacement physique pour les messages d'erreur
+
+
+class Gns3Project:
+    """
+    Index d'un fichier .gns3 construit en un seul parcours des noeuds et des liens.
+
+    Paramètres :
+        path (str): chemin du fichier .gns3
+        data (Dict): contenu JSON déjà chargé
+    """
+
+    def __init__(self, path: str, data: Dict):
+        self.path = path
+        self.name = data.get("name", "")
+        self.nodes: Dict[str, Gns3Node] = {}
+        self._by_id: Dict[str, Gns3Node] = {}
+        raw_nodes = {}
+        for node in data["topology"]["nodes"]:
+            n = Gns3Node(node["name"], node["node_id"], node.get("node_type", ""), node.get("console"), node.get("console_type"),
+                         node.get("compute_id") or "local")
+            self.nodes[n.name] = n
+            self._by_id[n.node_id] = n
+            raw_nodes[n.node_id] = node
+
+        self.links: List[Gns3Link] = []
+        self._peer: Dict[Port, Port] = {}
+        for link in data["topology"].get("links", []):
+            ends = []
+            for end in link["nodes"]:
+                node = raw_nodes.get(end["node_id"])
+                if node is None:
+                    continue # lien vers un noeud supprimé : ignoré
+                label = end.get("label", {}).get("text", "")
+                ends.append((node["name"], interface_name(node, end["adapter_number"], end["port_number"], label)))
+            if len(ends) != 2:
+                continue
+            self.links.append(Gns3Link(link.get("link_id", ""), ends[0], ends[1]))
+            self._peer[ends[0]] = ends[1]
+            self._peer[ends[1]] = ends[0]
+
+    def node(self, name: str) -> Gns3Node:
+        """Noeud par nom (KeyError si absent du projet)."""
+        return self.nodes[name]
+
+    def node_by_id(self, node_id: str) -> Optional[Gns3Node]:
+        return self._by_id.get(node_id)
+
+    def node_ids(self) -> Dict[str, str]:
+        """nom -> node_id (dossier project-files/dynamips/<node_id>/ du routeur)"""
+        return {name: n.node_id for name, n in self.nodes.items()}
+
+    def consoles(self) -> Dict[str, int]:
+        """nom -> port console telnet, pour les noeuds qui en ont une"""
+        return {name: n.console for name, n in self.nodes.items() if n.console is not None}
+
+    def hosts(self) -> Dict[str, str]:
+        """nom -> compute_id (serveur GNS3 qui fait tourner le routeur), pour limiter la charge par machine"""
+        return {name: n.compute_id for name, n in self.nodes.items()}
+
+    def peer(self, router: str, interface: str) -> Optional[Port]:
+        """Ce qui est branché sur router/interface : (routeur, interface) d'en face, None si rien."""
+        return self._peer.get((router, interface))
+
+    def links_of(self, router: str) -> Dict[str, Port]:
+        """interface -> (routeur, interface) d'en face, pour tous les câbles d'un routeur"""
+        return {iface: peer for (name, iface), peer in self._peer.items() if name == router}
+
+    def dynamips_dir(self, name: str, project_root: str = "") -> str:
+        """Dossier où GNS3/Dynamips attend les configs d'un routeur."""
+        return os.path.join(project_root, "project-files", "dynamips", self.node(name).node_id, "configs")
+
+
+_CACHE: Dict[str, Tuple[int, int, Gns3Project]] = {} # chemin absolu -> (mtime_ns, taille, index)
+
+
+def load_project(path: str) -> Gns3Project:
+    """
+    Index du projet, relu seulement si le fichier a changé depuis le dernier appel (mtime ou taille) :
+    les scripts peuvent l'appeler autant qu'ils veulent sans re-parser le .gns3.
+
+    Raise:
+        FileNotFoundError: pas de fichier .gns3 à ce chemin
+    """
+    key = os.path.abspath(path)
+    st = os.stat(key)
+    cached = _CACHE.get(key)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    with open(key, "r", encoding="utf-8") as f:
+        project = Gns3Project(path, json.load(f))
+    _CACHE[key] = (st.st_mtime_ns, st.st_size, project)
+    return project
+
+
+def intent_ports(intent: Dict) -> List[Tuple[Port, Port]]:
+    """((routeur, interface), (voisin, interface du voisin)) d'après l'intent, pour les liens déclarés des 2 côtés."""
+    declared: Dict[Tuple[str, str], str] = {} # (routeur, voisin) -> interface locale
+    for as_data in intent["autonomous_systems"]:
+        for rdata in as_data["routers"]:
+            for neigh in rdata.get("neighbors", []):
+                declared[(rdata["name"], neigh["router"].split(":")[-1])] = neigh["interface"]
+    return [
+        ((router, iface), (neighbor, declared[(neighbor, router)]))
+        for (router, neighbor), iface in declared.items()
+        if (neighbor, router) in declared # lien asymétrique : signalé par la validation de l'intent, pas ici
+    ]
+
+
+def check_intent_links(project: Gns3Project, intent: Union[str, Dict]) -> List[str]:
+    """
+    Compare les voisins / interfaces de l'intent aux câbles du projet GNS3 (une config générée pour GigabitEthernet2/0
+    ne sert à rien si le câble est branché sur GigabitEthernet3/0 : le README prévient, ici on le vérifie).
+
+    Paramètres :
+        project (Gns3Project): index du projet
+        intent (str | Dict): chemin de l'intent file ou intent déjà chargé
+
+    Return:
+        List[str]: une ligne par incohérence, vide si tout correspond
+    """
+    if isinstance(intent, str):
+        with open(intent, "r", encoding="utf-8") as f:
+            intent = json.load(f)
+    errors = []
+    routers = [r["name"] for a in intent["autonomous_systems"] for r in a["routers"]]
+    for name in routers:
+        if name not in project.nodes:
+            errors.append(f"{name} : routeur de l'intent absent du projet GNS3 {project.path}")
+    for (router, iface), (neighbor, neighbor_iface) in intent_ports(intent):
+        if router not in project.nodes or neighbor not in project.nodes:
+            continue # déjà signalé
+        cabled = project.peer(router, iface)
+        if cabled is None:
+            errors.append(f"{router} {iface} : relié à {neighbor} {neighbor_iface} dans l'intent, aucun câble dans GNS3")
+        elif cabled != (neighbor, neighbor_iface):
+            errors.append(f"{router} {iface} : relié à {neighbor} {neighbor_iface} dans l'intent, à {cabled[0]} {cabled[1]} dans GNS3")
+    return errors
+
+
+if __name__ == "__main__":
+    project = load_project(sys.argv[1] if len(sys.argv) > 1 else "17_routers.gns3")
+    print(f"{project.name} : {len(project.nodes)} noeuds, {len(project.links)} liens")
+    if len(sys.argv) > 2:
+        problems = check_intent_links(project, sys.argv[2])
+        for problem in problems:
+            print(f"  - {problem}")
+        print("Intent et projet GNS3 cohérents" if not problems else f"{len(problems)} incohérence(s)")
+        raise SystemExit(1 if problems else 0)
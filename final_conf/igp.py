@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+
+# Plus courts chemins IGP intra-AS, calculés à partir de l'intent : Dijkstra (tas) sur les coûts OSPFv3
+# ("ospf_cost" des voisins, 1 par défaut) ou parcours en largeur en nombre de sauts pour RIPng (16 = infini).
+# Donne pour chaque couple de routeurs la distance et les next-hops (plusieurs si ECMP), ce que "show ipv6 route"
+# et traceroute doivent montrer, et permet de simuler un changement de coût (what-if) avant de toucher à l'intent.
+# Usage : python igp.py intent_file_17_routers.json --router R14 [--to R12] [--cost R14:R12=10]
+
+import argparse
+import heapq
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from generate_conf import AutonomousSystem, IntentError, Neighbor, ipv6_str, resolve_snapshots, TOPOLOGY_CACHE_DIR
+
+RIP_INFINITY = 16 # métrique RIPng "injoignable"
+# IOS compte 1 de plus que le nombre de sauts (la loopback d'un voisin direct est en métrique 2) : métrique = sauts + 1,
+# donc un routeur à 15 sauts est déjà à 16 = injoignable, 14 sauts au plus
+RIP_MAX_HOPS = RIP_INFINITY - 2
+DEFAULT_OSPF_COST = 1 # coût IOS d'une interface GigabitEthernet sans "ipv6 ospf cost"
+
+Graph = Dict[str, Dict[str, int]] # routeur -> {voisin: coût du lien sortant}
+
+
+def build_graph(protocol: str, routers: Iterable[Tuple[str, Iterable[Neighbor]]]) -> Graph:
+    """
+    Graphe intra-AS orienté : coût OSPFv3 de l'interface de sortie (un coût par sens, comme dans les configs),
+    ou 1 saut en RIPng. Les liens inter-AS ne sont pas dans l'IGP (passive-interface / pas de rip enable).
+    Liens parallèles entre 2 routeurs : on garde le moins cher.
+
+    Paramètres :
+        protocol (str): "ospfv3" ou "rip"
+        routers (Iterable[(nom, voisins)]): les routeurs de l'AS et leurs voisins de l'intent
+
+    Return:
+        Graph: routeur -> {voisin: coût}
+    """
+    routers = list(routers)
+    graph: Graph = {name: {} for name, _ in routers}
+    for name, neighbors in routers:
+        for neigh in neighbors:
+            if neigh.type != "intra-as" or neigh.router not in graph:
+                continue
+            cost = (neigh.ospf_cost or DEFAULT_OSPF_COST) if protocol == "ospfv3" else 1
+            previous = graph[name].get(neigh.router)
+            graph[name][neigh.router] = cost if previous is None else min(previous, cost)
+    return graph
+
+
+def igp_graph(as_obj: AutonomousSystem) -> Graph:
+    """Graphe IGP d'une AS de parse_intent (voir build_graph)."""
+    return build_graph(as_obj.protocol, ((r.name, r.neighbors) for r in as_obj.routers.values()))
+
+
+@dataclass(frozen=True, slots=True)
+class SpfResult:
+    """Résultat d'un calcul depuis une source : distance et 1ers sauts (ECMP) vers chaque routeur joignable."""
+    source: str
+    dist: Dict[str, int]
+    next_hops: Dict[str, Tuple[str, ...]] # destination -> voisins de la source par où passer, triés
+
+
+def dijkstra(graph: Graph, source: str) -> SpfResult:
+    """Dijkstra (tas) depuis source, en gardant tous les 1ers sauts des chemins de même coût."""
+    dist = {source: 0}
+    first: Dict[str, set] = {source: set()}
+    heap = [(0, source)]
+    done = set()
+    while heap:
+        d, node = heapq.heappop(heap)
+        if node in done:
+            continue
+        done.add(node) # dist[node] et first[node] sont définitifs
+        for neigh, cost in graph[node].items():
+            nd = d + cost
+            via = {neigh} if node == source else first[node]
+            known = dist.get(neigh)
+            if known is None or nd < known:
+                dist[neigh] = nd
+                first[neigh] = set(via)
+                heapq.heappush(heap, (nd, neigh))
+            elif nd == known and neigh not in done:
+                first[neigh] |= via # ECMP
+    return SpfResult(source, dist, {n: tuple(sorted(hops, key=node_key)) for n, hops in first.items() if n != source})
+
+
+def hop_count_bfs(graph: Graph, source: str, limit: int = RIP_MAX_HOPS) -> SpfResult:
+    """
+    Parcours en largeur en nombre de sauts (RIPng), au plus limit sauts : au-delà le routeur est injoignable.
+    Les distances rendues sont des sauts, pas la métrique affichée par IOS (sauts + 1).
+    """
+    dist = {source: 0}
+    first: Dict[str, set] = {source: set()}
+    frontier = deque([source])
+    while frontier:
+        node = frontier.popleft()
+        d = dist[node] + 1
+        if d > limit:
+            continue
+        for neigh in graph[node]:
+            via = {neigh} if node == source else first[node]
+            known = dist.get(neigh)
+            if known is None:
+                dist[neigh] = d
+                first[neigh] = set(via)
+                frontier.append(neigh)
+            elif known == d:
+                first[neigh] |= via # ECMP : même nombre de sauts
+    return SpfResult(source, dist, {n: tuple(sorted(hops, key=node_key)) for n, hops in first.items() if n != source})
+
+
+def node_key(name: str) -> Tuple[int, str]:
+    """R9 avant R10"""
+    digits = name.lstrip("R")
+    return (int(digits), name) if digits.isdigit() else (0, name)
+
+
+class IgpEngine:
+    """
+    Plus courts chemins d'une AS, calculés à la demande depuis chaque source puis gardés en cache
+    (all_pairs() remplit tout d'un coup).
+
+    Paramètres :
+        graph (Graph): graphe de build_graph / igp_graph
+        protocol (str): "ospfv3" (Dijkstra) ou "rip" (sauts, limite à RIP_MAX_HOPS = 14)
+    """
+
+    def __init__(self, graph: Graph, protocol: str):
+        self.graph = graph
+        self.protocol = protocol
+        self._cache: Dict[str, SpfResult] = {}
+
+    @classmethod
+    def from_as(cls, as_obj: AutonomousSystem) -> "IgpEngine":
+        return cls(igp_graph(as_obj), as_obj.protocol)
+
+    def spf(self, source: str) -> SpfResult:
+        """Résultat depuis source (calculé une seule fois)."""
+        result = self._cache.get(source)
+        if result is None:
+            result = dijkstra(self.graph, source) if self.protocol == "ospfv3" else hop_count_bfs(self.graph, source)
+            self._cache[source] = result
+        return result
+
+    def all_pairs(self) -> Dict[str, SpfResult]:
+        """Calcule depuis tous les routeurs. Return: source -> SpfResult"""
+        return {name: self.spf(name) for name in self.graph}
+
+    def distances(self, source: str) -> Dict[str, int]:
+        """destination -> distance (coût OSPF ou sauts), routeurs injoignables absents"""
+        return self.spf(source).dist
+
+    def distance(self, source: str, target: str) -> Optional[int]:
+        return self.spf(source).dist.get(target)
+
+    def next_hops(self, source: str, target: str) -> Tuple[str, ...]:
+        """Voisins de source vers lesquels target est routé (plusieurs = ECMP), vide si injoignable ou source == target."""
+        return self.spf(source).next_hops.get(target, ())
+
+    def path(self, source: str, target: str) -> List[str]:
+        """
+        Un plus court chemin (celui que suivrait un traceroute en prenant à chaque saut le 1er next-hop ECMP),
+        vide si injoignable. En OSPF chaque routeur route avec sa propre table : on suit les next-hops de proche en proche.
+        """
+        if self.distance(source, target) is None:
+            return []
+        hops = [source]
+        while hops[-1] != target:
+            hops.append(self.next_hops(hops[-1], target)[0])
+        return hops
+
+    def with_costs(self, changes: Dict[Tuple[str, str], Optional[int]]) -> "IgpEngine":
+        """
+        What-if : nouveau moteur avec des coûts changés (le moteur courant et son cache ne bougent pas).
+
+        Paramètres :
+            changes (Dict[(routeur, voisin), coût]): coût du lien routeur -> voisin (sens sortant), None pour couper le lien (2 sens)
+
+        Raise:
+            KeyError: pas de lien intra-AS routeur -> voisin
+        """
+        graph = {name: dict(edges) for name, edges in self.graph.items()}
+        for (a, b), cost in changes.items():
+            if b not in graph[a]:
+                raise KeyError(f"pas de lien IGP {a} -> {b}")
+            if cost is None:
+                del graph[a][b]
+                graph[b].pop(a, None) # lien coupé : plus d'adjacence dans aucun sens
+            else:
+                graph[a][b] = cost
+        return IgpEngine(graph, self.protocol)
+
+    def changed_routes(self, other: "IgpEngine") -> List[Tuple[str, str, Optional[int], Optional[int], Tuple[str, ...], Tuple[str, ...]]]:
+        """
+        Routes qui diffèrent entre ce moteur et other (par ex. avant / après with_costs).
+
+        Return:
+            List[(source, destination, distance avant, après, next-hops avant, après)]
+        """
+        changed = []
+        for source in self.graph:
+            before, after = self.spf(source), other.spf(source)
+            for target in sorted(set(before.dist) | set(after.dist), key=node_key):
+                if target == source:
+                    continue
+                old = (before.dist.get(target), before.next_hops.get(target, ()))
+                new = (after.dist.get(target), after.next_hops.get(target, ()))
+                if old != new:
+                    changed.append((source, target, old[0], new[0], old[1], new[1]))
+        return changed
+
+
+def engines_for(as_map: Dict[str, AutonomousSystem]) -> Dict[str, IgpEngine]:
+    """nom d'AS -> moteur IGP"""
+    return {name: IgpEngine.from_as(as_obj) for name, as_obj in as_map.items()}
+
+
+def parse_cost_change(text: str) -> Tuple[Tuple[str, str], Optional[int]]:
+    """"R14:R12=10" -> ((R14, R12), 10), "R14:R12=down" -> ((R14, R12), None)"""
+    link, _, cost = text.partition("=")
+    a, _, b = link.partition(":")
+    if not a or not b or not cost:
+        raise argparse.ArgumentTypeError(f"attendu ROUTEUR:VOISIN=COÛT ou ROUTEUR:VOISIN=down, pas {text!r}")
+    return (a, b), None if cost == "down" else int(cost)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plus courts chemins IGP (OSPFv3 / RIPng) attendus, par routeur")
+    parser.add_argument("intent", help="fichier d'intention JSON")
+    parser.add_argument("--router", action="append", help="table de ce routeur (plusieurs fois possible, défaut : tous)")
+    parser.add_argument("--to", help="seulement le chemin vers ce routeur")
+    parser.add_argument("--cost", action="append", type=parse_cost_change, default=[], metavar="R1:R2=COÛT",
+                        help="what-if : coût du lien R1 -> R2 changé (ou =down), affiche les routes qui changent")
+    parser.add_argument("--no-cache", action="store_true", help="ne pas utiliser le cache de topologie (.topology_cache/)")
+    args = parser.parse_args()
+
+    try:
+        snaps = resolve_snapshots(args.intent, cache_dir=None if args.no_cache else TOPOLOGY_CACHE_DIR)
+    except IntentError as e:
+        print(e)
+        raise SystemExit(1)
+
+    # les snapshots ont les voisins (coûts) et en plus les loopbacks, qu'on affiche comme destinations
+    by_as: Dict[str, list] = {}
+    for snap in snaps:
+        by_as.setdefault(snap.as_settings.name, []).append(snap)
+    snap_by_name = {snap.name: snap for snap in snaps}
+    engines = {name: IgpEngine(build_graph(members[0].as_settings.protocol, ((s.name, s.neighbors) for s in members)),
+                               members[0].as_settings.protocol)
+               for name, members in by_as.items()}
+    engine_of = {snap.name: engines[snap.as_settings.name] for snap in snaps}
+
+    start = time.perf_counter()
+    if not args.router: # sinon calcul à la demande, depuis les routeurs demandés seulement
+        for engine in engines.values():
+            engine.all_pairs()
+    elapsed = time.perf_counter() - start
+
+    def via(source: str, hops: Tuple[str, ...]) -> str:
+        ifaces = {n.router: n.interface for n in reversed(snap_by_name[source].neighbors) if n.type == "intra-as"}
+        return ", ".join(f"{hop} ({ifaces.get(hop, '?')})" for hop in hops)
+
+    names = args.router or [snap.name for snap in snaps]
+    for name in names:
+        if name not in engine_of:
+            print(f"{name} : routeur absent de l'intent")
+            raise SystemExit(1)
+        engine = engine_of[name]
+        unit = "coût" if engine.protocol == "ospfv3" else "sauts"
+        if args.to:
+            if args.to not in engine.graph:
+                print(f"{name} -> {args.to} : pas dans la même AS, pas de route IGP")
+                continue
+            path = engine.path(name, args.to)
+            print(f"{name} -> {args.to} : " + (f"{' -> '.join(path)} ({unit} {engine.distance(name, args.to)})" if path else "injoignable"))
+            continue
+        print(f"{name} ({snap_by_name[name].as_settings.name}, {engine.protocol})")
+        spf = engine.spf(name)
+        for target in sorted(engine.graph, key=node_key):
+            if target == name:
+                continue
+            loopback = f"{ipv6_str(snap_by_name[target].loopback)}/128"
+            if target in spf.dist:
+                ecmp = " ECMP" if len(spf.next_hops[target]) > 1 else ""
+                print(f"  {target:<6} {loopback:<28} {unit} {spf.dist[target]:<5} via {via(name, spf.next_hops[target])}{ecmp}")
+            else:
+                print(f"  {target:<6} {loopback:<28} injoignable")
+
+    if args.cost:
+        changes = dict(args.cost)
+        unknown = sorted({r for link in changes for r in link if r not in snap_by_name})
+        if unknown:
+            print(f"Routeur(s) absent(s) de l'intent : {', '.join(unknown)}")
+            raise SystemExit(1)
+        as_names = {snap_by_name[a].as_settings.name for (a, _) in changes}
+        for as_name in sorted(as_names):
+            before = engines[as_name]
+            try:
+                after = before.with_costs({k: v for k, v in changes.items() if snap_by_name[k[0]].as_settings.name == as_name})
+            except KeyError as e:
+                print(e.args[0])
+                raise SystemExit(1)
+            diff = before.changed_routes(after)
+            print(f"\nWhat-if {as_name} : {len(diff)} route(s) changée(s)")
+            for source, target, d0, d1, h0, h1 in diff:
+                print(f"  {source} -> {target} : {d0 if d0 is not None else 'injoignable'} via {', '.join(h0) or '-'}"
+                      f"  =>  {d1 if d1 is not None else 'injoignable'} via {', '.join(h1) or '-'}")
+
+    if not args.router:
+        total = sum(len(e.graph) for e in engines.values())
+        print(f"\n{len(engines)} AS, {total} routeurs, plus courts chemins depuis tous les routeurs en {elapsed:.3f}s")
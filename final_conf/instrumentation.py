@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+# Instrumentation de la chaîne de génération : chronos par étape (context manager), compteurs (liens alloués,
+# sessions BGP, lignes, octets écrits...) et en option cProfile + tracemalloc, le tout exporté en JSON.
+# Désactivée, elle ne coûte quasiment rien (les "with stats.stage(...)" ne font rien).
+
+import cProfile
+import json
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict
+
+
+class PipelineStats:
+    """
+    Collecte les temps par étape et des compteurs pendant une génération.
+
+    Paramètres :
+        enabled (bool): False -> rien n'est mesuré
+        cprofile (bool): profile aussi toute la génération avec cProfile
+        memory (bool): pic mémoire par étape et plus grosses allocations avec tracemalloc
+    """
+
+    def __init__(self, enabled: bool = True, cprofile: bool = False, memory: bool = False):
+        self.enabled = enabled
+        self.stages: Dict[str, Dict[str, float]] = {} # étape -> {"seconds", "calls", "peak_bytes"}
+        self.counters: Dict[str, int] = {}
+        self._profiler = cProfile.Profile() if enabled and cprofile else None
+        self._memory = enabled and memory
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        """with stats.stage("allocate_addresses"): ... -> temps (et pic mémoire) cumulés sous ce nom."""
+        if not self.enabled:
+            yield
+            return
+        if self._memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+            entry["seconds"] += time.perf_counter() - start
+            entry["calls"] += 1
+            if self._memory:
+                peak = tracemalloc.get_traced_memory()[1] - base
+                entry["peak_bytes"] = max(entry.get("peak_bytes", 0), peak)
+
+    def count(self, name: str, n: int = 1) -> None:
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def __enter__(self) -> "PipelineStats":
+        if self._memory:
+            tracemalloc.start()
+        if self._profiler is not None:
+            self._profiler.enable()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.total = time.perf_counter() - self._start
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self._memory:
+            self._top_allocations = [
+                {"where": str(stat.traceback[0]), "bytes": stat.size, "count": stat.count}
+                for stat in tracemalloc.take_snapshot().statistics("lineno")[:15]
+            ]
+            tracemalloc.stop()
+
+    def report(self) -> Dict:
+        """Rapport lisible par une machine (JSON)."""
+        report = {
+            "total_seconds": getattr(self, "total", time.perf_counter() - self._start),
+            "stages": self.stages,
+            "counters": self.counters,
+        }
+        if getattr(self, "_top_allocations", None):
+            report["top_allocations"] = self._top_allocations
+        if self._profiler is not None:
+            stats = pstats.Stats(self._profiler)
+            hot = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:25] # tri par temps cumulé
+            report["hot_functions"] = [
+                {"function": f"{file}:{line}({func})", "calls": nc, "tottime": tt, "cumtime": ct}
+                for (file, line, func), (cc, nc, tt, ct, _) in hot
+            ]
+        return report
+
+    def dump(self, path: str) -> None:
+        """Écrit le rapport JSON dans `path`, et les stats cProfile brutes dans `path` + ".prof" (lisibles avec pstats / snakeviz)."""
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=1)
+        if self._profiler is not None:
+            self._profiler.dump_stats(path + ".prof")
+
+    def summary(self) -> str:
+        """Petit tableau des étapes, pour la console."""
+        lines = [f"{'étape':<28} {'secondes':>9} {'appels':>7}"]
+        for name, entry in self.stages.items():
+            lines.append(f"{name:<28} {entry['seconds']:>9.4f} {entry['calls']:>7}")
+        lines.append(", ".join(f"{k}={v}" for k, v in self.counters.items()))
+        return "\n".join(lines)
+
+
+NO_STATS = PipelineStats(enabled=False) # instance par défaut quand on ne mesure rien
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+
+# Validation de l'intent file avant de construire la topologie : toutes les erreurs sont remontées en une fois
+# (chemin JSON + message), au lieu d'un KeyError au milieu de la génération d'une config.
+# Usage : python intent_schema.py intent.json
+
+import ipaddress
+import json
+import re
+import sys
+from typing import Any, Dict, List, Set, Tuple
+
+PROTOCOLS = ("ospfv3", "rip")
+ROUTER_ROLES = ("core", "border")
+RR_ROLES = ("server", "client")
+NEIGHBOR_TYPES = ("intra-as", "inter-as")
+BGP_ROLES = ("provider", "peer", "customer")
+INTER_AS_PREFIX_LENS = (64, 127) # /64 classique ou /127 point à point (RFC 6164)
+NEIGHBOR_KEYS = {"router", "type", "interface", "ospf_cost", "bgp_role"} # champs de la dataclass Neighbor
+ROUTER_NAME_RE = re.compile(r"^R\d+$") # router_id_from_name et les noms de fichiers i<num>_startup-config.cfg en dépendent
+COMMUNITY_RE = re.compile(r"^\d+:\d+$")
+
+
+class IntentError(ValueError):
+    """Intent invalide. errors : liste de "chemin: message", une par problème trouvé."""
+
+    def __init__(self, errors: List[str], path: str = "intent"):
+        self.errors = errors
+        super().__init__(f"{path} : {len(errors)} erreur(s)\n" + "\n".join(f"  - {e}" for e in errors))
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def cluster_id(value: Any) -> str:
+    """
+    Forme canonique d'un rr_cluster / rr_parent. Il sert de "bgp cluster-id", et IOS n'y accepte qu'un entier 32 bits
+    ou une adresse IPv4 pointée : 7, "7" et "007" donnent "7", "10.0.0.1" reste "10.0.0.1".
+
+    Raise:
+        ValueError: ni l'un ni l'autre (ex: "north")
+    """
+    if not isinstance(value, bool) and isinstance(value, (int, str)):
+        text = str(value).strip()
+        if text.isdigit():
+            if 1 <= int(text) <= 4294967295:
+                return str(int(text))
+        else:
+            try:
+                return str(ipaddress.IPv4Address(text))
+            except ValueError:
+                pass
+    raise ValueError(f"cluster-id invalide {value!r} (entier de 1 à 4294967295 ou adresse IPv4 attendu)")
+
+
+def cluster_cycle(parents: Dict[str, Set[str]]) -> List[str]:
+    """
+    Cycle dans la hiérarchie des clusters RR (cluster -> clusters parents, via rr_parent).
+
+    Return:
+        List[str]: le cycle, ex ["1", "2", "1"], vide s'il n'y en a pas
+    """
+    state: Dict[str, int] = {} # 1 = sur le chemin en cours, 2 = exploré sans cycle
+    for start in sorted(parents):
+        if start in state:
+            continue
+        path = [start]
+        stack = [iter(sorted(parents[start]))]
+        state[start] = 1
+        while stack:
+            nxt = next(stack[-1], None)
+            if nxt is None:
+                state[path.pop()] = 2
+                stack.pop()
+            elif state.get(nxt) == 1:
+                return path[path.index(nxt):] + [nxt]
+            elif nxt not in state:
+                state[nxt] = 1
+                path.append(nxt)
+                stack.append(iter(sorted(parents.get(nxt, ()))))
+    return []
+
+
+def _network(value: Any, where: str, errors: List[str]):
+    if not isinstance(value, str):
+        errors.append(f"{where}: préfixe IPv6 attendu (texte), trouvé {value!r}")
+        return None
+    try:
+        return ipaddress.IPv6Network(value)
+    except ValueError as e:
+        errors.append(f"{where}: préfixe IPv6 invalide {value!r} ({e})")
+        return None
+
+
+def _require(obj: Dict, key: str, kind, where: str, errors: List[str]):
+    """Renvoie obj[key] si présent et du bon type, sinon note l'erreur et renvoie None."""
+    if key not in obj:
+        errors.append(f"{where}: champ obligatoire '{key}' manquant")
+        return None
+    value = obj[key]
+    ok = _is_int(value) if kind is int else isinstance(value, kind)
+    if not ok:
+        expected = kind.__name__ if isinstance(kind, type) else "/".join(k.__name__ for k in kind)
+        errors.append(f"{where}.{key}: {expected} attendu, trouvé {value!r}")
+        return None
+    return value
+
+
+def validate_intent(data: Any) -> List[str]:
+    """
+    Vérifie la structure et la cohérence d'un intent déjà chargé (json.load).
+
+    Vérifie notamment : champs obligatoires et types, préfixes IPv6, protocole IGP (et process_id/area en OSPFv3),
+    noms de routeurs uniques au format R<num>, voisins existants et déclarés des 2 côtés, interfaces en double,
+    loopbacks dans leur pool, clusters RR (cluster-id valide, serveur dans chaque cluster, rr_parent existant et sans
+    cycle), relations BGP vers des AS existantes et communities/local-pref des rôles utilisés.
+
+    Paramètres :
+        data: le contenu de l'intent
+
+    Return:
+        List[str]: les erreurs ("chemin: message"), vide si l'intent est valide
+    """
+    errors: List[str] = []
+    if not isinstance(data, dict):
+        return [f"racine: objet JSON attendu, trouvé {type(data).__name__}"]
+
+    inter_as_pool = None
+    inter_as_prefix_len = 64
+    bgp = _require(data, "bgp", dict, "racine", errors)
+    if bgp is not None:
+        if "inter_as_link_pool" not in bgp:
+            errors.append("bgp: champ obligatoire 'inter_as_link_pool' manquant")
+        else:
+            inter_as_pool = _network(bgp["inter_as_link_pool"], "bgp.inter_as_link_pool", errors)
+        inter_as_prefix_len = bgp.get("inter_as_prefix_len", 64)
+        if inter_as_prefix_len not in INTER_AS_PREFIX_LENS or not _is_int(inter_as_prefix_len):
+            errors.append(f"bgp.inter_as_prefix_len: {inter_as_prefix_len!r} non supporté (attendu : 64 ou 127)")
+            inter_as_prefix_len = None
+        elif inter_as_pool is not None and inter_as_pool.prefixlen > inter_as_prefix_len:
+            errors.append(f"bgp.inter_as_link_pool: {inter_as_pool} plus petit qu'un /{inter_as_prefix_len}")
+            inter_as_pool = None
+
+    as_list = _require(data, "autonomous_systems", list, "racine", errors)
+    if not as_list:
+        if as_list is not None:
+            errors.append("autonomous_systems: aucune AS")
+        return errors
+
+    # 1er passage : AS et routeurs existants, pour pouvoir vérifier les références ensuite
+    as_names: Dict[str, int] = {} # nom -> asn
+    routers_by_as: Dict[str, Set[str]] = {}
+    router_owner: Dict[str, str] = {} # nom de routeur -> AS (les noms doivent être uniques dans tout l'intent)
+    for i, as_data in enumerate(as_list):
+        where = f"autonomous_systems[{i}]"
+        if not isinstance(as_data, dict):
+            errors.append(f"{where}: objet attendu")
+            continue
+        name = _require(as_data, "name", str, where, errors)
+        asn = _require(as_data, "asn", int, where, errors)
+        if asn is not None and not 1 <= asn <= 4294967295:
+            errors.append(f"{where}.asn: {asn} hors de 1..4294967295")
+        if name is None:
+            continue
+        if name in as_names:
+            errors.append(f"{where}.name: AS {name} déclarée 2 fois")
+        if asn is not None and asn in as_names.values():
+            errors.append(f"{where}.asn: ASN {asn} déjà utilisé par une autre AS")
+        as_names[name] = asn
+        routers_by_as[name] = set()
+        for j, rdata in enumerate(as_data.get("routers") or []):
+            if isinstance(rdata, dict) and isinstance(rdata.get("name"), str):
+                rname = rdata["name"]
+                if rname in router_owner:
+                    errors.append(f"{where}.routers[{j}].name: {rname} existe déjà dans {router_owner[rname]}")
+                router_owner.setdefault(rname, name)
+                routers_by_as[name].add(rname)
+    known_asns = {asn for asn in as_names.values() if asn is not None}
+
+    # 2e passage : contenu de chaque AS
+    declared: Set[Tuple[str, str, str]] = set() # (AS, routeur, voisin tel qu'écrit) pour vérifier la symétrie
+    pending: List[Tuple[str, Tuple[str, str, str]]] = [] # (chemin, lien attendu en face)
+    for i, as_data in enumerate(as_list):
+        where = f"autonomous_systems[{i}]"
+        if not isinstance(as_data, dict) or not isinstance(as_data.get("name"), str):
+            continue
+        as_name = as_data["name"]
+
+        loopback_pool = None
+        addressing = _require(as_data, "addressing", dict, where, errors)
+        if addressing is not None:
+            for key in ("ipv6_prefix", "loopback_pool", "link_pool"):
+                if key not in addressing:
+                    errors.append(f"{where}.addressing: champ obligatoire '{key}' manquant")
+                    continue
+                net = _network(addressing[key], f"{where}.addressing.{key}", errors)
+                if key == "loopback_pool":
+                    loopback_pool = net
+                if key == "link_pool" and net is not None and net.prefixlen > 64:
+                    errors.append(f"{where}.addressing.link_pool: {net} trop petit pour des /64 de liens")
+
+        routing = _require(as_data, "routing", dict, where, errors)
+        protocol = None
+        if routing is not None:
+            protocol = routing.get("protocol")
+            if protocol not in PROTOCOLS:
+                errors.append(f"{where}.routing.protocol: {protocol!r} inconnu (attendu : {', '.join(PROTOCOLS)})")
+            if protocol == "ospfv3":
+                _require(routing, "process_id", int, f"{where}.routing", errors)
+                _require(routing, "area", int, f"{where}.routing", errors)
+
+        has_border = False
+        rr_servers: List[Tuple[str, Any, Any]] = [] # (chemin, cluster, parent) pour les vérifs RR de fin d'AS
+        rr_clients: List[Tuple[str, Any]] = [] # (chemin, cluster)
+        routers = _require(as_data, "routers", list, where, errors) or []
+        for j, rdata in enumerate(routers):
+            rwhere = f"{where}.routers[{j}]"
+            if not isinstance(rdata, dict):
+                errors.append(f"{rwhere}: objet attendu")
+                continue
+            rname = _require(rdata, "name", str, rwhere, errors)
+            if rname is not None and not ROUTER_NAME_RE.match(rname):
+                errors.append(f"{rwhere}.name: {rname!r} doit être de la forme R<numéro>")
+            role = rdata.get("role")
+            if role not in ROUTER_ROLES:
+                errors.append(f"{rwhere}.role: {role!r} inconnu (attendu : {', '.join(ROUTER_ROLES)})")
+            has_border = has_border or role == "border"
+            if "rr_role" in rdata and rdata["rr_role"] not in RR_ROLES:
+                errors.append(f"{rwhere}.rr_role: {rdata['rr_role']!r} inconnu (attendu : {', '.join(RR_ROLES)})")
+            rr = {}
+            for key in ("rr_cluster", "rr_parent"):
+                if key in rdata:
+                    try:
+                        rr[key] = cluster_id(rdata[key])
+                    except ValueError as e:
+                        errors.append(f"{rwhere}.{key}: {e}")
+                        rr[key] = str(rdata[key]) # gardé tel quel pour ne pas signaler en plus tout le cluster
+            if rdata.get("rr_role", "client") == "server":
+                rr_servers.append((rwhere, rr.get("rr_cluster"), rr.get("rr_parent")))
+            elif rdata.get("rr_role", "client") == "client":
+                rr_clients.append((rwhere, rr.get("rr_cluster")))
+            if "loopback" in rdata:
+                try:
+                    ip = ipaddress.IPv6Address(rdata["loopback"])
+                    if loopback_pool is not None and ip not in loopback_pool:
+                        errors.append(f"{rwhere}.loopback: {ip} hors du pool {loopback_pool}")
+                except ValueError:
+                    errors.append(f"{rwhere}.loopback: adresse IPv6 invalide {rdata['loopback']!r}")
+
+            interfaces: Set[str] = set()
+            neighbors = rdata.get("neighbors", [])
+            if not isinstance(neighbors, list):
+                errors.append(f"{rwhere}.neighbors: liste attendue")
+                neighbors = []
+            for k, neigh in enumerate(neighbors):
+                nwhere = f"{rwhere}.neighbors[{k}]"
+                if not isinstance(neigh, dict):
+                    errors.append(f"{nwhere}: objet attendu")
+                    continue
+                unknown = set(neigh) - NEIGHBOR_KEYS
+                if unknown:
+                    errors.append(f"{nwhere}: champ(s) inconnu(s) {', '.join(sorted(unknown))}")
+                target = _require(neigh, "router", str, nwhere, errors)
+                ntype = neigh.get("type")
+                if ntype not in NEIGHBOR_TYPES:
+                    errors.append(f"{nwhere}.type: {ntype!r} inconnu (attendu : {', '.join(NEIGHBOR_TYPES)})")
+                iface = _require(neigh, "interface", str, nwhere, errors)
+                if iface is not None:
+                    if iface in interfaces:
+                        errors.append(f"{nwhere}.interface: {iface} déjà utilisée sur {rname}")
+                    interfaces.add(iface)
+                if "ospf_cost" in neigh and neigh["ospf_cost"] is not None:
+                    if not _is_int(neigh["ospf_cost"]) or not 1 <= neigh["ospf_cost"] <= 65535:
+                        errors.append(f"{nwhere}.ospf_cost: entier de 1 à 65535 attendu, trouvé {neigh['ospf_cost']!r}")
+                if target is None or rname is None or ntype not in NEIGHBOR_TYPES:
+                    continue
+
+                if ntype == "intra-as":
+                    if target == rname:
+                        errors.append(f"{nwhere}.router: {rname} ne peut pas être son propre voisin")
+                    elif target not in routers_by_as[as_name]:
+                        errors.append(f"{nwhere}.router: {target} n'existe pas dans {as_name}")
+                    else:
+                        declared.add((as_name, rname, target))
+                        pending.append((nwhere, (as_name, target, rname)))
+                else:
+                    remote_as, _, remote_router = target.partition(":")
+                    if not remote_router:
+                        errors.append(f"{nwhere}.router: voisin inter-AS attendu sous la forme AS<x>:R<y>, trouvé {target!r}")
+                    elif remote_as not in routers_by_as:
+                        errors.append(f"{nwhere}.router: AS {remote_as} inconnue")
+                    elif remote_as == as_name:
+                        errors.append(f"{nwhere}.router: voisin inter-AS dans la même AS ({target})")
+                    elif remote_router not in routers_by_as[remote_as]:
+                        errors.append(f"{nwhere}.router: {remote_router} n'existe pas dans {remote_as}")
+                    else:
+                        declared.add((as_name, rname, target))
+                        pending.append((nwhere, (remote_as, remote_router, f"{as_name}:{rname}")))
+
+        if rr_servers:
+            _validate_rr_clusters(rr_servers, rr_clients, where, errors)
+        _validate_bgp_policies(as_data.get("bgp_policies"), f"{where}.bgp_policies", known_asns, has_border, errors)
+
+    for where, expected in pending:
+        if expected not in declared:
+            as_name, router, neighbor = expected
+            errors.append(f"{where}: lien non déclaré de l'autre côté ({as_name}:{router} n'a pas {neighbor} comme voisin)")
+
+    if inter_as_pool is not None and inter_as_prefix_len is not None:
+        # chaque lien inter-AS est déclaré des 2 côtés, donc compté 2 fois
+        n_links = sum(1 for _, _, neighbor in declared if ":" in neighbor) // 2
+        capacity = 1 << (inter_as_prefix_len - inter_as_pool.prefixlen)
+        if n_links > capacity:
+            errors.append(f"bgp.inter_as_link_pool: {n_links} liens inter-AS pour {capacity} préfixes /{inter_as_prefix_len} dans {inter_as_pool}"
+                          f" (agrandir le pool ou passer inter_as_prefix_len à 127)")
+    return errors
+
+
+def _validate_rr_clusters(servers: List[Tuple[str, Any, Any]], clients: List[Tuple[str, Any]], where: str, errors: List[str]) -> None:
+    """Cohérence des clusters RR d'une AS qui a des serveurs (mêmes règles que build_bgp_rr)."""
+    clusters = {cluster for _, cluster, _ in servers}
+    for rwhere, cluster in clients:
+        if cluster not in clusters:
+            name = f"cluster {cluster}" if cluster is not None else "cluster implicite (pas de rr_cluster)"
+            errors.append(f"{rwhere}.rr_cluster: client du {name} qui n'a aucun serveur RR")
+    parents: Dict[str, Set[str]] = {}
+    for rwhere, cluster, parent in servers:
+        if parent is None:
+            continue
+        if parent == cluster:
+            errors.append(f"{rwhere}.rr_parent: {parent} est le cluster du serveur lui-même")
+        elif parent not in clusters:
+            errors.append(f"{rwhere}.rr_parent: cluster {parent} inconnu (aucun serveur RR dans ce cluster)")
+        elif cluster is not None:
+            parents.setdefault(cluster, set()).add(parent)
+    cycle = cluster_cycle(parents)
+    if cycle:
+        errors.append(f"{where}.routers: cycle dans les rr_parent des clusters {' -> '.join(cycle)}")
+
+
+def _validate_bgp_policies(policies: Any, where: str, known_asns: Set[int], has_border: bool, errors: List[str]) -> None:
+    if policies is None:
+        if has_border:
+            errors.append(f"{where}: obligatoire pour une AS avec des routeurs border (communities)")
+        return
+    if not isinstance(policies, dict):
+        errors.append(f"{where}: objet attendu")
+        return
+    used_roles = set()
+    as_neighbors = policies.get("as_neighbors", {})
+    if not isinstance(as_neighbors, dict):
+        errors.append(f"{where}.as_neighbors: objet attendu")
+        as_neighbors = {}
+    for role, asns in as_neighbors.items():
+        if role not in BGP_ROLES:
+            errors.append(f"{where}.as_neighbors.{role}: rôle inconnu (attendu : {', '.join(BGP_ROLES)})")
+            continue
+        if not isinstance(asns, list):
+            errors.append(f"{where}.as_neighbors.{role}: liste d'ASN attendue")
+            continue
+        for asn in asns:
+            if not _is_int(asn) or asn not in known_asns:
+                errors.append(f"{where}.as_neighbors.{role}: ASN {asn!r} inconnu")
+        if asns:
+            used_roles.add(role)
+
+    rules = policies.get("policies", {})
+    if not isinstance(rules, dict):
+        errors.append(f"{where}.policies: objet attendu")
+        return
+    communities = rules.get("communities", {})
+    local_pref = rules.get("local_pref", {})
+    # les routeurs border définissent les community-lists des 3 rôles, les route-maps ceux réellement utilisés
+    needed = set(BGP_ROLES) if has_border else used_roles
+    for role in sorted(needed):
+        if role not in communities:
+            errors.append(f"{where}.policies.communities: community manquante pour le rôle {role}")
+        elif not isinstance(communities[role], str) or not COMMUNITY_RE.match(communities[role]):
+            errors.append(f"{where}.policies.communities.{role}: format AA:NN attendu, trouvé {communities[role]!r}")
+    for role in sorted(used_roles):
+        if role not in local_pref:
+            errors.append(f"{where}.policies.local_pref: local-preference manquante pour le rôle {role}")
+        elif not _is_int(local_pref[role]) or local_pref[role] < 0:
+            errors.append(f"{where}.policies.local_pref.{role}: entier positif attendu, trouvé {local_pref[role]!r}")
+
+
+def load_intent(path: str, raw: bytes = None) -> Dict:
+    """
+    Lit, parse et valide un intent file.
+
+    Paramètres :
+        path (str): chemin du fichier
+        raw (bytes): contenu déjà lu (évite de relire le fichier), optionnel
+
+    Return:
+        Dict: l'intent
+
+    Raise:
+        IntentError: JSON illisible ou intent invalide, avec toutes les erreurs trouvées
+    """
+    if raw is None:
+        with open(path, "rb") as f:
+            raw = f.read()
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        where = f"ligne {e.lineno}, colonne {e.colno}: " if isinstance(e, json.JSONDecodeError) else ""
+        raise IntentError([f"{where}JSON invalide ({e.msg if isinstance(e, json.JSONDecodeError) else e})"], path) from None
+    errors = validate_intent(data)
+    if errors:
+        raise IntentError(errors, path)
+    return data
+
+
+if __name__ == "__main__":
+    try:
+        load_intent(sys.argv[1] if len(sys.argv) > 1 else "intent_file_17_routers.json")
+    except IntentError as e:
+        print(e)
+        raise SystemExit(1)
+    print("Intent valide")
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+
+# Placement automatique des route reflectors : à partir du graphe intra-AS, on choisit les RR-Servers (les routeurs
+# les plus centraux, 2 par cluster pour la redondance), on découpe les grosses AS en plusieurs clusters et on
+# rattache chaque client au cluster le plus proche en distance IGP. Le résultat est écrit dans rr_role / rr_cluster
+# des routeurs, puis build_bgp_rr construit les sessions comme si c'était dans l'intent.
+# Usage : python rr_planner.py intent.json  (affiche le plan sans rien générer)
+
+import argparse
+import math
+from typing import Dict, List
+
+from generate_conf import AutonomousSystem, parse_intent
+from igp import dijkstra, igp_graph
+
+REDUNDANCY = 2 # serveurs par cluster
+MAX_CLUSTER_SIZE = 150 # clients max par cluster avant de découper l'AS
+CANDIDATES_MIN = 16 # nb minimum de routeurs (les plus connectés) évalués comme serveurs potentiels
+
+
+def plan_as(as_obj: AutonomousSystem, redundancy: int = REDUNDANCY, max_cluster_size: int = MAX_CLUSTER_SIZE) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Calcule un placement de RR pour une AS, sans modifier les routeurs.
+
+    Principe :
+    - nombre de clusters = ceil(nb routeurs / max_cluster_size)
+    - candidats = les routeurs de plus fort degré (on ne lance Dijkstra que depuis eux, pas depuis tous les routeurs)
+    - 1er serveur = candidat de plus petite distance totale aux autres (closeness), les suivants sont pris le plus loin
+      possible des serveurs déjà choisis (k-center) pour répartir les clusters dans l'AS
+    - chaque serveur principal reçoit redundancy-1 serveurs de secours : les candidats libres les plus proches de lui
+    - clients rattachés au cluster le plus proche qui a encore de la place (les plus "loin de tout" d'abord)
+
+    Paramètres :
+        as_obj (AutonomousSystem): l'AS, avec ses voisins intra-AS
+        redundancy (int): serveurs par cluster
+        max_cluster_size (int): routeurs max par cluster (serveurs compris)
+
+    Return:
+        Dict[str, Dict[str, List[str]]]: id de cluster -> {"servers": [...], "clients": [...]}
+    """
+    names = list(as_obj.routers)
+    if not names:
+        return {}
+    graph = igp_graph(as_obj)
+    n_clusters = max(1, math.ceil(len(names) / max_cluster_size))
+    n_servers = min(len(names), n_clusters * redundancy)
+
+    position = {name: i for i, name in enumerate(names)} # ordre de l'intent, pour départager sans dépendre du hasard
+    by_degree = sorted(names, key=lambda n: (-len(graph[n]), position[n]))
+    n_candidates = min(len(names), max(CANDIDATES_MIN, 4 * n_servers))
+    candidates = by_degree[:n_candidates]
+    # Dijkstra même en RIPng (coût 1 par saut) : ici c'est une distance de placement, pas une route, pas de limite de sauts RIPng
+    dist = {c: dijkstra(graph, c).dist for c in candidates}
+    unreachable = sum(sum(costs.values()) for costs in graph.values()) + 1 # plus long que n'importe quel chemin
+
+    def d(a: str, b: str) -> float:
+        return dist[a].get(b, unreachable) if a in dist else dist[b].get(a, unreachable)
+
+    closeness = {c: sum(dist[c].get(n, unreachable) for n in names) for c in candidates}
+    primaries = [min(candidates, key=lambda c: closeness[c])]
+    while len(primaries) < n_clusters and len(primaries) < len(candidates):
+        free = [c for c in candidates if c not in primaries]
+        primaries.append(max(free, key=lambda c: (min(d(c, p) for p in primaries), -closeness[c])))
+
+    used = set(primaries)
+    clusters: Dict[str, Dict[str, List[str]]] = {}
+    for i, primary in enumerate(primaries):
+        servers = [primary]
+        backups = sorted((c for c in candidates if c not in used), key=lambda c: (d(primary, c), closeness[c]))
+        for backup in backups[:redundancy - 1]:
+            servers.append(backup)
+            used.add(backup)
+        clusters[str(i + 1)] = {"servers": servers, "clients": []}
+
+    # clients : on place d'abord ceux qui ont le moins de choix (écart entre meilleur et 2e cluster le plus grand)
+    capacity = {cid: max_cluster_size - len(c["servers"]) for cid, c in clusters.items()}
+    clients = [n for n in names if n not in used]
+    ranked = {}
+    for client in clients:
+        ranked[client] = sorted(clusters, key=lambda cid: (min(d(s, client) for s in clusters[cid]["servers"]), int(cid)))
+
+    def regret(client: str) -> float:
+        options = ranked[client]
+        best = min(d(s, client) for s in clusters[options[0]]["servers"])
+        second = min(d(s, client) for s in clusters[options[1]]["servers"]) if len(options) > 1 else best
+        return second - best
+    for client in sorted(clients, key=lambda c: (-regret(c), position[c])):
+        cid = next((c for c in ranked[client] if capacity[c] > 0), ranked[client][0]) # tout plein : on dépasse sur le + proche
+        clusters[cid]["clients"].append(client)
+        capacity[cid] -= 1
+    return clusters
+
+
+def plan_route_reflectors(as_map: Dict[str, AutonomousSystem], redundancy: int = REDUNDANCY,
+                          max_cluster_size: int = MAX_CLUSTER_SIZE, only_missing: bool = True) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Applique le placement automatique aux routeurs (rr_role, rr_cluster), avant build_bgp_rr.
+
+    Paramètres :
+        as_map (Dict[str, AutonomousSystem]): les AS, créées par parse_intent
+        redundancy (int): serveurs par cluster
+        max_cluster_size (int): routeurs max par cluster
+        only_missing (bool): True -> on ne touche pas aux AS où l'intent déclare déjà au moins un serveur
+
+    Return:
+        Dict: nom d'AS -> plan (voir plan_as), uniquement pour les AS planifiées
+    """
+    plans = {}
+    for as_obj in as_map.values():
+        if only_missing and any(r.rr_role == "server" for r in as_obj.routers.values()):
+            continue
+        clusters = plan_as(as_obj, redundancy, max_cluster_size)
+        for cid, cluster in clusters.items():
+            for role in ("servers", "clients"):
+                for name in cluster[role]:
+                    router = as_obj.routers[name]
+                    router.rr_role = role[:-1] # "server" / "client"
+                    router.rr_cluster = cid
+                    router.rr_parent = None
+        plans[as_obj.name] = clusters
+    return plans
+
+
+def session_count(plan: Dict[str, Dict[str, List[str]]]) -> int:
+    """Nombre de sessions iBGP produites par build_bgp_rr pour ce plan (à comparer à n(n-1)/2 en full-mesh)."""
+    servers = sum(len(c["servers"]) for c in plan.values())
+    total = servers * (servers - 1) // 2 # serveurs de premier niveau tous maillés (inclut les paires d'un même cluster)
+    return total + sum(len(c["servers"]) * len(c["clients"]) for c in plan.values())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Affiche le placement automatique des route reflectors pour un intent")
+    parser.add_argument("intent")
+    parser.add_argument("--redundancy", type=int, default=REDUNDANCY)
+    parser.add_argument("--max-cluster-size", type=int, default=MAX_CLUSTER_SIZE)
+    parser.add_argument("--all", action="store_true", help="replanifier aussi les AS qui ont déjà des serveurs dans l'intent")
+    args = parser.parse_args()
+
+    as_map = parse_intent(args.intent)
+    plans = plan_route_reflectors(as_map, args.redundancy, args.max_cluster_size, only_missing=not args.all)
+    for as_name, plan in plans.items():
+        n = len(as_map[as_name].routers)
+        print(f"{as_name}: {n} routeurs, {len(plan)} cluster(s), "
+              f"{session_count(plan)} sessions iBGP (full-mesh : {n * (n - 1) // 2})")
+        for cid, cluster in plan.items():
+            print(f"  cluster {cid}: serveurs {', '.join(cluster['servers'])} ; {len(cluster['clients'])} client(s)")
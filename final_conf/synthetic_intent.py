@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+
+# Générateur d'intent files synthétiques (même format que intent_file_17_routers.json) pour tester la montée en charge :
+# N AS de M routeurs, degré moyen intra-AS réglable, mélange OSPFv3 / RIPng et relations customer / peer / provider.
+# Usage : python synthetic_intent.py --as 10 --routers 100 --degree 4 -o intent_synth.json
+
+import argparse
+import json
+import random
+from typing import Dict
+
+COMMUNITIES = {"provider": "1:30", "peer": "1:20", "customer": "1:10"}
+LOCAL_PREF = {"provider": 50, "peer": 100, "customer": 200}
+OSPF_COSTS = [10, 10, 10, 100] # surtout 10, quelques liens lents à 100 comme dans l'intent 17 routeurs
+
+
+def as_addressing(asn: int) -> Dict[str, str]:
+    # un /48 par AS : loopbacks dans le premier /64, liens dans la moitié haute (/49 -> 32768 liens possibles)
+    return {
+        "ipv6_prefix": f"2001:db8:{asn:x}::/48",
+        "loopback_pool": f"2001:db8:{asn:x}::/64",
+        "link_pool": f"2001:db8:{asn:x}:8000::/49",
+    }
+
+
+def generate_intent(n_as: int, routers_per_as: int, degree: float = 4, ospf_ratio: float = 0.5,
+                    peer_ratio: float = 0.3, seed: int = 0) -> Dict:
+    """
+    Génère un intent synthétique.
+
+    Paramètres :
+        n_as (int): nombre d'AS
+        routers_per_as (int): nombre de routeurs par AS
+        degree (float): degré moyen intra-AS (anneau + cordes aléatoires, donc au moins 2)
+        ospf_ratio (float): proportion d'AS en OSPFv3 (les autres en RIPng)
+        peer_ratio (float): proportion d'AS qui ont en plus un lien de peering
+        seed (int): graine aléatoire, même graine = même intent
+
+    Return:
+        Dict: l'intent, prêt à être écrit en JSON
+    """
+    rng = random.Random(seed)
+    next_router = 1
+    as_list = []
+    # routeurs de chaque AS : noms globaux R1..RN (router_id_from_name et les noms de fichiers en dépendent)
+    for asn in range(1, n_as + 1):
+        protocol = "ospfv3" if rng.random() < ospf_ratio else "rip"
+        names = [f"R{next_router + i}" for i in range(routers_per_as)]
+        next_router += routers_per_as
+        as_list.append({"asn": asn, "protocol": protocol, "names": names,
+                        "neighbors": {name: [] for name in names}, "roles": {"provider": [], "peer": [], "customer": []}})
+
+    def add_neighbor(as_info, router, neighbor):
+        count = len(as_info["neighbors"][router])
+        neighbor["interface"] = f"GigabitEthernet{count + 1}/0"
+        as_info["neighbors"][router].append(neighbor)
+
+    # liens intra-AS : un anneau (connexe) + des cordes jusqu'au degré voulu
+    for as_info in as_list:
+        names = as_info["names"]
+        links = set()
+        if len(names) > 1:
+            for i in range(len(names)):
+                a, b = names[i], names[(i + 1) % len(names)]
+                if a != b:
+                    links.add(tuple(sorted((a, b))))
+        wanted = min(int(len(names) * degree / 2), len(names) * (len(names) - 1) // 2) # 1 routeur : aucun lien intra-AS
+        attempts = 0
+        while len(links) < wanted and attempts < wanted * 10:
+            attempts += 1
+            a, b = rng.sample(names, 2)
+            links.add(tuple(sorted((a, b))))
+        for a, b in sorted(links, key=lambda l: (int(l[0][1:]), int(l[1][1:]))):
+            cost = rng.choice(OSPF_COSTS)
+            for local, remote in ((a, b), (b, a)):
+                neigh = {"router": remote, "type": "intra-as"}
+                if as_info["protocol"] == "ospfv3":
+                    neigh["ospf_cost"] = cost
+                add_neighbor(as_info, local, neigh)
+
+    # relations inter-AS : chaque AS (sauf la 1ère) a un provider parmi les AS précédentes (hiérarchie en arbre),
+    # et certaines ont en plus un peer. Un lien physique entre 2 routeurs au hasard par relation.
+    relations = set()
+    for i in range(1, n_as):
+        relations.add((rng.randrange(0, i), i, "provider"))
+    for i in range(n_as):
+        if n_as > 2 and rng.random() < peer_ratio:
+            j = rng.randrange(0, n_as)
+            if j != i and not any({x, y} == {i, j} for x, y, _ in relations):
+                relations.add((min(i, j), max(i, j), "peer"))
+
+    for x, y, kind in sorted(relations):
+        as_x, as_y = as_list[x], as_list[y]
+        rx, ry = rng.choice(as_x["names"]), rng.choice(as_y["names"])
+        add_neighbor(as_x, rx, {"router": f"AS{as_y['asn']}:{ry}", "type": "inter-as"})
+        add_neighbor(as_y, ry, {"router": f"AS{as_x['asn']}:{rx}", "type": "inter-as"})
+        if kind == "provider": # x est le provider de y
+            as_x["roles"]["customer"].append(as_y["asn"])
+            as_y["roles"]["provider"].append(as_x["asn"])
+        else:
+            as_x["roles"]["peer"].append(as_y["asn"])
+            as_y["roles"]["peer"].append(as_x["asn"])
+
+    autonomous_systems = []
+    for as_info in as_list:
+        routing = {"protocol": as_info["protocol"]}
+        if as_info["protocol"] == "ospfv3":
+            routing.update({"process_id": 1, "area": 0})
+        routers = []
+        for k, name in enumerate(as_info["names"]):
+            neighbors = as_info["neighbors"][name]
+            routers.append({
+                "name": name,
+                "role": "border" if any(n["type"] == "inter-as" for n in neighbors) else "core",
+                "rr_role": "server" if k == 0 else "client",
+                "neighbors": neighbors,
+            })
+        autonomous_systems.append({
+            "name": f"AS{as_info['asn']}",
+            "asn": as_info["asn"],
+            "addressing": as_addressing(as_info["asn"]),
+            "routing": routing,
+            "routers": routers,
+            "bgp_policies": {
+                "as_neighbors": as_info["roles"],
+                "policies": {"communities": dict(COMMUNITIES), "local_pref": dict(LOCAL_PREF)},
+            },
+        })
+
+    return {
+        "metadata": {"name": f"synthetic-{n_as}x{routers_per_as}-d{degree}-s{seed}"},
+        "autonomous_systems": autonomous_systems,
+        "bgp": {"inter_as_link_pool": "2001:db8:ffff::/48"},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Génère un intent file synthétique")
+    parser.add_argument("--as", dest="n_as", type=int, default=5, help="nombre d'AS")
+    parser.add_argument("--routers", type=int, default=20, help="routeurs par AS")
+    parser.add_argument("--degree", type=float, default=4, help="degré moyen intra-AS")
+    parser.add_argument("--ospf-ratio", type=float, default=0.5, help="proportion d'AS en OSPFv3")
+    parser.add_argument("--peer-ratio", type=float, default=0.3, help="proportion d'AS avec un lien de peering")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="intent_synthetic.json")
+    args = parser.parse_args()
+    if args.n_as < 1 or args.routers < 1:
+        parser.error("--as et --routers doivent valoir au moins 1")
+
+    intent = generate_intent(args.n_as, args.routers, args.degree, args.ospf_ratio, args.peer_ratio, args.seed)
+    with open(args.output, "w") as f:
+        json.dump(intent, f, indent=1)
+    print(f"Intent écrit dans {args.output} ({args.n_as} AS x {args.routers} routeurs)")
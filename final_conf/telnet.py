@@ -1,91 +1,180 @@
 #!/usr/bin/env python3
 
-import json
-import telnetlib3.telnetlib as telnetlib
-import time
-from multiprocessing import Pool
+import asyncio
+
+from console import ConsoleSession, run_limited
+from config_diff import config_delta
+from deploy_scheduler import deployment_dag, run_staged, PER_HOST_CONCURRENT
+from gns3_project import load_project, check_intent_links
 
 # importation du code pour générer les configs
-from generate_conf import main as generate_main 
+from generate_conf import main as generate_main, resolve_snapshots, mark_deployed, pending_deployment
 
 INTENT_FILE = "intent_file_17_routers.json"
 GNS3_FILE = '17_routers.gns3'
 route_reflection = False
+only_changed = False # True : ne redéploie que les routeurs dont la config actuelle n'a pas encore été déployée avec succès (colonne "deployed" de configs_manifest.json)
+MAX_CONCURRENT = 100 # nombre max de consoles configurées en même temps (un seul process, tout en asyncio)
+ROUTER_TIMEOUT = 300 # secondes max pour configurer un routeur, au-delà on abandonne ce routeur
+BATCH_PUSH = True # True : config envoyée par paquets (une section à la fois) au lieu d'attendre le prompt après chaque ligne
+DIFF_PUSH = False # True : on lit la running-config et on n'envoie que le delta (voir config_diff.py), routeurs déjà configurés
+CHECK_LINKS = True # vérifie avant tout que les câbles du projet GNS3 correspondent aux interfaces de l'intent
+STAGED_DEPLOY = True # True : ordre de deploy_scheduler.py (IGP, puis RR-Servers avant clients, bordure en dernier), PER_HOST_CONCURRENT consoles par serveur GNS3
 
 
-def deploiement_telnet(data):
+async def deploiement_telnet(data):
 
     router_name, port, config_file = data
     print(f"--- Connexion à {router_name} sur le port {port} ---")
 
+    tn = ConsoleSession(router_name, port) # Connexion au routeur sur localhost (127.0.0.1)
     try:
-        tn = telnetlib.Telnet("127.0.0.1", port) # Connexion au routeur sur localhost (127.0.0.1)
+        await tn.open()
 
-        index, _, _ = tn.expect([b"yes/no]:", b"Router>", b"Press RETURN", b"console by console", b"#"], timeout=60) # on attend que le routeur soit prêt au cas où qu'il ne le soit pas (chacune de ces options indique qu'il attend une action)
+        index, _ = await tn.expect([b"yes/no]:", b"Router>", b"Press RETURN", b"console by console", b"#"], timeout=60) # on attend que le routeur soit prêt au cas où qu'il ne le soit pas (chacune de ces options indique qu'il attend une action)
 
         if index == 0: # si c'est la quetsion "Would you like to enter the initial configuration dialog? [yes/no]:" qui peut apparaître au début
-            tn.write(b'no\r\n') # on répond non à la question 
-            time.sleep(0.1)
+            await tn.write(b'no\r\n') # on répond non à la question
+            await asyncio.sleep(0.1)
+
+        await tn.write(b"\r\n") # Simule la touche "Entrée" pour réveiller la console, b signifie qu'on envoie des bytes
+
+        await asyncio.sleep(0.1) # Délai pour ne pas saturer le routeur (sleep asyncio : les autres routeurs avancent pendant ce temps)
+
+        await tn.write(b"enable\r\n") # Passage en enable
+
+        await asyncio.sleep(0.1)
+
+        if DIFF_PUSH:
+            # on compare la running-config à la config générée et on ne garde que les commandes qui changent qqch
+            await tn.run_command("terminal length 0") # pas de --More-- dans la sortie
+            running = await tn.run_command("show running-config", timeout=60)
+            with open(config_file, 'r') as f:
+                delta = config_delta(running, f.read())
+            if not delta:
+                print(f"{router_name} déjà à jour")
+                return ""
+            print(f"{router_name} : {len(delta)} commande(s) à envoyer")
+
+        await tn.write(b"conf t\r\n") # Passage en mode configuration
+
+        await tn.write(b"line con 0\r\nlogging synchronous\r\nexit\r\n") # On fait en sorte que le blabla de la console ne nous coupe pas au milieu de notre config quand une commande est en train d'etre ecrite
+
+        await asyncio.sleep(0.1)
+
+        await tn.write(b"no ip domain-lookup\r\n")  # On désactive la recherche DNS pour éviter les blocages notamment en cas d'instruction envoyée alors qu'on est pas au bon endroit (> au lieu de # par ex)
+
+        errors = []
+        if DIFF_PUSH:
+            errors = await tn.push_config(delta)
+            await tn.write(b"end\r\n")
+            await tn.read_until(b"#")
+        elif BATCH_PUSH:
+            # Envoi par paquets : un seul aller-retour par section (interface, router bgp...) au lieu d'un par ligne
+            with open(config_file, 'r') as f:
+                lines = [line for line in f if line.strip() != "end"] # "end" envoyé à part, une fois tout le reste accepté
+            errors = await tn.push_config(lines)
+            await tn.write(b"end\r\n")
+            await tn.read_until(b"#")
+        else:
+            # Lecture du fichier .cfg généré et envoi ligne par ligne
+            with open(config_file, 'r') as f:
+                for line in f:
+                    clean_line = line.strip() # On enlève les espaces et sauts de ligne invisibles
+                    if clean_line: # On envoie que si la ligne n'est pas vide
+                        await tn.write(line.rstrip("\r\n").encode('ascii') + b"\r\n")
+                        await tn.read_until(b"#") # pour attendre que le routeur soit prêt avant de continuer
 
-        tn.write(b"\r\n") # Simule la touche "Entrée" pour réveiller la console, b signifie qu'on envoie des bytes
+        # Sauvegarde et fin
+        await tn.write(b"write memory\r\n\r\n") # double \r\n pour la confirmation
+        await asyncio.sleep(0.3)
+        await tn.write(b"exit\r\n")
 
-        time.sleep(0.1) # Délai pour ne pas saturer le routeur
-        
-        tn.write(b"enable\r\n") # Passage en enable
-        
-        time.sleep(0.1)
+        await tn.read_until(b"OK]") # attendre que ce soit bien enregistré
 
-        tn.write(b"conf t\r\n") # Passage en mode configuration
+        if errors:
+            for command, message in errors:
+                print(f"{router_name} : '{command}' -> {message}")
+            return f"{router_name} ERROR ({len(errors)} commande(s) refusée(s))"
 
-        tn.write(b"line con 0\r\nlogging synchronous\r\nexit\r\n") # On fait en sorte que le blabla de la console ne nous coupe pas au milieu de notre config quand une commande est en train d'etre ecrite
+        print(f"{router_name} OK")
+        return ""
 
-        time.sleep(0.1)
+    except Exception as e:
+        print(f"Erreur sur {router_name}: {e!r}")
+        return f"{router_name} ERROR"
+    finally:
+        await tn.close()
 
-        tn.write(b"no ip domain-lookup\r\n")  # On désactive la recherche DNS pour éviter les blocages notamment en cas d'instruction envoyée alors qu'on est pas au bon endroit (> au lieu de # par ex)
-        
-        # Lecture du fichier .cfg généré et envoi ligne par ligne
-        with open(config_file, 'r') as f:
-            for line in f:
-                clean_line = line.strip() # On enlève les espaces et sauts de ligne invisibles
-                if clean_line: # On envoie que si la ligne n'est pas vide
-                    tn.write(line.encode('ascii') + b"\r\n")
-                    tn.read_until(b"#") # pour attendre que le routeur soit prêt avant de continuer
-                
-        # Sauvegarde et fin
-        tn.write(b"write memory\r\n\r\n") # double \r\n pour la confirmation
-        time.sleep(0.3)
-        tn.write(b"exit\r\n")
 
-        tn.read_until(b"OK]") # attendre que ce soit bien enregistré
+async def deploiement_avec_timeout(data, timeout=ROUTER_TIMEOUT):
+    """Déploie un routeur en abandonnant au bout de `timeout` secondes (une console bloquée ne bloque pas les autres)."""
+    try:
+        return await asyncio.wait_for(deploiement_telnet(data), timeout)
+    except asyncio.TimeoutError:
+        print(f"Erreur sur {data[0]}: timeout après {timeout}s")
+        return f"{data[0]} TIMEOUT"
 
-        print(f"{router_name} OK")
-        return ""
 
-    except Exception as e:
-        print(f"Erreur sur {router_name}: {e}")
-        return f"{router_name} ERROR"    
+async def deploiement_tous(tasks_data, concurrency=MAX_CONCURRENT, timeout=ROUTER_TIMEOUT):
+    """Configure tous les routeurs en parallèle depuis un seul process, avec au plus `concurrency` consoles ouvertes."""
+    return await run_limited([deploiement_avec_timeout(d, timeout) for d in tasks_data], concurrency)
+
+
+async def deploiement_par_etapes(tasks_data, deps, hosts, per_host=PER_HOST_CONCURRENT, concurrency=MAX_CONCURRENT, timeout=ROUTER_TIMEOUT):
+    """
+    Configure les routeurs dans l'ordre du DAG de deploy_scheduler : chacun part dès que ses prérequis sont configurés,
+    au plus per_host à la fois par serveur GNS3. Un routeur dont un prérequis a échoué n'est pas configuré.
+    Return: même format que deploiement_tous ("" si ok, sinon le message d'erreur)
+    """
+    by_name = {d[0]: d for d in tasks_data}
+    messages = {}
+
+    async def run(name):
+        messages[name] = await deploiement_avec_timeout(by_name[name], timeout)
+        return not messages[name]
+
+    statuses = await run_staged(by_name, deps, run, hosts, per_host, concurrency)
+    return [messages.get(name) or (f"{name} SKIPPED (prérequis en erreur)" if statuses[name] == "skipped" else "") for name in by_name]
+
 
 if __name__ == "__main__":
 
+    # index du projet gns3 (noeuds, ports console, câbles), lu une seule fois
+    project = load_project(GNS3_FILE)
+    if CHECK_LINKS:
+        problems = check_intent_links(project, INTENT_FILE)
+        if problems:
+            print(f"L'intent ne correspond pas au projet GNS3 ({len(problems)} incohérence(s)), rien n'est déployé :")
+            for problem in problems:
+                print(f"  - {problem}")
+            raise SystemExit(1)
+
     # lance génération des configs
     print("Début de la génération des fichiers de configuration")
     generate_main(INTENT_FILE, route_reflection)
+    pending = pending_deployment() # configs modifiées + celles dont le dernier déploiement a échoué
 
-    # charge le fichier gns3
-    with open(GNS3_FILE, 'r', encoding='utf-8') as f:
-        data = json.load(f) 
-        
     tasks_data = [] # liste pour stocker les données utiles
-    for node in data['topology']['nodes']: # le fichiers gns3 est sous la forme de liste de liste de noeuds
-        name = node['name'] # on récupère le nom,
-        port = node['console'] # le port associé
+    for name, port in project.consoles().items(): # nom du routeur -> port console associé
         path = f"configs/i{name[1:]}_startup-config.cfg" # Chemin vers où le script de génération a déposé les fichiers de config, name[1:] retire la première lettre (R17 -> 17) pour correspondre au nom du fichier config
+        if only_changed and name not in pending:
+            print(f"{name} déjà déployé avec cette config, pas de redéploiement")
+            continue
         tasks_data.append((name, port, path))
 
     print(f"Lancement du déploiement des routeurs")
-    # on lance la configuration des routeurs en parrallèle pour aller + vite
-    with Pool(processes=20) as pool:
-        results = pool.map(deploiement_telnet, tasks_data)
-
-    
-    print("\n--- Génération et Déploiement terminé ---")
\ No newline at end of file
+    if STAGED_DEPLOY:
+        # ordre calculé sur la topologie résolue (relue depuis le cache de topologie, générée juste au-dessus)
+        deps = deployment_dag(resolve_snapshots(INTENT_FILE, route_reflection), route_reflection)
+        results = asyncio.run(deploiement_par_etapes(tasks_data, deps, project.hosts()))
+    else:
+        # on lance la configuration des routeurs en parrallèle (asyncio) pour aller + vite
+        results = asyncio.run(deploiement_tous(tasks_data))
+
+    mark_deployed(data[0] for data, result in zip(tasks_data, results) if not result) # les autres restent à déployer
+    errors = [r for r in results if r]
+    if errors:
+        print(f"\n{len(errors)} routeur(s) en erreur : {', '.join(errors)}")
+
+    print("\n--- Génération et Déploiement terminé ---")
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+
+# Vérification d'un lab déployé, en une passe : on ouvre toutes les consoles du projet GNS3 en même temps (asyncio),
+# on lance les commandes "show" de la partie "Tests de fonctionnement" du README, on parse les sorties et on les compare
+# à ce que l'intent implique (interfaces up avec les adresses allouées, sessions BGP Established, voisins OSPFv3 FULL,
+# loopbacks de l'AS dans la base RIPng). Résultat : un rapport PASS/FAIL par routeur.
+# Usage : python verify_lab.py [intent.json] [projet.gns3] [--json rapport.json] [--save-dir sorties/]
+#         python verify_lab.py --offline sorties/   (revérifie des sorties déjà enregistrées, sans GNS3)
+
+import argparse
+import asyncio
+import ipaddress
+import json
+import os
+import re
+from dataclasses import dataclass, asdict, field
+from typing import Dict, List, Optional, Tuple
+
+from console import ConsoleSession, run_limited
+from generate_conf import RouterSnapshot, IntentError, ipv6_str, resolve_snapshots, router_id_from_name, TOPOLOGY_CACHE_DIR
+from gns3_project import load_project
+from igp import IgpEngine, build_graph
+
+INTENT_FILE = "intent_file_17_routers.json"
+GNS3_FILE = '17_routers.gns3'
+route_reflection = False # comme dans telnet.py : doit correspondre à la génération déployée
+MAX_CONCURRENT = 100 # consoles ouvertes en même temps
+ROUTER_TIMEOUT = 120 # secondes max pour collecter un routeur
+
+# nom de la vérification -> commande IOS ; on peut en enlever (--only) ou en ajouter d'autres (--command), les sorties
+# des commandes sans parseur sont seulement enregistrées
+COMMANDS = {
+    "interfaces": "show ipv6 interface brief",
+    "bgp": "show bgp ipv6 unicast summary",
+    "ospf": "show ipv6 ospf neighbor",
+    "rip": "show ipv6 rip database",
+}
+
+
+# --- parseurs (sorties IOS -> enregistrements) ---
+
+@dataclass(frozen=True, slots=True)
+class InterfaceStatus:
+    name: str
+    status: str # "up", "down", "administratively down"
+    protocol: str
+    addresses: Tuple[str, ...] # adresses globales et link-local, en minuscules compressées
+
+
+@dataclass(frozen=True, slots=True)
+class BgpPeerStatus:
+    ip: str
+    asn: int
+    up_down: str
+    state: str # "Established" si IOS affiche un nombre de préfixes, sinon l'état (Idle, Active...)
+    prefixes: Optional[int]
+
+
+@dataclass(frozen=True, slots=True)
+class OspfNeighborStatus:
+    router_id: str
+    state: str # FULL/DR, FULL/BDR, FULL/  -, 2WAY/DROTHER...
+    interface: str
+
+
+@dataclass(frozen=True, slots=True)
+class RipRouteStatus:
+    prefix: str
+    metric: int
+    installed: bool
+
+
+def normalize_ip(text: str) -> str:
+    """Forme compressée en minuscules (IOS affiche 2001:100:1::1 en majuscules), texte inchangé si ce n'est pas une adresse."""
+    try:
+        return ipv6_str(int(ipaddress.IPv6Address(text)))
+    except ValueError:
+        return text
+
+
+INTERFACE_LINE = re.compile(r"^(\S+)\s+\[([^/\]]+)/([^\]]+)\]")
+
+
+def parse_interface_brief(output: str) -> Dict[str, InterfaceStatus]:
+    """show ipv6 interface brief -> interface -> état et adresses"""
+    found: Dict[str, list] = {}
+    order = []
+    for line in output.splitlines():
+        match = INTERFACE_LINE.match(line)
+        if match:
+            order.append(match.groups())
+            found[match.group(1)] = []
+        elif line.startswith(" ") and order and line.strip() and line.strip() != "unassigned":
+            found[order[-1][0]].append(normalize_ip(line.strip()))
+    return {name: InterfaceStatus(name, status.strip(), proto.strip(), tuple(found[name])) for name, status, proto in order}
+
+
+def parse_bgp_summary(output: str) -> Dict[str, BgpPeerStatus]:
+    """
+    show bgp ipv6 unicast summary -> ip du voisin -> état. IOS passe à la ligne après une adresse IPv6 longue,
+    la suite (V, AS, ...) est sur la ligne d'en dessous : on recolle les 2.
+    """
+    peers = {}
+    in_table = False
+    pending = ""
+    for line in output.splitlines():
+        if line.startswith("Neighbor"):
+            in_table = True
+            continue
+        if not in_table or not line.strip():
+            continue
+        tokens = (pending + " " + line).split()
+        if len(tokens) == 1 and ":" in tokens[0]:
+            pending = tokens[0] # adresse seule sur sa ligne
+            continue
+        pending = ""
+        if len(tokens) < 10 or ":" not in tokens[0]:
+            continue
+        ip, _, asn, _, _, _, _, _, up_down = tokens[:9]
+        state = " ".join(tokens[9:])
+        prefixes = int(state) if state.isdigit() else None
+        ip = normalize_ip(ip)
+        peers[ip] = BgpPeerStatus(ip, int(asn), up_down, "Established" if prefixes is not None else state, prefixes)
+    return peers
+
+
+NETWORK_ENTRIES = re.compile(r"^(\d+) network entries", re.MULTILINE)
+
+
+def parse_bgp_network_entries(output: str) -> int:
+    """Nombre de préfixes dans la table BGP, d'après l'en-tête de show bgp ipv6 unicast summary (0 si table vide : pas de ligne)."""
+    match = NETWORK_ENTRIES.search(output)
+    return int(match.group(1)) if match else 0
+
+
+OSPF_LINE = re.compile(r"^(\d+\.\d+\.\d+\.\d+)\s+(\d+)\s+(\S+(?:\s+-)?)\s+(\d+:\d+:\d+)\s+(\d+)\s+(\S+)\s*$")
+
+
+def parse_ospf_neighbors(output: str) -> List[OspfNeighborStatus]:
+    """show ipv6 ospf neighbor -> voisins (un par ligne)"""
+    neighbors = []
+    for line in output.splitlines():
+        match = OSPF_LINE.match(line.strip())
+        if match:
+            neighbors.append(OspfNeighborStatus(match.group(1), re.sub(r"\s+", "", match.group(3)), match.group(6)))
+    return neighbors
+
+
+RIP_LINE = re.compile(r"^\s*([0-9A-Fa-f:]+/\d+), metric (\d+)(, installed)?")
+
+
+def parse_rip_database(output: str) -> Dict[str, RipRouteStatus]:
+    """show ipv6 rip database -> préfixe -> métrique (les lignes "via" en dessous sont ignorées)"""
+    routes = {}
+    for line in output.splitlines():
+        match = RIP_LINE.match(line)
+        if match:
+            net = ipaddress.IPv6Network(match.group(1), strict=False)
+            prefix = f"{ipv6_str(int(net.network_address))}/{net.prefixlen}"
+            routes[prefix] = RipRouteStatus(prefix, int(match.group(2)), bool(match.group(3)))
+    return routes
+
+
+# --- vérifications (enregistrements + intent -> PASS/FAIL) ---
+
+@dataclass(frozen=True, slots=True)
+class CheckResult:
+    router: str
+    check: str # interfaces, bgp, ospf, rip, console
+    item: str # interface, voisin, préfixe...
+    ok: bool
+    detail: str
+
+
+def check_interfaces(snap: RouterSnapshot, output: str) -> List[CheckResult]:
+    """Chaque interface de l'intent (et Loopback0) up/up avec l'adresse allouée."""
+    status = parse_interface_brief(output)
+    expected = [("Loopback0", ipv6_str(snap.loopback))] + [(iface.name, ipv6_str(iface.ip)) for iface in snap.interfaces]
+    results = []
+    for name, address in expected:
+        iface = status.get(name)
+        if iface is None:
+            results.append(CheckResult(snap.name, "interfaces", name, False, "absente de show ipv6 interface brief"))
+        elif (iface.status, iface.protocol) != ("up", "up"):
+            results.append(CheckResult(snap.name, "interfaces", name, False, f"[{iface.status}/{iface.protocol}]"))
+        elif address not in iface.addresses:
+            results.append(CheckResult(snap.name, "interfaces", name, False, f"{address} attendue, trouvé {', '.join(iface.addresses) or 'rien'}"))
+        else:
+            results.append(CheckResult(snap.name, "interfaces", name, True, f"up/up {address}"))
+    return results
+
+
+def check_bgp(snap: RouterSnapshot, output: str) -> List[CheckResult]:
+    """Chaque voisin de bgp_neighbors présent et Established, avec le bon AS."""
+    peers = parse_bgp_summary(output)
+    results = []
+    for ip, asn in snap.bgp_neighbors:
+        text = ipv6_str(ip)
+        peer = peers.get(text)
+        if peer is None:
+            results.append(CheckResult(snap.name, "bgp", text, False, f"voisin AS {asn} absent de show bgp summary"))
+        elif peer.asn != asn:
+            results.append(CheckResult(snap.name, "bgp", text, False, f"AS {peer.asn} au lieu de {asn}"))
+        elif peer.state != "Established":
+            results.append(CheckResult(snap.name, "bgp", text, False, f"{peer.state} depuis {peer.up_down}"))
+        else:
+            results.append(CheckResult(snap.name, "bgp", text, True, f"Established, {peer.prefixes} préfixe(s) reçu(s)"))
+    return results
+
+
+def check_ospf(snap: RouterSnapshot, output: str) -> List[CheckResult]:
+    """Chaque voisin intra-AS (OSPFv3) en FULL sur l'interface de l'intent."""
+    if snap.as_settings.protocol != "ospfv3":
+        return []
+    by_rid = {}
+    for neigh in parse_ospf_neighbors(output):
+        by_rid.setdefault(neigh.router_id, []).append(neigh)
+    results = []
+    for neigh in snap.neighbors:
+        if neigh.type != "intra-as":
+            continue
+        rid = router_id_from_name(neigh.router)
+        seen = [n for n in by_rid.get(rid, []) if n.interface == neigh.interface]
+        if not seen:
+            results.append(CheckResult(snap.name, "ospf", neigh.router, False, f"pas d'adjacence {rid} sur {neigh.interface}"))
+        elif not seen[0].state.startswith("FULL"):
+            results.append(CheckResult(snap.name, "ospf", neigh.router, False, f"{seen[0].state} sur {neigh.interface}"))
+        else:
+            results.append(CheckResult(snap.name, "ospf", neigh.router, True, f"{seen[0].state} sur {neigh.interface}"))
+    return results
+
+
+def check_rip(snap: RouterSnapshot, output: str, engine: IgpEngine, loopbacks: Dict[str, int]) -> List[CheckResult]:
+    """Les loopbacks des routeurs de l'AS joignables en RIPng (14 sauts au plus, métrique IOS < 16, voir igp.py) sont dans la base RIP."""
+    if snap.as_settings.protocol != "rip":
+        return []
+    routes = parse_rip_database(output)
+    results = []
+    for target, hops in sorted(engine.distances(snap.name).items()):
+        if target == snap.name:
+            continue
+        prefix = f"{ipv6_str(loopbacks[target])}/128"
+        route = routes.get(prefix)
+        if route is None:
+            results.append(CheckResult(snap.name, "rip", prefix, False, f"loopback de {target} ({hops} saut(s)) absente de la base RIP"))
+        else:
+            results.append(CheckResult(snap.name, "rip", prefix, True, f"{target} métrique {route.metric}"))
+    return results
+
+
+def check_router(snap: RouterSnapshot, outputs: Dict[str, str], engine: IgpEngine, loopbacks: Dict[str, int]) -> List[CheckResult]:
+    """Toutes les vérifications d'un routeur dont on a les sorties (celles qui n'ont pas été collectées sont sautées)."""
+    results = []
+    if "interfaces" in outputs:
+        results += check_interfaces(snap, outputs["interfaces"])
+    if "bgp" in outputs:
+        results += check_bgp(snap, outputs["bgp"])
+    if "ospf" in outputs:
+        results += check_ospf(snap, outputs["ospf"])
+    if "rip" in outputs:
+        results += check_rip(snap, outputs["rip"], engine, loopbacks)
+    return results
+
+
+# --- collecte (consoles en parallèle) ---
+
+async def open_exec_session(name: str, port: int) -> ConsoleSession:
+    """Console ouverte en mode enable, prête pour run_command (terminal length 0 déjà passé)."""
+    tn = ConsoleSession(name, port)
+    await tn.open()
+    try:
+        await tn.write(b"\r\n") # réveille la console
+        index, _ = await tn.expect([f"{name}#".encode("ascii"), f"{name}>".encode("ascii")], timeout=30)
+        if index == -1:
+            raise TimeoutError(f"{name} : pas de prompt sur la console (port {port})")
+        if index == 1:
+            await tn.send("enable")
+            await tn.read_until(f"{name}#".encode("ascii"), timeout=10)
+        await tn.run_command("terminal length 0") # pas de --More--
+    except BaseException:
+        await tn.close()
+        raise
+    return tn
+
+
+async def collect_router(name: str, port: int, commands: Dict[str, str]) -> Dict[str, str]:
+    """Ouvre la console d'un routeur et lance les commandes. Return: nom de la vérification -> sortie brute"""
+    tn = await open_exec_session(name, port)
+    try:
+        return {check: await tn.run_command(command, timeout=60) for check, command in commands.items()}
+    finally:
+        await tn.close()
+
+
+async def collect_with_timeout(name: str, port: int, commands: Dict[str, str], timeout: float = ROUTER_TIMEOUT):
+    """Return: (nom, sorties, erreur ou None) ; une console bloquée ou fermée ne bloque pas les autres"""
+    try:
+        return name, await asyncio.wait_for(collect_router(name, port, commands), timeout), None
+    except asyncio.TimeoutError:
+        return name, {}, f"timeout après {timeout}s"
+    except (OSError, ConnectionError, TimeoutError) as e:
+        return name, {}, str(e) or repr(e)
+
+
+async def collect_all(consoles: Dict[str, int], commands: Dict[str, str], concurrency: int = MAX_CONCURRENT,
+                      timeout: float = ROUTER_TIMEOUT) -> List[Tuple[str, Dict[str, str], Optional[str]]]:
+    """Collecte tous les routeurs en même temps, au plus `concurrency` consoles ouvertes."""
+    return await run_limited([collect_with_timeout(n, p, commands, timeout) for n, p in consoles.items()], concurrency)
+
+
+def save_outputs(directory: str, name: str, outputs: Dict[str, str]) -> None:
+    """Sorties brutes dans <dossier>/<routeur>_<vérification>.txt (relues par --offline)"""
+    os.makedirs(directory, exist_ok=True)
+    for check, text in outputs.items():
+        with open(os.path.join(directory, f"{name}_{check}.txt"), "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+def load_outputs(directory: str, name: str, checks: List[str]) -> Dict[str, str]:
+    outputs = {}
+    for check in checks:
+        path = os.path.join(directory, f"{name}_{check}.txt")
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                outputs[check] = f.read()
+    return outputs
+
+
+@dataclass
+class LabReport:
+    """Rapport de vérification d'un lab : résultats par routeur + routeurs qu'on n'a pas pu interroger."""
+    results: List[CheckResult] = field(default_factory=list)
+    unreachable: Dict[str, str] = field(default_factory=dict) # routeur -> erreur console
+
+    @property
+    def ok(self) -> bool:
+        return not self.unreachable and all(r.ok for r in self.results)
+
+    def by_router(self) -> Dict[str, List[CheckResult]]:
+        routers: Dict[str, List[CheckResult]] = {}
+        for result in self.results:
+            routers.setdefault(result.router, []).append(result)
+        return routers
+
+    def lines(self, verbose: bool = False) -> List[str]:
+        """Rapport texte : une ligne par routeur, et le détail des échecs (de tout si verbose)."""
+        lines = []
+        for name, results in self.by_router().items():
+            failed = [r for r in results if not r.ok]
+            lines.append(f"{name:<6} {'FAIL' if failed else 'PASS'} ({len(results) - len(failed)}/{len(results)})")
+            for r in results if verbose else failed:
+                lines.append(f"    [{r.check}] {r.item} : {'ok' if r.ok else 'ÉCHEC'}, {r.detail}")
+        for name, error in self.unreachable.items():
+            lines.append(f"{name:<6} FAIL console : {error}")
+        total = len(self.results)
+        passed = sum(r.ok for r in self.results)
+        lines.append(f"\n{'PASS' if self.ok else 'FAIL'} : {passed}/{total} vérifications réussies, "
+                     f"{len(self.unreachable)} routeur(s) injoignable(s)")
+        return lines
+
+    def to_json(self) -> Dict:
+        return {"ok": self.ok, "results": [asdict(r) for r in self.results], "unreachable": self.unreachable}
+
+
+def verify_lab(snaps: List[RouterSnapshot], outputs: Dict[str, Dict[str, str]], errors: Dict[str, str]) -> LabReport:
+    """
+    Compare les sorties collectées à l'intent.
+
+    Paramètres :
+        snaps (List[RouterSnapshot]): topologie résolue (la même que pour la génération déployée)
+        outputs (Dict[str, Dict[str, str]]): routeur -> vérification -> sortie brute
+        errors (Dict[str, str]): routeur -> erreur de collecte (console injoignable...)
+
+    Return:
+        LabReport
+    """
+    loopbacks = {s.name: s.loopback for s in snaps}
+    by_as: Dict[str, List[RouterSnapshot]] = {}
+    for snap in snaps:
+        by_as.setdefault(snap.as_settings.name, []).append(snap)
+    engines = {name: IgpEngine(build_graph(members[0].as_settings.protocol, ((s.name, s.neighbors) for s in members)),
+                               members[0].as_settings.protocol)
+               for name, members in by_as.items()}
+
+    report = LabReport()
+    for snap in snaps:
+        if snap.name in errors:
+            report.unreachable[snap.name] = errors[snap.name]
+        elif snap.name in outputs:
+            report.results += check_router(snap, outputs[snap.name], engines[snap.as_settings.name], loopbacks)
+        else:
+            report.unreachable[snap.name] = "routeur de l'intent sans console dans le projet GNS3 / sans sorties"
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vérifie un lab déployé (interfaces, BGP, OSPFv3, RIPng) par rapport à l'intent")
+    parser.add_argument("intent", nargs="?", default=INTENT_FILE, help="fichier d'intention JSON")
+    parser.add_argument("gns3", nargs="?", default=GNS3_FILE, help="projet .gns3 (ports console)")
+    parser.add_argument("--rr", action="store_true", help="la génération déployée était en route reflection")
+    parser.add_argument("--only", help=f"vérifications à faire, séparées par des virgules (défaut : {','.join(COMMANDS)})")
+    parser.add_argument("--command", action="append", default=[], metavar="NOM=COMMANDE",
+                        help="commande en plus, sortie seulement enregistrée (avec --save-dir)")
+    parser.add_argument("--save-dir", help="enregistrer les sorties brutes dans ce dossier")
+    parser.add_argument("--offline", metavar="DOSSIER", help="ne pas se connecter : revérifier des sorties enregistrées avec --save-dir")
+    parser.add_argument("--jobs", type=int, default=MAX_CONCURRENT, help="consoles ouvertes en même temps")
+    parser.add_argument("--json", metavar="RAPPORT.json", help="écrire le rapport en JSON")
+    parser.add_argument("-v", "--verbose", action="store_true", help="détailler aussi les vérifications réussies")
+    args = parser.parse_args()
+
+    commands = dict(COMMANDS)
+    if args.only:
+        unknown = [c for c in args.only.split(",") if c not in COMMANDS]
+        if unknown:
+            parser.error(f"vérification(s) inconnue(s) : {', '.join(unknown)} (connues : {', '.join(COMMANDS)})")
+        commands = {c: COMMANDS[c] for c in args.only.split(",")}
+    for extra in args.command:
+        check, _, command = extra.partition("=")
+        if not check or not command:
+            parser.error(f"attendu NOM=COMMANDE, pas {extra!r}")
+        commands[check] = command
+
+    reflection = route_reflection or args.rr
+    try:
+        snaps = resolve_snapshots(args.intent, reflection, cache_dir=TOPOLOGY_CACHE_DIR)
+    except IntentError as e:
+        print(e)
+        raise SystemExit(1)
+
+    errors: Dict[str, str] = {}
+    if args.offline:
+        outputs = {s.name: load_outputs(args.offline, s.name, list(commands)) for s in snaps}
+        outputs = {name: out for name, out in outputs.items() if out}
+    else:
+        consoles = load_project(args.gns3).consoles()
+        wanted = {s.name: consoles[s.name] for s in snaps if s.name in consoles}
+        print(f"Collecte sur {len(wanted)} console(s) : {', '.join(commands.values())}")
+        collected = asyncio.run(collect_all(wanted, commands, args.jobs))
+        outputs = {name: out for name, out, error in collected if error is None}
+        errors = {name: error for name, _, error in collected if error is not None}
+        if args.save_dir:
+            for name, out in outputs.items():
+                save_outputs(args.save_dir, name, out)
+            print(f"Sorties enregistrées dans {args.save_dir}")
+
+    report = verify_lab(snaps, outputs, errors)
+    print("\n".join(report.lines(args.verbose)))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report.to_json(), f, indent=2, ensure_ascii=False)
+        print(f"Rapport écrit dans {args.json}")
+    raise SystemExit(0 if report.ok else 1)